@@ -1,95 +1,401 @@
+import atexit
+import contextvars
+import itertools
 import json
 import os
 import re
-import requests
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+from cache import TTLCache, VersionedCache
+from docsearch import DocumentIndex
+from expression import ExpressionEngine, ExpressionLimitError
+from fileops import FileWorkspace, Page
+from metrics import metrics
+from scheduler import ReminderScheduler
+from search import NoteIndex
+from slots import slot_extractor
+from storage import COLLECTIONS, create_store
+
 logger = logging.getLogger(__name__)
 
+# Overrides the default "data" directory unless configure() is called
+DATA_DIR_ENV = "AGENT_DATA_DIR"
+# Directory of text/markdown files answering search requests (default: <data dir>/documents)
+SEARCH_DIR_ENV = "AGENT_SEARCH_DIR"
+# The only directory file operations may touch (default: <data dir>/files)
+FILES_DIR_ENV = "AGENT_FILES_DIR"
+
+# JSON storage writes every change before returning by default. With a delay
+# (config.json: write_delay_ms, write_batch) it writes changes in groups: this
+# long after the first unwritten one, or once this many are pending
+DEFAULT_WRITE_DELAY_MS = 0
+DEFAULT_WRITE_BATCH = 100
+
+_NON_MATH_CHARS = re.compile(r'[^0-9+\-*/().\s]')
+
+# Distinguishes DataManager instances in version tokens
+_instances = itertools.count()
+
 class DataManager:
     """Handles data persistence for notes and reminders"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = None, storage: str = None):
+        data_dir = data_dir or get_data_dir()
         self.data_dir = data_dir
-        self.notes_file = os.path.join(data_dir, "notes.json")
-        self.reminders_file = os.path.join(data_dir, "reminders.json")
         self.config_file = os.path.join(data_dir, "config.json")
         
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
         
-        # Load existing data
-        self.notes = self._load_notes()
-        self.reminders = self._load_reminders()
+        # config.json selects the storage backend; that backend then owns everything
+        bootstrap = self._load_bootstrap()
+        self.storage = storage or bootstrap.get("storage", "json")
+        self._store_options = self._write_options(bootstrap)
+        self.store = create_store(self.storage, data_dir, **self._options_for(self.storage))
         self.config = self._load_config()
+        
+        # Serializes mutations (and id assignment) across threads
+        self._lock = threading.RLock()
+        
+        # Full-text index over notes, loaded on first search
+        self._note_index = None
+        
+        # Last id handed out per collection; ids are never reused
+        self._last_ids: Dict[str, int] = {}
+        
+        # Bumped (after the write) on every mutation, so anything derived from
+        # a collection can tell whether it is still current
+        self.instance = next(_instances)
+        self.versions: Dict[str, int] = dict.fromkeys(COLLECTIONS + ("config",), 0)
     
-    def _load_notes(self) -> List[Dict[str, Any]]:
-        """Load notes from JSON file"""
+    def _load_bootstrap(self) -> Dict[str, Any]:
+        """Load config.json, which names the storage backend"""
         try:
-            if os.path.exists(self.notes_file):
-                with open(self.notes_file, 'r') as f:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r') as f:
                     return json.load(f)
         except Exception as e:
-            logger.error(f"Error loading notes: {e}")
-        return []
+            logger.error(f"Error loading config: {e}")
+        return {}
     
-    def _load_reminders(self) -> List[Dict[str, Any]]:
-        """Load reminders from JSON file"""
-        try:
-            if os.path.exists(self.reminders_file):
-                with open(self.reminders_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading reminders: {e}")
-        return []
+    @staticmethod
+    def _write_options(config: Dict[str, Any]) -> Dict[str, Any]:
+        """Group commit settings for the JSON backend (see storage.JsonFileStore)"""
+        return {
+            "write_delay": config.get("write_delay_ms", DEFAULT_WRITE_DELAY_MS) / 1000,
+            "write_batch": config.get("write_batch", DEFAULT_WRITE_BATCH),
+            "fsync": config.get("fsync", "always"),
+        }
+    
+    def _options_for(self, backend: str) -> Dict[str, Any]:
+        return self._store_options if backend == "json" else {}
     
     def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from JSON file"""
+        """Load configuration from storage"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
+            config = self.store.load_config()
+            if config is not None:
+                return config
         except Exception as e:
             logger.error(f"Error loading config: {e}")
-        return {"weather_api_key": "", "default_city": "London"}
+        return {"weather_api_key": "", "default_city": "London", "weather_cache_ttl": 600}
     
-    def save_notes(self):
-        """Save notes to JSON file"""
+    # A snapshot, not the stored list: change notes and reminders through
+    # add_note/add_reminder/update_reminder, so they reach every backend
+    @property
+    def notes(self) -> Tuple[Dict[str, Any], ...]:
+        """All notes (prefer recent_notes/count_notes, which don't load everything)"""
+        return tuple(self._query(self.store.all, "notes", default=[]))
+    
+    @property
+    def reminders(self) -> Tuple[Dict[str, Any], ...]:
+        """All reminders (prefer active_reminders/count_reminders)"""
+        return tuple(self._query(self.store.all, "reminders", default=[]))
+    
+    def _query(self, method, *args, default=None, **fields):
         try:
-            with open(self.notes_file, 'w') as f:
-                json.dump(self.notes, f, indent=2)
+            return method(*args, **fields)
         except Exception as e:
-            logger.error(f"Error saving notes: {e}")
+            logger.error(f"Error reading {args[0]}: {e}")
+            return default
+    
+    def recent_notes(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """The last `limit` notes, oldest first"""
+        return self._query(self.store.recent, "notes", limit, default=[])
+    
+    def count_notes(self) -> int:
+        return self._query(self.store.count, "notes", default=0)
     
+    def active_reminders(self) -> List[Dict[str, Any]]:
+        """Reminders that are not completed, in creation order"""
+        return self._query(self.store.find, "reminders", default=[], completed=False)
+    
+    def count_reminders(self, **fields) -> int:
+        return self._query(self.store.count, "reminders", default=0, **fields)
+    
+    def get_reminder(self, reminder_id: int) -> Optional[Dict[str, Any]]:
+        return self._query(self.store.get, "reminders", reminder_id)
+    
+    def version(self, *names: str) -> Tuple[int, ...]:
+        """Token that changes whenever any of the named collections changes"""
+        return (self.instance,) + tuple(self.versions[name] for name in names)
+    
+    def _bump(self, *names: str):
+        """Record a mutation (call with the lock held)"""
+        for name in names:
+            self.versions[name] += 1
+    
+    @metrics.timed("agent_persistence_seconds", operation="save_notes")
+    def save_notes(self):
+        """Save all notes"""
+        with self._lock:
+            try:
+                self.store.save("notes", list(self.notes))
+            except Exception as e:
+                logger.error(f"Error saving notes: {e}")
+            # Notes may have changed anywhere, so rebuild the index from scratch
+            NoteIndex(self.data_dir).reset()
+            self._note_index = None
+            self._bump("notes")
+    
+    @metrics.timed("agent_persistence_seconds", operation="save_reminders")
     def save_reminders(self):
-        """Save reminders to JSON file"""
-        try:
-            with open(self.reminders_file, 'w') as f:
-                json.dump(self.reminders, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving reminders: {e}")
+        """Save all reminders"""
+        with self._lock:
+            try:
+                self.store.save("reminders", list(self.reminders))
+            except Exception as e:
+                logger.error(f"Error saving reminders: {e}")
+            self._bump("reminders")
+    
+    def _next_id(self, name: str) -> int:
+        """Allocate an id one above the largest ever seen (call with the lock held)"""
+        last = self._last_ids.get(name)
+        if last is None:
+            last = self.store.max_id(name)
+        self._last_ids[name] = last + 1
+        return last + 1
+    
+    @metrics.timed("agent_persistence_seconds", operation="add_note")
+    def add_note(self, note: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a note (assigning the next id) and persist just that mutation"""
+        with self._lock:
+            note = {"id": self._next_id("notes"), **note}
+            try:
+                self.store.add("notes", note)
+            except Exception as e:
+                logger.error(f"Error saving notes: {e}")
+            if self._note_index is not None:
+                self._note_index.add(note)
+            self._bump("notes")
+        return note
+    
+    @property
+    def note_index(self) -> NoteIndex:
+        """Full-text note index, loaded and brought up to date on first use"""
+        if self._note_index is None:
+            with self._lock:
+                if self._note_index is None:
+                    index = NoteIndex(self.data_dir)
+                    try:
+                        index.load()
+                    except Exception as e:
+                        logger.error(f"Error loading note index: {e}")
+                    if index.covered > self.count_notes():
+                        index.reset()  # Stale index from other data
+                    index.catch_up(self.store.iterate("notes", index.covered))
+                    self._note_index = index
+        return self._note_index
     
+    def search_notes(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Notes ranked by relevance to query"""
+        results = []
+        for note_id, _ in self.note_index.search(query, limit):
+            note = self.store.get("notes", note_id)
+            if note is not None:
+                results.append(note)
+        return results
+    
+    @metrics.timed("agent_persistence_seconds", operation="add_reminder")
+    def add_reminder(self, reminder: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a reminder (assigning the next id) and persist just that mutation"""
+        with self._lock:
+            reminder = {"id": self._next_id("reminders"), **reminder}
+            try:
+                self.store.add("reminders", reminder)
+            except Exception as e:
+                logger.error(f"Error saving reminders: {e}")
+            self._bump("reminders")
+        return reminder
+    
+    @metrics.timed("agent_persistence_seconds", operation="update_reminder")
+    def update_reminder(self, reminder: Dict[str, Any]):
+        """Persist a changed reminder (matched by id)"""
+        with self._lock:
+            try:
+                self.store.update("reminders", reminder)
+            except Exception as e:
+                logger.error(f"Error saving reminders: {e}")
+            self._bump("reminders")
+    
+    @metrics.timed("agent_persistence_seconds", operation="save_config")
     def save_config(self):
-        """Save configuration to JSON file"""
+        """Save configuration"""
+        with self._lock:
+            try:
+                self.store.save_config(self.config)
+            except Exception as e:
+                logger.error(f"Error saving config: {e}")
+            self._bump("config")
+    
+    def migrate_storage(self, backend: str):
+        """Copy all data into another storage backend and switch to it"""
+        with self._lock:
+            if backend == self.storage:
+                return
+            
+            target = create_store(backend, self.data_dir, **self._options_for(backend))
+            for name in COLLECTIONS:
+                target.save(name, list(self.store.all(name)))
+            
+            self.config["storage"] = backend
+            target.save_config(self.config)
+            if backend == "sqlite":
+                # config.json now only points at the database
+                with open(self.config_file, 'w') as f:
+                    json.dump({"storage": backend}, f, indent=2)
+            
+            self.store.close()
+            self.store = target
+            self.storage = backend
+            self._bump(*self.versions)
+    
+    def flush(self):
+        """Write any changes the storage backend is still holding back"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            self.store.flush()
         except Exception as e:
-            logger.error(f"Error saving config: {e}")
-
-# Global data manager instance
-data_manager = DataManager()
+            logger.error(f"Error flushing storage: {e}")
+    
+    def close(self):
+        """Flush and release the storage backend"""
+        with self._lock:
+            if self._note_index is not None:
+                try:
+                    self._note_index.save()
+                except Exception as e:
+                    logger.error(f"Error saving note index: {e}")
+            self.store.close()
 
 class WeatherService:
     """Handles weather-related operations"""
     
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key or data_manager.config.get("weather_api_key", "")
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+    DEFAULT_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
+    
+    def __init__(self, api_key: str = None, base_url: str = None,
+                 cache_ttl: float = None, cache_size: int = None, max_concurrency: int = None):
+        config = get_data_manager().config
+        self.api_key = api_key or config.get("weather_api_key", "")
+        self.base_url = base_url or config.get("weather_base_url") or self.DEFAULT_BASE_URL
+        
+        # Responses are cached per normalized city for weather_cache_ttl seconds
+        if cache_ttl is None:
+            cache_ttl = config.get("weather_cache_ttl", 600)
+        if cache_size is None:
+            cache_size = config.get("weather_cache_size", 256)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        
+        # At most max_concurrency API calls run at once, one per city (single-flight)
+        if max_concurrency is None:
+            max_concurrency = config.get("weather_max_concurrency", 8)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="weather")
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+        
+        # One pooled session so repeated calls reuse the TCP/TLS connection
+        # (requests is imported here as it dominates the module's import time)
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(16, max_concurrency))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Registered for the service's lifetime and removed again by close()
+        metrics.add_collector(self._collect)
+    
+    def _collect(self):
+        return [
+            ("agent_weather_cache_hits_total", {}, self.cache.hits),
+            ("agent_weather_cache_misses_total", {}, self.cache.misses),
+            ("agent_weather_coalesced_total", {}, self.coalesced),
+        ]
+    
+    @staticmethod
+    def _cache_key(city: str) -> str:
+        return " ".join(city.lower().split())
+    
+    def _fetch(self, city: str) -> Dict[str, Any]:
+        """Fetch and parse current weather for a city from the API"""
+        params = {
+            'q': city,
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+        with metrics.timer("agent_http_seconds", service="weather"):
+            response = self.session.get(self.base_url, params=params, timeout=10)
+        response.raise_for_status()
+        
+        data = response.json()
+        return {
+            "temp": data['main']['temp'],
+            "description": data['weather'][0]['description'],
+            "humidity": data['main']['humidity'],
+            "wind_speed": data['wind']['speed']
+        }
+    
+    def _fetch_and_cache(self, city: str, key: str) -> Dict[str, Any]:
+        try:
+            weather = self._fetch(city)
+            self.cache.put(key, weather)
+            return weather
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def _lookup(self, city: str):
+        """Return (cached weather, None) or (None, future of the shared in-flight fetch)"""
+        key = self._cache_key(city)
+        weather = self.cache.get(key)
+        if weather is not None:
+            return weather, None
+        
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch_and_cache, city, key)
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+        return None, future
+    
+    def _format(self, city: str, weather: Dict[str, Any]) -> str:
+        return (f"Weather in {city}: {weather['description'].title()}, {weather['temp']}°C, "
+                f"Humidity: {weather['humidity']}%, Wind: {weather['wind_speed']} m/s")
+    
+    def _error(self, city: str, error: Exception) -> str:
+        import requests
+        metrics.inc("agent_api_errors_total", service="weather")
+        if isinstance(error, requests.exceptions.RequestException):
+            logger.error(f"Weather API error: {error}")
+            return f"Sorry, I couldn't get weather data for {city}. Please check the city name and try again."
+        logger.error(f"Unexpected error getting weather: {error}")
+        return "Sorry, there was an error getting weather information."
     
     def get_weather(self, city: str) -> str:
         """Get weather information for a city"""
@@ -97,164 +403,459 @@ class WeatherService:
             return "Weather API key not configured. Please set your OpenWeatherMap API key."
         
         try:
-            params = {
-                'q': city,
-                'appid': self.api_key,
-                'units': 'metric'
-            }
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            temp = data['main']['temp']
-            description = data['weather'][0]['description']
-            humidity = data['main']['humidity']
-            wind_speed = data['wind']['speed']
-            
-            return f"Weather in {city}: {description.title()}, {temp}°C, Humidity: {humidity}%, Wind: {wind_speed} m/s"
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Weather API error: {e}")
-            return f"Sorry, I couldn't get weather data for {city}. Please check the city name and try again."
+            weather, future = self._lookup(city)
+            if future is not None:
+                weather = future.result()
+            return self._format(city, weather)
+        except Exception as e:
+            return self._error(city, e)
+    
+    async def get_weather_async(self, city: str) -> str:
+        """Get weather information for a city without blocking the event loop"""
+        if not self.api_key:
+            return "Weather API key not configured. Please set your OpenWeatherMap API key."
+        
+        try:
+            weather, future = self._lookup(city)
+            if future is not None:
+                import asyncio
+                weather = await asyncio.wrap_future(future)
+            return self._format(city, weather)
         except Exception as e:
-            logger.error(f"Unexpected error getting weather: {e}")
-            return "Sorry, there was an error getting weather information."
+            return self._error(city, e)
+    
+    async def get_weather_many(self, cities: List[str]) -> List[str]:
+        """Get weather for several cities concurrently, in the order given"""
+        import asyncio
+        return list(await asyncio.gather(*(self.get_weather_async(city) for city in cities)))
+    
+    def close(self):
+        """Stop the fetch workers, close pooled connections and drop the metrics collector"""
+        metrics.remove_collector(self._collect)
+        self._executor.shutdown(wait=True)
+        self.session.close()
 
 class Calculator:
     """Handles mathematical calculations"""
     
+    def __init__(self):
+        self.engine = ExpressionEngine()
+    
     def calculate(self, expression: str) -> str:
         """Safely evaluate mathematical expressions"""
         try:
             # Clean the expression - only allow numbers, operators, and parentheses
-            cleaned = re.sub(r'[^0-9+\-*/().\s]', '', expression)
+            cleaned = _NON_MATH_CHARS.sub('', expression)
             if not cleaned.strip():
                 return "Please provide a valid mathematical expression."
             
-            # Use eval with restricted globals for safety
-            result = eval(cleaned, {"__builtins__": {}}, {})
+            # Evaluate through the whitelisted, size-limited AST engine
+            result = self.engine.evaluate(cleaned)
             return f"{expression} = {result}"
             
         except ZeroDivisionError:
             return "Error: Division by zero is not allowed."
+        except (ExpressionLimitError, OverflowError) as e:
+            logger.warning(f"Calculation rejected: {e}")
+            return "Error: That calculation is too large to evaluate."
         except Exception as e:
             logger.error(f"Calculation error: {e}")
             return "Sorry, I couldn't calculate that expression. Please check your input."
+    
+    def calculate_many(self, expressions: Iterable[str]) -> List[str]:
+        """Evaluate many expressions, sharing the compiled-expression cache"""
+        return [self.calculate(expression) for expression in expressions]
 
 class ReminderManager:
     """Handles reminder functionality"""
     
+    def __init__(self):
+        self.scheduler = ReminderScheduler(get_data_manager())
+    
     def add_reminder(self, text: str, time_str: str = None) -> str:
-        """Add a new reminder"""
+        """Add a new reminder (time_str is an ISO due time, if any)"""
         reminder = {
-            "id": len(data_manager.reminders) + 1,
             "text": text,
             "created_at": datetime.now().isoformat(),
             "time": time_str,
             "completed": False
         }
-        data_manager.reminders.append(reminder)
-        data_manager.save_reminders()
+        reminder = get_data_manager().add_reminder(reminder)
+        self.scheduler.schedule(reminder)
+        
+        if time_str:
+            return f"Reminder added: '{text}' (Due: {self._format_due(time_str)})"
         return f"Reminder added: '{text}'"
     
+    @staticmethod
+    def _format_due(time_str: str) -> str:
+        try:
+            return datetime.fromisoformat(time_str).strftime("%Y-%m-%d %H:%M")
+        except ValueError:
+            return time_str  # Free-form time from older versions
+    
     def get_reminders(self) -> str:
         """Get all active reminders"""
-        if not data_manager.reminders:
+        if not get_data_manager().count_reminders():
             return "No reminders set."
         
-        active_reminders = [r for r in data_manager.reminders if not r["completed"]]
+        active_reminders = get_data_manager().active_reminders()
         if not active_reminders:
             return "No active reminders."
         
+        return "Active reminders:\n" + self._format_list(active_reminders)
+    
+    def get_due_reminders(self, start: datetime, end: datetime) -> str:
+        """Get active reminders due in [start, end)"""
+        reminders = self.scheduler.due_between(start, end)
+        if not reminders:
+            return "No reminders due then."
+        return "Reminders due:\n" + self._format_list(reminders)
+    
+    def _format_list(self, reminders: List[Dict[str, Any]]) -> str:
         reminder_list = []
-        for reminder in active_reminders:
-            status = f" (Due: {reminder['time']})" if reminder['time'] else ""
+        for reminder in reminders:
+            status = f" (Due: {self._format_due(reminder['time'])})" if reminder['time'] else ""
             reminder_list.append(f"- {reminder['text']}{status}")
-        
-        return "Active reminders:\n" + "\n".join(reminder_list)
+        return "\n".join(reminder_list)
+
+def _document_index() -> DocumentIndex:
+    return DocumentIndex(get_search_dir(), get_search_index_path())
+
+def _file_workspace() -> FileWorkspace:
+    return FileWorkspace(get_files_dir())
+
+# Services are built on first use, so importing this module stays cheap
+_SERVICES = {
+    "data_manager": DataManager,
+    "weather_service": WeatherService,
+    "calculator": Calculator,
+    "reminder_manager": ReminderManager,
+    "document_index": _document_index,
+    "file_workspace": _file_workspace,
+}
+_services_lock = threading.RLock()
+_data_dir: Optional[str] = None
+_search_dir: Optional[str] = None
+_files_dir: Optional[str] = None
+
+# Services each tenant (user) gets its own copy of; see tenants.py. The
+# others (weather, calculator, document index) are shared and built from
+# the shared configuration, whichever tenant first uses them.
+TENANT_SERVICES = ("data_manager", "reminder_manager", "file_workspace")
+_tenant = contextvars.ContextVar("tenant", default=None)
+
+def get_data_dir() -> str:
+    """The active tenant's directory, else the one set by configure(), else $AGENT_DATA_DIR, else data/"""
+    tenant = _tenant.get()
+    if tenant is not None:
+        return tenant.data_dir
+    return _shared_data_dir()
+
+def _shared_data_dir() -> str:
+    return _data_dir or os.environ.get(DATA_DIR_ENV) or "data"
+
+def get_search_dir() -> str:
+    """The directory set by configure(), else $AGENT_SEARCH_DIR, else <data dir>/documents (shared by all tenants)"""
+    return _search_dir or os.environ.get(SEARCH_DIR_ENV) or os.path.join(_shared_data_dir(), "documents")
+
+def get_files_dir() -> str:
+    """The directory set by configure(), else $AGENT_FILES_DIR, else <data dir>/files; each tenant gets its own subdirectory"""
+    files_dir = _shared_files_dir()
+    tenant = _tenant.get()
+    if tenant is not None:
+        return os.path.join(files_dir, tenant.dirname)
+    return files_dir
+
+def _shared_files_dir() -> str:
+    return _files_dir or os.environ.get(FILES_DIR_ENV) or os.path.join(_shared_data_dir(), "files")
+
+def get_search_index_path() -> str:
+    return os.path.join(_shared_data_dir(), "documents.index")
+
+def current_tenant():
+    """The tenant whose services the handlers are using, if any"""
+    return _tenant.get()
 
-# Initialize services
-weather_service = WeatherService()
-calculator = Calculator()
-reminder_manager = ReminderManager()
+def activate_tenant(tenant) -> contextvars.Token:
+    """Route tenant services to `tenant` in this context (undo with deactivate_tenant)"""
+    return _tenant.set(tenant)
+
+def deactivate_tenant(token: contextvars.Token):
+    _tenant.reset(token)
+
+def configure(data_dir: str = None, search_dir: str = None, files_dir: str = None):
+    """Choose the data, search and file directories; must run before the data manager is first used"""
+    global _data_dir, _search_dir, _files_dir
+    with _services_lock:
+        if any(name in globals() for name in ("data_manager", "document_index", "file_workspace")):
+            raise RuntimeError(f"Data manager already started in {get_data_dir()}")
+        _data_dir = data_dir
+        _search_dir = search_dir
+        _files_dir = files_dir
+
+def _service(name: str):
+    tenant = _tenant.get()
+    if tenant is not None and name in TENANT_SERVICES:
+        return tenant.service(name, _SERVICES[name])
+    # Services live in module globals, so `actions.data_manager = ...` still overrides them
+    service = globals().get(name)
+    if service is None:
+        with _services_lock:
+            service = globals().get(name)
+            if service is None:
+                # Shared services read the shared config, not the active tenant's
+                token = _tenant.set(None)
+                try:
+                    service = globals()[name] = _SERVICES[name]()
+                finally:
+                    _tenant.reset(token)
+    return service
+
+def started_service(name: str):
+    """The shared service if it has already been built, else None (never builds it)"""
+    return globals().get(name)
+
+def get_data_manager() -> DataManager:
+    return _service("data_manager")
+
+def get_weather_service() -> WeatherService:
+    return _service("weather_service")
+
+def get_calculator() -> Calculator:
+    return _service("calculator")
+
+def get_reminder_manager() -> ReminderManager:
+    return _service("reminder_manager")
+
+def get_document_index() -> DocumentIndex:
+    return _service("document_index")
+
+def get_file_workspace() -> FileWorkspace:
+    return _service("file_workspace")
+
+def __getattr__(name: str):
+    # actions.data_manager etc. build the service on first access
+    if name in _SERVICES:
+        return _service(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def flush():
+    """Write pending data changes to disk now"""
+    with _services_lock:
+        if "data_manager" in globals():
+            globals()["data_manager"].flush()
+
+# Buffered writes must not be lost when the process exits without shutdown()
+atexit.register(flush)
+
+def shutdown():
+    """Stop and close whichever services were started"""
+    with _services_lock:
+        if "reminder_manager" in globals():
+            globals()["reminder_manager"].scheduler.stop()
+        if "weather_service" in globals():
+            globals()["weather_service"].close()
+        if "data_manager" in globals():
+            globals()["data_manager"].close()
 
 # Action handlers
-def handle_weather(user_input: str = None) -> str:
+# Each takes the raw input plus the slots extracted alongside intent
+# detection (see slots.py); without slots they are extracted here.
+def _slots(intent: str, user_input: Optional[str], slots: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if slots is not None:
+        return slots
+    return slot_extractor.extract(intent, user_input or "")
+
+# Answers of read-only handlers, each stored with the data version it was
+# built from (read before building), so a mutation makes it a miss
+response_cache = VersionedCache(maxsize=64)
+
+def _cached_response(key: Tuple, version: Tuple, build: Callable[[], str]) -> str:
+    response = response_cache.get(key, version)
+    if response is None:
+        response = build()
+        response_cache.put(key, version, response)
+    return response
+
+def handle_weather(user_input: str = None, slots: Dict[str, Any] = None) -> str:
     """Handle weather requests"""
-    if not user_input or user_input.strip() == "":
-        default_city = data_manager.config.get("default_city", "London")
-        return f"Getting weather for {default_city}...\n{weather_service.get_weather(default_city)}"
+    city = _slots("weather", user_input, slots).get("city")
+    if not city:
+        default_city = get_data_manager().config.get("default_city", "London")
+        return f"Getting weather for {default_city}...\n{get_weather_service().get_weather(default_city)}"
     
-    # Extract city from input
-    city = user_input.strip()
-    return weather_service.get_weather(city)
+    return get_weather_service().get_weather(city)
 
-def handle_add_note(user_input: str) -> str:
+def handle_add_note(user_input: str, slots: Dict[str, Any] = None) -> str:
     """Handle adding notes"""
-    # Extract note content
-    note_content = user_input.lower()
-    for trigger in ["add note", "note", "remember", "save"]:
-        note_content = note_content.replace(trigger, "").strip()
+    note_content = _slots("add_note", user_input, slots).get("content")
     
     if not note_content:
         return "Please provide the note content."
     
     note = {
-        "id": len(data_manager.notes) + 1,
         "content": note_content,
         "created_at": datetime.now().isoformat()
     }
-    data_manager.notes.append(note)
-    data_manager.save_notes()
+    get_data_manager().add_note(note)
     return f"Note saved: '{note_content}'"
 
-def handle_show_notes() -> str:
+def handle_show_notes(user_input: str = None, slots: Dict[str, Any] = None) -> str:
     """Handle showing notes"""
-    if not data_manager.notes:
+    data_manager = get_data_manager()
+    return _cached_response(("show_notes",), data_manager.version("notes"),
+                            lambda: _format_recent_notes(data_manager))
+
+def _format_recent_notes(data_manager: DataManager) -> str:
+    notes = data_manager.recent_notes(10)  # Show last 10 notes
+    if not notes:
         return "No notes saved yet."
     
     note_list = []
-    for note in data_manager.notes[-10:]:  # Show last 10 notes
+    for note in notes:
         created = datetime.fromisoformat(note["created_at"]).strftime("%Y-%m-%d %H:%M")
         note_list.append(f"- {note['content']} (Added: {created})")
     
     return "Recent notes:\n" + "\n".join(note_list)
 
-def handle_calculator(user_input: str) -> str:
+def handle_search_notes(user_input: str, slots: Dict[str, Any] = None) -> str:
+    """Handle searching notes"""
+    query = _slots("search_notes", user_input, slots).get("query")
+    
+    if not query:
+        return "Please tell me what to search your notes for."
+    
+    notes = get_data_manager().search_notes(query)
+    if not notes:
+        return f"No notes found matching '{query}'."
+    
+    note_list = []
+    for note in notes:
+        created = datetime.fromisoformat(note["created_at"]).strftime("%Y-%m-%d %H:%M")
+        note_list.append(f"- {note['content']} (Added: {created})")
+    
+    return f"Notes matching '{query}':\n" + "\n".join(note_list)
+
+def handle_calculator(user_input: str, slots: Dict[str, Any] = None) -> str:
     """Handle calculator requests"""
-    # Extract mathematical expression
-    expression = user_input.strip()
-    for trigger in ["calculate", "compute", "what is", "how much is"]:
-        expression = expression.replace(trigger, "").strip()
+    expression = _slots("calculator", user_input, slots).get("expression")
+    if not expression:
+        return "Please provide a valid mathematical expression."
     
-    return calculator.calculate(expression)
+    return get_calculator().calculate(expression)
 
-def handle_reminder(user_input: str) -> str:
+def handle_reminder(user_input: str, slots: Dict[str, Any] = None) -> str:
     """Handle reminder requests"""
-    if "show" in user_input.lower() or "list" in user_input.lower():
-        return reminder_manager.get_reminders()
+    slots = _slots("reminder", user_input, slots)
+    if slots.get("list"):
+        # "show reminders due today/tomorrow" is a window query on the scheduler
+        day = (slots.get("day") or "").lower()
+        reminder_manager = get_reminder_manager()
+        version = get_data_manager().version("reminders")
+        if day in ("today", "tomorrow"):
+            offset = 1 if day == "tomorrow" else 0
+            start = datetime.combine(datetime.now().date() + timedelta(days=offset), datetime.min.time())
+            return _cached_response(("due_reminders", start), version + (reminder_manager.scheduler.version,),
+                                    lambda: reminder_manager.get_due_reminders(start, start + timedelta(days=1)))
+        return _cached_response(("reminders",), version, reminder_manager.get_reminders)
     
-    # Extract reminder text
-    reminder_text = user_input.lower()
-    for trigger in ["remind me", "set reminder", "reminder"]:
-        reminder_text = reminder_text.replace(trigger, "").strip()
+    # Due time such as "in 20 minutes" or "tomorrow 9am" was parsed out of the text
+    reminder_text = slots.get("text")
+    due = slots.get("due")
     
     if not reminder_text:
         return "Please provide the reminder text."
     
-    return reminder_manager.add_reminder(reminder_text)
+    return get_reminder_manager().add_reminder(reminder_text, due.isoformat() if due else None)
+
+def handle_web_search(user_input: str, slots: Dict[str, Any] = None) -> str:
+    """Handle search requests from the local document index (no network access needed)"""
+    search_query = _slots("web_search", user_input, slots).get("query", "")
+    
+    if not search_query:
+        return "Please tell me what to search for."
+    
+    documents = get_document_index()
+    results = documents.search(search_query)
+    if not results:
+        if not len(documents):
+            return f"No documents to search yet. Add text or markdown files to {documents.root}."
+        return f"No documents found matching '{search_query}'."
+    
+    result_list = [f"{number}. {result.title} ({result.path})\n   {result.snippet}"
+                   for number, result in enumerate(results, 1)]
+    return f"Top results for '{search_query}':\n" + "\n".join(result_list)
 
-def handle_web_search(user_input: str) -> str:
-    """Handle web search requests (placeholder)"""
-    search_query = user_input.strip()
-    for trigger in ["search for", "find", "look up", "what is"]:
-        search_query = search_query.replace(trigger, "").strip()
+# Operation words in requests -> FileWorkspace operation
+_FILE_OPERATIONS = {
+    "read": "read", "open": "read", "list": "read", "head": "head", "first": "head",
+    "tail": "tail", "last": "tail", "grep": "grep", "create": "create",
+    "append": "append", "write": "append", "delete": "delete",
+}
+
+def handle_file_operation(user_input: str, slots: Dict[str, Any] = None) -> str:
+    """Handle file operations inside the files directory"""
+    slots = _slots("file_operation", user_input, slots)
+    operation = _FILE_OPERATIONS.get((slots.get("operation") or "").lower())
+    path = slots.get("path")
+    content = slots.get("content", "")
+    page = int(slots.get("page") or 1)
+    count = int(slots.get("count") or 10)
+    
+    if not operation:
+        return "Please tell me what to do with the file: read, head, tail, grep, create or append."
+    if operation == "delete":
+        return "Deleting files is not supported."
+    if not path and slots["operation"].lower() == "list":
+        path = "."  # The files directory itself
+    if not path:
+        return f"Please tell me which file to {operation}."
     
-    return f"I would search for '{search_query}' on the web. (Web search integration coming soon!)"
+    files = get_file_workspace()
+    try:
+        if operation == "create":
+            return f"Created {files.create(path, content)}."
+        if operation == "append":
+            return f"Added to {files.append(path, content)}."
+        if operation == "grep":
+            if not content:
+                return f"Please tell me what to look for, e.g. 'grep error in {path}'."
+            return _format_page(f"Lines of {path} containing '{content}'", files.grep(path, content, page),
+                                page, f"say 'grep {content} in {path} page {page + 1}' for more")
+        if operation == "head":
+            return _format_page(f"First lines of {path}", files.head(path, count), more="more lines follow")
+        if operation == "tail":
+            return _format_page(f"Last lines of {path}", files.tail(path, count), more="earlier lines not shown")
+        if os.path.isdir(files.resolve(path)):
+            return _format_page(f"Contents of {files.root if path == '.' else path}", files.listing(path, page),
+                                page, f"say 'list folder {path} page {page + 1}' for more")
+        return _format_page(path, files.read(path, page), page, f"say 'read file {path} page {page + 1}' for more")
+    except FileNotFoundError:
+        return f"File not found: {path}"
+    except FileExistsError:
+        return f"{path} already exists. Use 'append to {path}: ...' to add to it."
+    except IsADirectoryError:
+        return f"{path} is a directory."
+    except PermissionError:
+        return f"Permission denied for {path}. Files must be inside {files.root}."
+    except ValueError as e:
+        return f"Cannot {operation} {path}: {e}."
+    except OSError as e:
+        logger.error(f"Error in file operation {operation} on {path}: {e}")
+        return f"Sorry, I couldn't {operation} {path}: {e.strerror or e}."
 
-def handle_file_operation(user_input: str) -> str:
-    """Handle file operations (placeholder)"""
-    return "File operations are not yet implemented. This feature is coming soon!"
+def _format_page(title: str, page: Page, number: int = 1, more: str = None) -> str:
+    """A page of lines (numbered when line numbers are known), with `more` noted if the page is not the last"""
+    if not page.lines:
+        return f"{title}: nothing to show" + (f" on page {number}." if number > 1 else ".")
+    if page.lines[0][0]:
+        lines = [f"{line_number:>6}  {text}" for line_number, text in page.lines]
+    else:
+        lines = [text for _, text in page.lines]
+    header = f"{title} (page {number}):" if number > 1 else f"{title}:"
+    footer = f"\n… ({more})" if page.more and more else ""
+    return header + "\n" + "\n".join(lines) + footer
 
 def handle_unknown(user_input: str) -> str:
     """Handle unknown intents"""
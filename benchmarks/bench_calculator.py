@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the AST expression engine against the legacy eval() path
+
+Usage: python benchmarks/bench_calculator.py [--count N] [--distinct D]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from expression import ExpressionEngine
+
+
+def legacy_evaluate(expression: str):
+    """The previous Calculator path: regex filter plus eval"""
+    cleaned = re.sub(r'[^0-9+\-*/().\s]', '', expression)
+    return eval(cleaned, {"__builtins__": {}}, {})
+
+
+def generate_expressions(count: int, distinct: int, seed: int = 7):
+    rng = random.Random(seed)
+    operators = ["+", "-", "*", "/"]
+    pool = []
+    for _ in range(distinct):
+        terms = [str(rng.randint(1, 999)) for _ in range(rng.randint(2, 6))]
+        expression = terms[0]
+        for term in terms[1:]:
+            expression += f" {rng.choice(operators)} {term}"
+        if rng.random() < 0.3:
+            expression = f"({expression}) ** 2"
+        pool.append(expression)
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(fn, expressions) -> float:
+    start = time.perf_counter()
+    fn(expressions)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="expressions evaluated")
+    parser.add_argument("--distinct", type=int, default=500, help="distinct expressions in the workload")
+    args = parser.parse_args()
+
+    expressions = generate_expressions(args.count, args.distinct)
+    engine = ExpressionEngine()
+    uncached = ExpressionEngine(cache_size=0)
+
+    for expression in expressions[:1000]:
+        assert engine.evaluate(expression) == legacy_evaluate(expression)
+    engine.cache.clear()
+
+    results = {
+        "legacy eval": timed(lambda exprs: [legacy_evaluate(e) for e in exprs], expressions),
+        "engine (no cache)": timed(lambda exprs: [uncached.evaluate(e) for e in exprs], expressions),
+        "engine (cached)": timed(lambda exprs: [engine.evaluate(e) for e in exprs], expressions),
+    }
+
+    # calculate_many goes through the Calculator's string formatting as well
+    import actions
+    calculator = actions.Calculator()
+    results["Calculator.calculate_many"] = timed(calculator.calculate_many, expressions)
+
+    print(f"Workload: {args.count} expressions, {args.distinct} distinct")
+    for name, elapsed in results.items():
+        print(f"{name:28s} {args.count / elapsed:12,.0f} expr/s")
+
+
+if __name__ == "__main__":
+    main()
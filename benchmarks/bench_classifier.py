@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency of rules-only vs rules plus the fallback classifier
+
+Trains the classifier on training/intents.tsv (or loads --model) and
+evaluates on held-out paraphrases from training/templates.py. An input
+counts as its detected intent only if the agent would act on it
+(confidence >= 0.3); otherwise it counts as "unknown".
+
+Usage: python benchmarks/bench_classifier.py [--count N] [--model PATH] [--pure]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import classifier
+from benchmarks.load_test import percentile
+from intents import IntentDetector
+from training.templates import EVAL, generate
+
+ROUTING_THRESHOLD = 0.3  # TaskAgent._route_intent rejects lower confidences
+
+
+def effective(intent: str, confidence: float) -> str:
+    return intent if confidence >= ROUTING_THRESHOLD else "unknown"
+
+
+def evaluate(name: str, detector: IntentDetector, examples):
+    texts = [text for _, text in examples]
+    latencies = []
+    predicted = []
+    for text in texts:
+        start = time.perf_counter()
+        predicted.append(effective(*detector.detect_intent(text)))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    start = time.perf_counter()
+    batch = detector.detect_intents(texts)
+    batch_seconds = time.perf_counter() - start
+    assert [effective(*result) for result in batch] == predicted
+
+    correct = sum(label == guess for (label, _), guess in zip(examples, predicted))
+    print(f"{name:22} accuracy {correct / len(examples):6.1%}   "
+          f"single mean {sum(latencies) / len(latencies) * 1e6:7.1f} us  p99 {percentile(latencies, 0.99) * 1e6:7.1f} us   "
+          f"batch {len(texts) / batch_seconds:10,.0f} utterances/s")
+    return predicted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="held-out utterances")
+    parser.add_argument("--model", help="use this trained model instead of training one")
+    parser.add_argument("--pure", action="store_true", help="ignore NumPy even if installed")
+    args = parser.parse_args()
+
+    if args.pure:
+        classifier.np = None
+    print(f"Inference backend: {'NumPy' if classifier.np is not None else 'pure Python'}")
+
+    if args.model:
+        model = classifier.IntentClassifier.load(args.model)
+    else:
+        start = time.perf_counter()
+        model = classifier.IntentClassifier.train(classifier.read_labeled(os.path.join(ROOT, "training", "intents.tsv")))
+        print(f"Trained in {time.perf_counter() - start:.1f}s")
+
+    examples = list(generate(EVAL, args.count, seed=11))
+    rules = IntentDetector()
+    rules.classifier = None
+    hybrid = IntentDetector()
+    hybrid.classifier = model
+
+    print(f"{len(examples)} held-out utterances")
+    evaluate("rules only", rules, examples)
+    evaluate("rules + classifier", hybrid, examples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Index build, reload, incremental refresh and query latency of the local document search
+
+Generates a corpus of --docs markdown/text files (Zipf-distributed words
+over a synthetic vocabulary) into a temporary directory, indexes it,
+reloads the saved index, then edits, deletes and adds files and measures
+the incremental refresh. Each file carries a unique "needle" word; the
+check column reports whether queries for needles rank their file first.
+
+Usage: python benchmarks/bench_docsearch.py [--docs 100000] [--queries 1000] [--keep DIR]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.load_test import percentile
+from docsearch import DocumentIndex
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "po", "da", "fe", "gu", "hi", "ju", "bo"]
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def write_document(root: str, number: int, words, weights, rng: random.Random, revision: int = 0):
+    directory = os.path.join(root, f"section{number % 100:02d}")
+    os.makedirs(directory, exist_ok=True)
+    body = " ".join(rng.choices(words, weights, k=rng.randint(40, 200)))
+    extension = ".md" if number % 2 else ".txt"
+    with open(os.path.join(directory, f"doc{number}{extension}"), 'w') as f:
+        f.write(f"# Document {number} revision {revision}\n\n{body} needle{number}x{revision} {body[:200]}\n")
+    return os.path.join(f"section{number % 100:02d}", f"doc{number}{extension}")
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def query_latencies(index: DocumentIndex, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--changes", type=int, default=100, help="files edited, deleted and added for the refresh test")
+    parser.add_argument("--keep", help="generate the corpus here and keep it")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    words = vocabulary(20000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(words))]  # Zipf
+    work = args.keep or tempfile.mkdtemp(prefix="agent-docsearch-")
+    corpus = os.path.join(work, "documents")
+    index_path = os.path.join(work, "documents.index")
+
+    try:
+        start = time.perf_counter()
+        paths = {number: write_document(corpus, number, words, weights, rng) for number in range(args.docs)}
+        print(f"Generated {args.docs} documents in {time.perf_counter() - start:.1f}s")
+
+        index = DocumentIndex(corpus, index_path)
+        (added, _, _), elapsed = timed(index.refresh)
+        print(f"Full index:        {added} files in {elapsed:.1f}s ({added / elapsed:.0f} files/s), "
+              f"{os.path.getsize(index_path) / 1e6:.0f} MB on disk")
+
+        index = DocumentIndex(corpus, index_path)
+        _, elapsed = timed(index.load)
+        print(f"Reload:            {elapsed:.2f}s")
+        (changes, elapsed) = timed(index.refresh)
+        print(f"No-op refresh:     {elapsed:.2f}s (scan of {args.docs} files, {changes} changes)")
+
+        queries = [" ".join(rng.choices(words[:2000], k=rng.randint(1, 3))) for _ in range(args.queries)]
+        latencies = query_latencies(index, queries)
+        print(f"Common-word query: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms ({len(queries)} queries, top 5 with snippets)")
+
+        rare = [" ".join(rng.choices(words[5000:], k=2)) for _ in range(args.queries)]
+        latencies = query_latencies(index, rare)
+        print(f"Rare-word query:   p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+        # Incremental refresh: edit, delete and add files
+        numbers = rng.sample(range(args.docs), 2 * args.changes)
+        edited, deleted = numbers[:args.changes], numbers[args.changes:]
+        time.sleep(0.01)  # Make sure edited files get a new mtime
+        for number in edited:
+            write_document(corpus, number, words, weights, rng, revision=1)
+        for number in deleted:
+            os.remove(os.path.join(corpus, paths[number]))
+        for number in range(args.docs, args.docs + args.changes):
+            paths[number] = write_document(corpus, number, words, weights, rng)
+        (changes, elapsed) = timed(index.refresh)
+        print(f"Incremental:       (added, updated, removed) = {changes} in {elapsed:.2f}s")
+
+        top = lambda query: [result.path for result in index.search(query, 1)]
+        checks = {
+            "unchanged": all(top(f"needle{n}x0") == [paths[n]] for n in rng.sample(range(args.docs), 50)
+                             if n not in edited and n not in deleted),
+            "edited": all(top(f"needle{n}x1") == [paths[n]] and not top(f"needle{n}x0") for n in edited),
+            "deleted": all(not top(f"needle{n}x0") for n in deleted),
+            "added": all(top(f"needle{n}x0") == [paths[n]] for n in range(args.docs, args.docs + args.changes)),
+        }
+        print("Checks:            " + ", ".join(f"{name} {'ok' if passed else 'FAILED'}" for name, passed in checks.items()))
+        sample = index.search(queries[0], 1)
+        if sample:
+            print(f"Example:           '{queries[0]}' -> {sample[0].title} ({sample[0].path})\n"
+                  f"                   {sample[0].snippet}")
+        if not all(checks.values()):
+            sys.exit(1)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
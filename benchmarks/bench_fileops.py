@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Latency and memory of file operations on large files
+
+Generates log files of each --sizes-mb size (default 64 MB, 512 MB and
+2 GB), then times read (first and a middle page), head, tail and grep
+(a term found on every few lines, and one found only on the last line,
+which scans the whole file). Each size is measured in a fresh process,
+so "peak RSS" is that process's maximum resident memory; "heap" is the
+largest Python allocation peak of any single operation (tracemalloc).
+Both should stay flat as the file grows.
+
+Usage: python benchmarks/bench_fileops.py [--sizes-mb 64,512,2048] [--dir DIR] [--keep]
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fileops import FileWorkspace
+
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARNING", "INFO", "ERROR", "INFO"]
+
+
+def generate(path: str, size: int) -> int:
+    """Write about `size` bytes of log lines ending with one 'needle' line; returns the line count"""
+    block_lines = [f"2026-10-17 12:{i // 60 % 60:02d}:{i % 60:02d} {LEVELS[i % len(LEVELS)]} "
+                   f"worker-{i % 16} request {i} handled in {i % 997} ms" for i in range(16384)]
+    block = ("\n".join(block_lines) + "\n").encode()
+    lines = 0
+    with open(path, 'wb') as f:
+        while f.tell() + len(block) <= size:
+            f.write(block)
+            lines += len(block_lines)
+        f.write(b"2026-10-17 23:59:59 FATAL needle: out of disk space\n")
+    return lines + 1
+
+
+def measure(path: str, lines: int) -> dict:
+    """Run in a child process: time every operation once"""
+    files = FileWorkspace(os.path.dirname(path))
+    name = os.path.basename(path)
+    middle_page = lines // 2 // 40  # PAGE_LINES lines per page
+    operations = [
+        ("read page 1", lambda: files.read(name)),
+        ("read middle page", lambda: files.read(name, middle_page)),
+        ("head 10", lambda: files.head(name, 10)),
+        ("tail 10", lambda: files.tail(name, 10)),
+        ("grep ERROR page 1", lambda: files.grep(name, "ERROR")),
+        ("grep needle", lambda: files.grep(name, "needle")),
+    ]
+    results = {}
+    heap = 0
+    for label, operation in operations:
+        tracemalloc.start()
+        start = time.perf_counter()
+        page = operation()
+        elapsed = time.perf_counter() - start
+        heap = max(heap, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        results[label] = {"seconds": elapsed, "lines": len(page.lines)}
+    assert results["grep needle"]["lines"] == 1, "needle not found"
+    return {
+        "operations": results,
+        "heap": heap,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,  # KB on Linux
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes-mb", type=lambda value: [int(n) for n in value.split(",")], default=[64, 512, 2048])
+    parser.add_argument("--dir", help="where to generate the files (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    parser.add_argument("--measure", nargs=2, metavar=("PATH", "LINES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure[0], int(args.measure[1]))))
+        return
+
+    work = args.dir or tempfile.mkdtemp(prefix="agent-fileops-")
+    os.makedirs(work, exist_ok=True)
+    try:
+        rows = []
+        for size_mb in args.sizes_mb:
+            path = os.path.join(work, f"app-{size_mb}mb.log")
+            start = time.perf_counter()
+            lines = generate(path, size_mb * 1024 * 1024)
+            print(f"Generated {size_mb} MB ({lines} lines) in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", path, str(lines)],
+                                   check=True, capture_output=True, text=True)
+            rows.append((size_mb, json.loads(child.stdout)))
+            if not args.keep:
+                os.remove(path)
+
+        labels = list(rows[0][1]["operations"])
+        print(f"{'size':>8} " + " ".join(f"{label:>18}" for label in labels) + f" {'heap KB':>8} {'peak RSS MB':>11}")
+        for size_mb, result in rows:
+            timings = " ".join(f"{result['operations'][label]['seconds'] * 1000:>15.1f} ms" for label in labels)
+            print(f"{size_mb:>5} MB {timings} {result['heap'] / 1024:>8.0f} {result['peak_rss'] / 1e6:>11.1f}")
+    finally:
+        if not args.keep and not args.dir:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency of the typo-tolerant (fuzzy) intent tier
+
+Takes corpus utterances, misspells one keyword in each (one random
+insert, delete, substitute or adjacent swap; two edits for the second
+row), and reports how many are still routed to the intent of the
+correctly spelled input (with confidence >= 0.3, as the agent requires)
+with the fuzzy tier off and on. Latency is for uncached detection
+(detector memo bypassed), per utterance, and for a single index lookup;
+"cold" also empties the index's per-word memo before every call, as for
+words never seen before.
+
+Usage: python benchmarks/bench_fuzzy.py [--count 5000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import generate_utterances
+from benchmarks.load_test import percentile
+from intents import _WORD, IntentDetector
+
+ROUTABLE = 0.3
+
+
+def misspell(word: str, edits: int, rng: random.Random) -> str:
+    for _ in range(edits):
+        position = rng.randrange(len(word))
+        kind = rng.choice(("insert", "delete", "substitute", "swap"))
+        if kind == "insert":
+            word = word[:position] + rng.choice(string.ascii_lowercase) + word[position:]
+        elif kind == "delete":
+            word = word[:position] + word[position + 1:]
+        elif kind == "substitute":
+            word = word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+        elif position < len(word) - 1:
+            word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word
+
+
+def typo_corpus(detector: IntentDetector, utterances, edits: int, seed: int = 7):
+    """(misspelled utterance, intent of the original) for utterances with a keyword long enough to misspell"""
+    rng = random.Random(seed)
+    vocabulary = detector._get_compiled().vocabulary
+    min_length = vocabulary.min_length if edits == 1 else vocabulary.long_word
+    cases = []
+    for text in utterances:
+        intent, confidence = detector.detect_intent(text)
+        words = [match for match in _WORD.finditer(text)
+                 if match.group().lower() in vocabulary and len(match.group()) >= min_length]
+        if intent == "unknown" or confidence < ROUTABLE or not words:
+            continue
+        match = rng.choice(words)
+        for _ in range(10):
+            typo = misspell(match.group().lower(), edits, rng)
+            if typo not in vocabulary and typo not in detector.common_words and len(typo) >= vocabulary.min_length:
+                cases.append((text[:match.start()] + typo + text[match.end():], intent))
+                break
+    return cases
+
+
+def recovered(detector: IntentDetector, cases) -> float:
+    hits = 0
+    for text, expected in cases:
+        intent, confidence, _ = detector._score(text.lower().strip())
+        hits += intent == expected and confidence >= ROUTABLE
+    return hits / len(cases)
+
+
+def latencies(function, inputs):
+    times = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000, help="corpus utterances to misspell")
+    args = parser.parse_args()
+
+    fuzzy = IntentDetector()
+    exact = IntentDetector()
+    exact.fuzzy_max_distance = 0
+    exact.rebuild()
+    utterances = generate_utterances(args.count)
+
+    print(f"{'typos':<10} {'cases':>6} {'exact rules':>12} {'with fuzzy':>11}")
+    typo_cases = []
+    for edits in (1, 2):
+        cases = typo_corpus(exact, utterances, edits)
+        typo_cases.extend(text for text, _ in cases)
+        print(f"{edits} edit{'s' if edits > 1 else ' ':<4} {len(cases):>6} {recovered(exact, cases):>11.1%} "
+              f"{recovered(fuzzy, cases):>11.1%}")
+
+    vocabulary = fuzzy._get_compiled().vocabulary
+
+    def cold(function):
+        def call(value):
+            vocabulary.memo.clear()
+            return function(value)
+        return call
+
+    print(f"\n{'uncached detection':<32} {'p50 us':>8} {'p99 us':>8}")
+    clean = [text.lower().strip() for text in utterances]
+    typos = [text.lower().strip() for text in typo_cases]
+    words = [word for text in typos for word in _WORD.findall(text) if len(word) >= vocabulary.min_length]
+    for label, function, inputs in (("exact rules, clean input", exact._score, clean),
+                                    ("fuzzy, clean input", fuzzy._score, clean),
+                                    ("exact rules, typo input", exact._score, typos),
+                                    ("fuzzy, typo input, cold", cold(fuzzy._score), typos),
+                                    ("fuzzy, typo input, warm", fuzzy._score, typos),
+                                    ("index lookup per word, cold", cold(vocabulary.lookup), words),
+                                    ("index lookup per word, warm", vocabulary.lookup, words)):
+        times = latencies(function, inputs)
+        print(f"{label:<32} {percentile(times, 0.5) * 1e6:>8.1f} {percentile(times, 0.99) * 1e6:>8.1f}")
+    print(f"\nIndex: {len(vocabulary)} words, {len(vocabulary._deletes)} delete keys")
+
+
+if __name__ == "__main__":
+    main()
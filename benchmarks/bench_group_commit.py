@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Add-note throughput with and without group commit on the JSON backend
+
+Each mode starts from a notes file of --existing notes and adds --adds
+more through DataManager.add_note. "sync" rewrites the file on the
+request thread for every note (the behavior with write_delay_ms = 0);
+"group" marks it dirty and lets the background writer rewrite it every
+write_delay_ms / write_batch changes. Flush is the time close() needs to
+write what is still pending; the last column checks nothing was lost.
+
+Usage: python benchmarks/bench_group_commit.py [--existing 0,1000,10000] [--adds 500] [--delay-ms 50]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import actions
+from benchmarks.corpus import CHORES
+from benchmarks.load_test import percentile
+
+
+def run(existing: int, adds: int, delay_ms: int, fsync: str) -> dict:
+    data_dir = tempfile.mkdtemp(prefix="agent-group-commit-")
+    try:
+        with open(os.path.join(data_dir, "config.json"), 'w') as f:
+            json.dump({"storage": "json", "write_delay_ms": delay_ms, "fsync": fsync}, f)
+        manager = actions.DataManager(data_dir)
+        manager.store.save("notes", [{"id": i, "content": f"{CHORES[i % len(CHORES)]} number {i}"}
+                                     for i in range(1, existing + 1)])
+        manager.flush()
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(adds):
+            began = time.perf_counter()
+            manager.add_note({"content": f"{CHORES[i % len(CHORES)]} {i}"})
+            latencies.append(time.perf_counter() - began)
+        elapsed = time.perf_counter() - start
+
+        began = time.perf_counter()
+        manager.close()
+        flush = time.perf_counter() - began
+
+        with open(os.path.join(data_dir, "notes.json")) as f:
+            stored = len(json.load(f))
+        latencies.sort()
+        return {
+            "throughput": adds / elapsed,
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "flush": flush,
+            "group_writes": manager.store.group_writes,
+            "complete": stored == existing + adds,
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--existing", type=lambda value: [int(n) for n in value.split(",")], default=[0, 1000, 10000])
+    parser.add_argument("--adds", type=int, default=500)
+    parser.add_argument("--delay-ms", type=int, default=actions.DEFAULT_WRITE_DELAY_MS)
+    args = parser.parse_args()
+
+    print(f"{'existing':>8} {'mode':<13} {'adds/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'flush ms':>9} "
+          f"{'groups':>6}  complete")
+    for existing in args.existing:
+        for mode, delay_ms in (("sync", 0), ("group", args.delay_ms)):
+            for fsync in ("always", "never"):
+                result = run(existing, args.adds, delay_ms, fsync)
+                print(f"{existing:>8} {f'{mode}/{fsync}':<13} {result['throughput']:>9.0f} "
+                      f"{result['p50'] * 1000:>8.3f} {result['p99'] * 1000:>8.3f} {result['flush'] * 1000:>9.1f} "
+                      f"{result['group_writes']:>6}  {result['complete']}")
+
+
+if __name__ == "__main__":
+    main()
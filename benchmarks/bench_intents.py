@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark single vs batch intent detection throughput
+
+Usage: python benchmarks/bench_intents.py [--count N] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_utterances
+from intents import IntentDetector
+
+
+def bench_single(detector: IntentDetector, corpus) -> float:
+    start = time.perf_counter()
+    for text in corpus:
+        detector.detect_intent(text)
+    return time.perf_counter() - start
+
+
+def bench_batch(detector: IntentDetector, corpus) -> float:
+    start = time.perf_counter()
+    detector.detect_intents(corpus)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="utterances in the generated corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per path (best is reported)")
+    args = parser.parse_args()
+
+    corpus = generate_utterances(args.count)
+    detector = IntentDetector()
+
+    # Sanity check: both paths must agree
+    batch = detector.detect_intents(corpus)
+    assert list(batch) == [detector.detect_intent(text) for text in corpus]
+
+    single = min(bench_single(detector, corpus) for _ in range(args.repeat))
+    batched = min(bench_batch(detector, corpus) for _ in range(args.repeat))
+
+    print(f"Corpus: {args.count} utterances")
+    print(f"Single: {args.count / single:12,.0f} utterances/s")
+    print(f"Batch:  {args.count / batched:12,.0f} utterances/s ({single / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
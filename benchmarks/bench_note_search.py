@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark note search: index build, incremental add and query latency
+
+Usage: python benchmarks/bench_note_search.py [--notes N] [--queries Q]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import InvertedIndex
+
+
+def generate_notes(count: int, vocabulary: int = 20000, seed: int = 1):
+    """Notes of 3-12 words drawn from a Zipf-distributed vocabulary"""
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    for _ in range(count):
+        yield " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(3, 12)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    index = InvertedIndex()
+    start = time.perf_counter()
+    for note_id, content in enumerate(generate_notes(args.notes), 1):
+        index.add(note_id, content)
+    build = time.perf_counter() - start
+
+    rng = random.Random(2)
+    queries = [" ".join(f"word{int(rng.paretovariate(0.6))}" for _ in range(rng.randint(1, 3)))
+               for _ in range(args.queries)]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(f"Indexed {args.notes} notes in {build:.2f}s ({build / args.notes * 1e6:.1f} us/note)")
+    print(f"Query p50: {latencies[len(latencies) // 2] * 1000:.3f} ms")
+    print(f"Query p99: {latencies[int(len(latencies) * 0.99)] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark startup: importing the agent plus its first process_input
+
+Each run is a fresh interpreter pointed (via AGENT_DATA_DIR) at a data
+directory pre-filled with large notes and reminders files.
+
+Usage: python benchmarks/bench_startup.py [--notes N] [--reminders N] [--runs R]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints import and first-request times in ms
+CHILD = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import main_agent
+imported = time.perf_counter()
+agent = main_agent.TaskAgent()
+agent.process_input({utterance!r})
+done = time.perf_counter()
+print((imported - start) * 1000, (done - imported) * 1000)
+"""
+
+UTTERANCES = ["what is 15 + 27", "show my notes", "remind me to stretch in 20 minutes"]
+
+
+def populate(data_dir: str, notes: int, reminders: int):
+    now = datetime.now()
+    with open(os.path.join(data_dir, "notes.json"), 'w') as f:
+        json.dump([{"id": i, "content": f"note number {i} about project {i % 97}",
+                    "created_at": (now - timedelta(minutes=i)).isoformat()}
+                   for i in range(1, notes + 1)], f, indent=2)
+    with open(os.path.join(data_dir, "reminders.json"), 'w') as f:
+        json.dump([{"id": i, "text": f"reminder {i}", "created_at": now.isoformat(),
+                    "time": (now + timedelta(hours=i)).isoformat(timespec="seconds"),
+                    "completed": i % 3 == 0}
+                   for i in range(1, reminders + 1)], f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=200000)
+    parser.add_argument("--reminders", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        populate(data_dir, args.notes, args.reminders)
+        print(f"{args.notes} notes, {args.reminders} reminders, {args.runs} runs each (median ms)")
+        env = {**os.environ, "AGENT_DATA_DIR": data_dir}
+        for utterance in UTTERANCES:
+            imports, firsts = [], []
+            for _ in range(args.runs):
+                output = subprocess.run(
+                    [sys.executable, "-c", CHILD.format(root=REPO_ROOT, utterance=utterance)],
+                    env=env, capture_output=True, text=True, check=True
+                ).stdout.split()
+                imports.append(float(output[-2]))
+                firsts.append(float(output[-1]))
+            print(f"{utterance!r:40} import {statistics.median(imports):7.1f}  "
+                  f"first request {statistics.median(firsts):7.1f}")
+
+
+if __name__ == "__main__":
+    main()
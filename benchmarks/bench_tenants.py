@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Throughput of the sharded multi-tenant agent at 1, 2, 4 and 8 worker processes
+
+Each simulated user has their own data directory and sends a mix of note,
+search, reminder and calculator requests. All requests are submitted at
+once; users are spread over the workers by consistent hashing, so each
+user's requests run in order on one process. Speedup is bounded by the
+number of CPU cores.
+
+Usage: python benchmarks/bench_tenants.py [--workers 1,2,4,8] [--users 64] [--requests 50]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import CHORES
+from benchmarks.load_test import percentile
+from tenants import ShardedAgentPool
+
+
+def user_requests(user: int, count: int):
+    """A user's requests: mostly writes and reads of their own notes"""
+    requests = []
+    for i in range(count):
+        chore = CHORES[(user + i) % len(CHORES)]
+        kind = i % 5
+        if kind == 0:
+            requests.append(f"add note {chore} for user {user} #{i}")
+        elif kind == 1:
+            requests.append("show notes")
+        elif kind == 2:
+            requests.append(f"search notes for {chore.split()[-1]}")
+        elif kind == 3:
+            requests.append(f"remind me to {chore} tomorrow at 9am")
+        else:
+            requests.append(f"calculate ({i} + {user}) * 3 / 7")
+    return requests
+
+
+def run(workers: int, users: int, count: int):
+    root = tempfile.mkdtemp(prefix="agent-tenants-")
+    pool = ShardedAgentPool(workers, root=root, log_level=logging.WARNING)
+    try:
+        # Start the workers and load every tenant before timing
+        start = time.perf_counter()
+        pool.process_many((f"user-{user}", "status") for user in range(users))
+        warmup = time.perf_counter() - start
+
+        # Interleave users, as concurrent clients would
+        per_user = [user_requests(user, count) for user in range(users)]
+        requests = [(f"user-{user}", per_user[user][i]) for i in range(count) for user in range(users)]
+
+        latencies = []
+        start = time.perf_counter()
+        futures = []
+        for user_id, text in requests:
+            submitted = time.perf_counter()
+            future = pool.submit(user_id, text)
+            future.add_done_callback(lambda _, submitted=submitted: latencies.append(time.perf_counter() - submitted))
+            futures.append(future)
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+        tenants = [worker["tenants"] for worker in pool.stats()]
+        latencies.sort()
+    finally:
+        pool.close()
+        shutil.rmtree(root, ignore_errors=True)
+    return {
+        "workers": workers,
+        "warmup": warmup,
+        "throughput": len(requests) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "tenants": tenants,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=lambda value: [int(n) for n in value.split(",")], default=[1, 2, 4, 8])
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50, help="requests per user")
+    args = parser.parse_args()
+
+    print(f"{args.users} users x {args.requests} requests, {os.cpu_count()} CPU core(s)\n")
+    print(f"{'workers':>7} {'warmup s':>9} {'req/s':>9} {'speedup':>8} {'p50 ms':>9} {'p99 ms':>9}  tenants per worker")
+    base = None
+    for workers in args.workers:
+        result = run(workers, args.users, args.requests)
+        base = base or result["throughput"]
+        print(f"{workers:>7} {result['warmup']:>9.2f} {result['throughput']:>9.0f} "
+              f"{result['throughput'] / base:>7.2f}x {result['p50'] * 1000:>9.1f} {result['p99'] * 1000:>9.1f}  "
+              f"{result['tenants']}")
+
+
+if __name__ == "__main__":
+    main()
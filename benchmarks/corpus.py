@@ -0,0 +1,51 @@
+"""
+Synthetic utterance corpus shared by the benchmark scripts
+"""
+
+import random
+from typing import List
+
+CITIES = ["London", "Paris", "New York", "Tokyo", "Berlin", "Madrid", "Sydney", "Toronto"]
+TOPICS = ["Python tutorials", "AI", "machine learning", "databases", "compilers", "networking"]
+CHORES = ["buy groceries", "call mom", "check email", "pay rent", "water the plants", "book flights"]
+
+TEMPLATES = [
+    "What's the weather in {city}?",
+    "Weather forecast for {city}",
+    "How's the weather today?",
+    "Is it going to rain in {city}",
+    "Add note: {chore}",
+    "Remember: {chore} tomorrow",
+    "Show my notes",
+    "list notes",
+    "What is {a} + {b}?",
+    "Calculate {a} / {b}",
+    "{a} * {b} + {c}",
+    "Remind me to {chore}",
+    "Set reminder: {chore}",
+    "Show reminders",
+    "Search for {topic}",
+    "Find information about {topic}",
+    "Look up {topic}",
+    "Create file: notes.txt",
+    "Read file: config.json",
+    "tell me a joke",
+    "good morning",
+]
+
+
+def generate_utterances(count: int, seed: int = 42) -> List[str]:
+    """Generate a reproducible list of utterances drawn from the help examples"""
+    rng = random.Random(seed)
+    utterances = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        utterances.append(template.format(
+            city=rng.choice(CITIES),
+            chore=rng.choice(CHORES),
+            topic=rng.choice(TOPICS),
+            a=rng.randint(1, 999),
+            b=rng.randint(1, 999),
+            c=rng.randint(1, 999),
+        ))
+    return utterances
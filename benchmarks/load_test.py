@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Load generator for the multi-session agent server
+
+Opens --clients concurrent sessions, each sending --requests utterances
+one after another, and reports p50/p99 latency and requests per second.
+With --spawn a server is started in a scratch data directory first.
+
+Usage: python benchmarks/load_test.py [--spawn] [--host H] [--port P] [--clients C] [--requests N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import generate_utterances
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_client(host: str, port: int, client_id: int, utterances, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for text in utterances:
+            request = json.dumps({"session": f"load-{client_id}", "input": text}).encode() + b"\n"
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            line = await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            if not line:
+                raise ConnectionError("server closed the connection")
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, clients: int, requests: int):
+    latencies = []
+    corpus = generate_utterances(clients * requests)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(host, port, i, corpus[i * requests:(i + 1) * requests], latencies)
+        for i in range(clients)
+    ))
+    return time.perf_counter() - start, latencies
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on {host}:{port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=100, help="requests per session")
+    parser.add_argument("--spawn", action="store_true", help="start a server in a temporary data directory")
+    parser.add_argument("--workers", type=int, default=16, help="server worker threads (with --spawn)")
+    args = parser.parse_args()
+
+    server = None
+    scratch = None
+    if args.spawn:
+        scratch = tempfile.TemporaryDirectory()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server.py"),
+             "--host", args.host, "--port", str(args.port), "--workers", str(args.workers)],
+            cwd=scratch.name, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        wait_for_port(args.host, args.port)
+
+    try:
+        elapsed, latencies = asyncio.run(run_load(args.host, args.port, args.clients, args.requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            scratch.cleanup()
+
+    latencies.sort()
+    print(f"Requests: {len(latencies)} from {args.clients} sessions in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"Latency p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite over the agent's hot paths
+
+Times each case per operation (mean and p99) and measures its peak
+Python memory with tracemalloc in a separate, shorter pass. Results are
+written as JSON and compared against a stored baseline; any case whose
+mean or p99 is more than --tolerance slower is flagged and the exit
+status is 1. Weather calls go to an in-process HTTP stub.
+
+Usage: python benchmarks/suite.py [--quick] [--only NAME] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import actions
+from benchmarks.corpus import CHORES, CITIES, generate_utterances
+from benchmarks.load_test import percentile
+from intents import IntentDetector
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+
+# The tracemalloc pass stops after this many operations or seconds
+MEMORY_ITERATIONS = 50
+MEMORY_SECONDS = 2.0
+
+
+class WeatherStub:
+    """Minimal OpenWeatherMap look-alike on a local port"""
+
+    BODY = json.dumps({
+        "main": {"temp": 18.5, "humidity": 60},
+        "weather": [{"description": "light rain"}],
+        "wind": {"speed": 3.2},
+    }).encode()
+
+    def __init__(self):
+        body = self.BODY
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, as the real API
+            disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/weather"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_data_manager(root: str, storage: str, notes: int = 0, reminders: int = 0) -> actions.DataManager:
+    """A DataManager in a fresh directory pre-filled with notes and reminders"""
+    data_dir = tempfile.mkdtemp(dir=root)
+    manager = actions.DataManager(data_dir, storage=storage)
+    now = datetime.now()
+    if notes:
+        manager.store.save("notes", [
+            {"id": i, "content": f"{CHORES[i % len(CHORES)]} number {i}",
+             "created_at": (now - timedelta(minutes=i)).isoformat()}
+            for i in range(1, notes + 1)
+        ])
+    if reminders:
+        manager.store.save("reminders", [
+            {"id": i, "text": f"{CHORES[i % len(CHORES)]} {i}", "created_at": now.isoformat(),
+             "time": (now + timedelta(hours=i)).isoformat(timespec="seconds"), "completed": i % 3 == 0}
+            for i in range(1, reminders + 1)
+        ])
+    return manager
+
+
+def use_data_manager(manager: actions.DataManager):
+    """Point the module-level services the handlers use at this manager"""
+    actions.data_manager = manager
+    actions.reminder_manager = actions.ReminderManager()
+
+
+def reset_services():
+    """Close and forget the services installed by use_data_manager"""
+    actions.shutdown()
+    for name in ("data_manager", "reminder_manager"):
+        vars(actions).pop(name, None)
+
+
+def measure(operation: Callable[[int], Any], iterations: int) -> Dict[str, Any]:
+    """Time `iterations` calls of operation(i), then trace memory over a few more"""
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        deadline = time.perf_counter() + MEMORY_SECONDS
+        for i in range(iterations, iterations + min(iterations, MEMORY_ITERATIONS)):
+            operation(i)
+            if time.perf_counter() > deadline:
+                break
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_kb": max(0, peak - baseline) / 1024,
+    }
+
+
+def build_cases(args, root: str, stub: WeatherStub,
+                cleanups: List[Callable[[], None]]) -> List[Tuple[str, Callable[[], Tuple[Callable[[int], Any], int]]]]:
+    """(name, setup) pairs; setup returns (operation, iterations) and may register cleanups"""
+    scale = 10 if args.quick else 1
+
+    def iterations(count: int) -> int:
+        return max(5, count // scale)
+
+    def detect_intent():
+        detector = IntentDetector()
+        corpus = generate_utterances(10000)
+        return (lambda i: detector.detect_intent(corpus[i % len(corpus)])), iterations(20000)
+
+    def add_note(size):
+        def setup():
+            use_data_manager(make_data_manager(root, args.storage, notes=size))
+            return (lambda i: actions.handle_add_note(f"add note: {CHORES[i % len(CHORES)]} {i}")), \
+                iterations(max(20, 200000 // size))
+        return setup
+
+    def save_notes(size):
+        def setup():
+            use_data_manager(make_data_manager(root, args.storage, notes=size))
+            return (lambda i: actions.data_manager.save_notes()), iterations(max(10, 100000 // size))
+        return setup
+
+    def show_notes():
+        use_data_manager(make_data_manager(root, args.storage, notes=10000))
+        return (lambda i: actions.handle_show_notes()), iterations(2000)
+
+    def calculate():
+        calculator = actions.Calculator()
+        rng = random.Random(3)
+        expressions = [f"{rng.randint(1, 999)} * ({rng.randint(1, 999)} + {rng.randint(1, 99)}) / 7"
+                       for _ in range(500)]
+        return (lambda i: calculator.calculate(expressions[i % len(expressions)])), iterations(20000)
+
+    def get_reminders():
+        use_data_manager(make_data_manager(root, args.storage, reminders=10000))
+        return (lambda i: actions.reminder_manager.get_reminders()), iterations(200)
+
+    def weather(cache_ttl):
+        def setup():
+            use_data_manager(make_data_manager(root, args.storage))  # Config source only
+            service = actions.WeatherService(api_key="bench", base_url=stub.url, cache_ttl=cache_ttl)
+            cleanups.append(service.close)
+            return (lambda i: service.get_weather(CITIES[i % len(CITIES)])), iterations(2000 if cache_ttl else 500)
+        return setup
+
+    cases = [("detect_intent", detect_intent)]
+    for size in args.sizes:
+        cases.append((f"add_note_{size}", add_note(size)))
+    for size in args.sizes:
+        cases.append((f"save_notes_{size}", save_notes(size)))
+    cases += [
+        ("show_notes_10000", show_notes),
+        ("calculate", calculate),
+        ("get_reminders_10000", get_reminders),
+        ("weather_uncached", weather(0)),
+        ("weather_cached", weather(600)),
+    ]
+    return cases
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Names of cases slower than baseline by more than tolerance"""
+    flagged = []
+    print(f"\n{'case':24} {'mean':>10} {'vs base':>8} {'p99':>10} {'vs base':>8}")
+    for name, result in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            print(f"{name:24} {result['mean_ms']:10.4f} {'new':>8} {result['p99_ms']:10.4f}")
+            continue
+        mean_ratio = result["mean_ms"] / base["mean_ms"] if base["mean_ms"] else 1.0
+        p99_ratio = result["p99_ms"] / base["p99_ms"] if base["p99_ms"] else 1.0
+        slow = mean_ratio > 1 + tolerance or p99_ratio > 1 + tolerance
+        if slow:
+            flagged.append(name)
+        print(f"{name:24} {result['mean_ms']:10.4f} {mean_ratio:7.2f}x {result['p99_ms']:10.4f} {p99_ratio:7.2f}x"
+              f"{'  <-- SLOWER' if slow else ''}")
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="10x fewer iterations")
+    parser.add_argument("--only", action="append", help="run only cases whose name starts with this (repeatable)")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[1000, 10000, 100000], help="note counts for add/save cases")
+    parser.add_argument("--storage", default="json", help="storage backend for data cases")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown before flagging (0.3 = 30%%)")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "storage": args.storage,
+            "quick": args.quick,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "cases": {},
+    }
+
+    stub = WeatherStub()
+    cleanups: List[Callable[[], None]] = []
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            for name, setup in build_cases(args, root, stub, cleanups):
+                if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                    continue
+                operation, iterations = setup()
+                result = results["cases"][name] = measure(operation, iterations)
+                print(f"{name:24} mean {result['mean_ms']:10.4f} ms  p99 {result['p99_ms']:10.4f} ms  "
+                      f"peak {result['peak_kb']:10.1f} KB  ({iterations} ops)")
+                reset_services()
+    finally:
+        for cleanup in cleanups:
+            cleanup()
+        stub.close()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("quick") != args.quick:
+            print("\nWarning: baseline was recorded with a different --quick setting")
+        flagged = compare(results, baseline, args.tolerance)
+        if flagged:
+            print(f"\n{len(flagged)} case(s) slower than baseline: {', '.join(flagged)}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
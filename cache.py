@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> str:
+        """Human readable hit/miss summary"""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries also expire `ttl` seconds after being stored"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600.0, clock=time.monotonic):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._clock = clock
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = super().get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            # Count an expired entry as a miss, not a hit
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return default
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        super().put(key, (self._clock() + self.ttl, value))
+
+
+class VersionedCache(LRUCache):
+    """LRU cache whose entries are only served while their version is current"""
+
+    def get(self, key: Hashable, version: Hashable, default: Any = None) -> Any:
+        entry = super().get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+
+        stored_version, value = entry
+        if stored_version != version:
+            # Built from data that has since changed: a miss, not a hit
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return default
+        return value
+
+    def put(self, key: Hashable, version: Hashable, value: Any):
+        super().put(key, (version, value))
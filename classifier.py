@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Hashed n-gram linear intent classifier
+
+Word uni/bigrams and character trigrams are hashed into a fixed number of
+buckets (no vocabulary to store) and scored by a softmax-regression weight
+matrix. NumPy is used for training and inference when installed; otherwise
+everything runs in pure Python with the same results.
+
+Usage:
+    python classifier.py train training/intents.tsv [--output models/intents.model]
+    python classifier.py predict "will I need an umbrella in Oslo"
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import struct
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: pure-Python fallback
+    np = None
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "intents.model")
+
+_MAGIC = b"AIC1"
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+class HashedFeaturizer:
+    """Maps text to a sparse, L2-normalized vector of hashed n-gram counts"""
+
+    def __init__(self, dim: int = 1 << 15, word_ngrams: int = 2, char_ngrams: int = 3):
+        self.dim = dim
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+
+    def config(self) -> Dict[str, int]:
+        return {"dim": self.dim, "word_ngrams": self.word_ngrams, "char_ngrams": self.char_ngrams}
+
+    def features(self, text: str) -> Tuple[List[int], List[float]]:
+        """(bucket indices, values); always includes a bias bucket"""
+        words = _WORD.findall(text.lower())
+        grams = ["<bias>"]
+        for n in range(1, self.word_ngrams + 1):
+            grams.extend("w:" + " ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        n = self.char_ngrams
+        for word in words:
+            padded = f"<{word}>"
+            grams.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+
+        counts: Dict[int, float] = {}
+        dim = self.dim
+        for gram in grams:
+            index = zlib.crc32(gram.encode()) % dim
+            counts[index] = counts.get(index, 0.0) + 1.0
+        norm = math.sqrt(sum(value * value for value in counts.values()))
+        return list(counts), [value / norm for value in counts.values()]
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(score - top) for score in scores]
+    total = sum(exps)
+    return [value / total for value in exps]
+
+
+class IntentClassifier:
+    """Softmax regression over hashed features; weights are stored bucket-major"""
+
+    def __init__(self, labels: List[str], featurizer: HashedFeaturizer = None, weights=None):
+        self.labels = list(labels)
+        self.featurizer = featurizer or HashedFeaturizer()
+        size = self.featurizer.dim * len(self.labels)
+        if np is not None:
+            self.weights = np.zeros((self.featurizer.dim, len(self.labels)), dtype=np.float32) if weights is None \
+                else np.asarray(weights, dtype=np.float32).reshape(self.featurizer.dim, len(self.labels))
+        else:
+            self.weights = array("f", bytes(4 * size)) if weights is None else array("f", weights)
+
+    # -- training --
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], epochs: int = 12, learning_rate: float = 0.5,
+              featurizer: HashedFeaturizer = None, seed: int = 1) -> "IntentClassifier":
+        """Fit on (label, text) pairs with shuffled SGD and a decaying learning rate"""
+        examples = list(examples)
+        model = cls(sorted({label for label, _ in examples}), featurizer)
+        label_index = {label: index for index, label in enumerate(model.labels)}
+        data = [(model.featurizer.features(text), label_index[label]) for label, text in examples]
+
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for (indices, values), target in data:
+                probabilities = model._probabilities(indices, values)
+                probabilities[target] -= 1.0  # Gradient of the cross-entropy wrt scores
+                model._update(indices, values, probabilities, rate)
+        return model
+
+    def _update(self, indices: List[int], values: List[float], gradient: List[float], rate: float):
+        if np is not None:
+            self.weights[indices] -= rate * np.outer(values, gradient).astype(np.float32)
+            return
+        weights, classes = self.weights, len(self.labels)
+        for index, value in zip(indices, values):
+            base = index * classes
+            step = rate * value
+            for k in range(classes):
+                weights[base + k] -= step * gradient[k]
+
+    # -- inference --
+
+    def _probabilities(self, indices: List[int], values: List[float]) -> List[float]:
+        if np is not None:
+            scores = values @ self.weights[indices]
+            return _softmax(scores.tolist())
+        weights, classes = self.weights, len(self.labels)
+        scores = [0.0] * classes
+        for index, value in zip(indices, values):
+            base = index * classes
+            for k in range(classes):
+                scores[k] += weights[base + k] * value
+        return _softmax(scores)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(most likely label, its probability)"""
+        return self.predict_many([text])[0]
+
+    def predict_many(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Batched predict: one gather and segmented sum over all inputs with NumPy"""
+        featurized = [self.featurizer.features(text) for text in texts]
+        if np is None or not featurized:
+            results = []
+            for indices, values in featurized:
+                probabilities = self._probabilities(indices, values)
+                best = max(range(len(probabilities)), key=probabilities.__getitem__)
+                results.append((self.labels[best], probabilities[best]))
+            return results
+
+        lengths = [len(indices) for indices, _ in featurized]
+        all_indices = np.fromiter((i for indices, _ in featurized for i in indices), dtype=np.int64, count=sum(lengths))
+        all_values = np.fromiter((v for _, values in featurized for v in values), dtype=np.float32, count=sum(lengths))
+        offsets = np.concatenate(([0], np.cumsum(lengths[:-1]))).astype(np.int64)
+        # Every input has a bias feature, so no segment is empty
+        scores = np.add.reduceat(self.weights[all_indices] * all_values[:, None], offsets, axis=0)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[k], float(probabilities[row, k])) for row, k in enumerate(best.tolist())]
+
+    # -- persistence --
+
+    def save(self, path: str):
+        """Write labels, featurizer config and the non-zero weight rows"""
+        classes = len(self.labels)
+        if np is not None:
+            rows = np.flatnonzero(np.any(self.weights != 0, axis=1))
+            row_indices = array("I", rows.tolist())
+            row_weights = array("f", self.weights[rows].ravel().tolist())
+        else:
+            row_indices, row_weights = array("I"), array("f")
+            for row in range(self.featurizer.dim):
+                chunk = self.weights[row * classes:(row + 1) * classes]
+                if any(chunk):
+                    row_indices.append(row)
+                    row_weights.extend(chunk)
+
+        header = json.dumps({"labels": self.labels, **self.featurizer.config(), "rows": len(row_indices)}).encode()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC + struct.pack("<I", len(header)) + header)
+            f.write(row_indices.tobytes())
+            f.write(row_weights.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with open(path, 'rb') as f:
+            if f.read(4) != _MAGIC:
+                raise ValueError(f"{path} is not an intent model")
+            header = json.loads(f.read(struct.unpack("<I", f.read(4))[0]))
+            classes = len(header["labels"])
+            row_indices = array("I")
+            row_indices.frombytes(f.read(4 * header["rows"]))
+            row_weights = array("f")
+            row_weights.frombytes(f.read(4 * header["rows"] * classes))
+
+        featurizer = HashedFeaturizer(header["dim"], header["word_ngrams"], header["char_ngrams"])
+        model = cls(header["labels"], featurizer)
+        for position, row in enumerate(row_indices):
+            chunk = row_weights[position * classes:(position + 1) * classes]
+            if np is not None:
+                model.weights[row] = chunk
+            else:
+                model.weights[row * classes:(row + 1) * classes] = chunk
+        return model
+
+
+def read_labeled(path: str) -> List[Tuple[str, str]]:
+    """(label, text) pairs from a "label<TAB>text" file; blank and # lines are skipped"""
+    examples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.strip() and not line.startswith("#"):
+                label, _, text = line.partition("\t")
+                examples.append((label.strip(), text.strip()))
+    return examples
+
+
+def load_model(path: str = None) -> Optional[IntentClassifier]:
+    """The saved classifier, or None if there is no model file"""
+    path = path or os.environ.get("AGENT_INTENT_MODEL") or MODEL_PATH
+    return IntentClassifier.load(path) if os.path.exists(path) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or query the intent classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="train from a label<TAB>text file")
+    train.add_argument("data")
+    train.add_argument("--output", default=MODEL_PATH)
+    train.add_argument("--epochs", type=int, default=12)
+    train.add_argument("--dim", type=int, default=1 << 15, help="hash buckets")
+    predict = commands.add_parser("predict", help="classify one utterance")
+    predict.add_argument("text")
+    predict.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        examples = read_labeled(args.data)
+        model = IntentClassifier.train(examples, epochs=args.epochs, featurizer=HashedFeaturizer(args.dim))
+        model.save(args.output)
+        print(f"Trained on {len(examples)} examples ({len(model.labels)} labels) -> "
+              f"{args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+    else:
+        label, probability = IntentClassifier.load(args.model).predict(args.text)
+        print(f"{label} ({probability:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Offline document search over a directory of text and markdown files
+
+The files are indexed into a BM25 inverted index (search.InvertedIndex)
+persisted in its binary form. refresh() re-indexes only files whose mtime or size
+changed since the last run, and drops deleted ones; queries return ranked
+results with a snippet around the matching terms.
+
+Usage:
+    python docsearch.py index [--dir DIR]
+    python docsearch.py search "query" [--dir DIR] [--limit 5]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+from search import InvertedIndex, tokenize
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = (".txt", ".md", ".markdown", ".rst")
+MAX_FILE_BYTES = 5 * 1024 * 1024   # Larger files are skipped
+SNIPPET_BYTES = 256 * 1024          # Only this much of a result is read for its snippet
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SearchResult(NamedTuple):
+    path: str       # relative to the indexed directory
+    score: float
+    title: str
+    snippet: str
+
+
+class DocumentIndex:
+    """BM25 index over the text/markdown files under a directory, kept current by mtime"""
+
+    def __init__(self, root: str, index_path: str = None, refresh_interval: float = 30.0):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        self.refresh_interval = refresh_interval  # Queries re-scan the directory at most this often
+        self.index = InvertedIndex()
+        # relative path -> (document number, mtime_ns, size)
+        self.files: Dict[str, Tuple[int, int, int]] = {}
+        self._loaded = False
+        self._last_refresh = None
+        self._refreshing = False
+        self._lock = threading.RLock()              # guards index and files
+        self._refresh_lock = threading.Lock()       # one refresh at a time
+
+    def load(self):
+        """Load the saved index, if any"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.index_path or not os.path.exists(self.index_path):
+                return
+            try:
+                with open(self.index_path, 'rb') as f:
+                    header = json.loads(f.read(struct.unpack("<Q", f.read(8))[0]))
+                    if header.get("root") != self.root:
+                        return  # Built for another directory
+                    self.index = InvertedIndex.read(f)
+                self.files = {path: tuple(entry) for path, entry in header["files"].items()}
+            except Exception as e:
+                logger.error(f"Error loading document index {self.index_path}: {e}")
+
+    def save(self):
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            with self._lock:
+                # Taken together so the file map matches the index
+                header = json.dumps({"root": self.root, "files": self.files}).encode()
+                chunks = self.index.binary()
+            f.write(struct.pack("<Q", len(header)) + header)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """relative path -> (mtime_ns, size) for every indexable file"""
+        found = {}
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            for filename in filenames:
+                if filename.startswith(".") or not filename.lower().endswith(EXTENSIONS):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_size <= MAX_FILE_BYTES:
+                    found[os.path.relpath(path, self.root)] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def _read(self, relative_path: str, limit: int = None) -> str:
+        with open(os.path.join(self.root, relative_path), 'r', encoding='utf-8', errors='replace') as f:
+            return f.read(limit) if limit else f.read()
+
+    def refresh(self) -> Tuple[int, int, int]:
+        """Index new and changed files and drop deleted ones; returns (added, updated, removed)"""
+        with self._refresh_lock:
+            self.load()
+            # Scanning and reading happen outside the index lock, so searches continue meanwhile
+            found = self._scan() if os.path.isdir(self.root) else {}
+            with self._lock:
+                known = dict(self.files)
+            removed_paths = [path for path in known if path not in found]
+            changed = {}
+            for path, (mtime, size) in found.items():
+                entry = known.get(path)
+                if entry is not None and entry[1:] == (mtime, size):
+                    continue
+                try:
+                    changed[path] = (self._read(path), mtime, size)
+                except OSError as e:
+                    logger.error(f"Error reading {path}: {e}")
+
+            with self._lock:
+                for path in removed_paths:
+                    self.index.remove(self.files.pop(path)[0])
+                for path, (text, mtime, size) in changed.items():
+                    if path in self.files:
+                        self.index.remove(self.files[path][0])
+                    self.files[path] = (self.index.add(path, f"{path}\n{text}"), mtime, size)
+
+                # Stale postings of changed/deleted files slow queries down; drop them once they pile up
+                if len(self.index.deleted) > max(1000, self.index.live // 4):
+                    renumbered = self.index.compact()
+                    self.files = {path: (renumbered[doc], mtime, size)
+                                  for path, (doc, mtime, size) in self.files.items()}
+                self._last_refresh = time.monotonic()
+
+            updated = sum(1 for path in changed if path in known)
+            if changed or removed_paths:
+                self.save()
+            return len(changed) - updated, updated, len(removed_paths)
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing document index: {e}")
+        finally:
+            self._refreshing = False
+
+    def search(self, query: str, limit: int = 5) -> List[SearchResult]:
+        """Best matching documents; the index is built on first use and re-scanned in the background when due"""
+        if self._last_refresh is None:
+            self.refresh()
+        elif time.monotonic() - self._last_refresh >= self.refresh_interval and not self._refreshing:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, name="document-index", daemon=True).start()
+        with self._lock:
+            hits = self.index.search(query, limit)
+
+        terms = set(tokenize(query))
+        results = []
+        for path, score in hits:
+            try:
+                text = self._read(path, SNIPPET_BYTES)
+            except OSError:
+                continue  # Deleted since the last refresh
+            results.append(SearchResult(path, score, _title(path, text), _snippet(text, terms)))
+        return results
+
+    def __len__(self) -> int:
+        return self.index.live
+
+
+def _title(path: str, text: str) -> str:
+    """The first markdown heading, else the file name"""
+    match = _HEADING.search(text, 0, 4096)
+    if match:
+        return match.group(1)
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _snippet(text: str, terms, width: int = 160) -> str:
+    """The `width`-character window of text holding the most query-term occurrences"""
+    if not terms:
+        return _WHITESPACE.sub(" ", text[:width]).strip()
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in sorted(terms)) + r")\b", re.IGNORECASE)
+    positions = [match.start() for match in pattern.finditer(text)]
+    if not positions:
+        start = 0
+    else:
+        # Slide over the matches: the window starting a little before match i covering the most matches
+        best, best_count, end_index = positions[0], 0, 0
+        for index, position in enumerate(positions):
+            while end_index < len(positions) and positions[end_index] < position + width - 20:
+                end_index += 1
+            if end_index - index > best_count:
+                best, best_count = position, end_index - index
+        start = max(0, best - 20)
+        # Start on a word boundary
+        while start > 0 and not text[start - 1].isspace() and best - start < 40:
+            start -= 1
+    snippet = _WHITESPACE.sub(" ", text[start:start + width]).strip()
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(text) else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index or search local documents")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("index", help="index new and changed files")
+    index.add_argument("--dir", help="documents directory (default: the agent's search directory)")
+    search = commands.add_parser("search", help="run one query")
+    search.add_argument("query")
+    search.add_argument("--dir", help="documents directory (default: the agent's search directory)")
+    search.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    import actions
+    documents = DocumentIndex(args.dir, actions.get_search_index_path()) if args.dir else actions.get_document_index()
+    if args.command == "index":
+        start = time.perf_counter()
+        added, updated, removed = documents.refresh()
+        print(f"{documents.root}: {added} added, {updated} updated, {removed} removed, "
+              f"{len(documents)} indexed ({time.perf_counter() - start:.1f}s)")
+    else:
+        for result in documents.search(args.query, args.limit):
+            print(f"{result.score:6.2f}  {result.title} ({result.path})\n        {result.snippet}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import ast
+import operator
+from typing import Callable, Union
+
+from cache import LRUCache
+
+Number = Union[int, float, complex]
+
+# Limits that keep a single expression from pinning a CPU or exhausting memory
+MAX_LENGTH = 500          # characters in the expression
+MAX_STEPS = 200           # AST nodes evaluated
+MAX_EXPONENT = 1000       # absolute value of any exponent
+MAX_RESULT_BITS = 4096    # size of any integer (intermediate or final)
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression is not valid arithmetic"""
+
+
+class ExpressionLimitError(ExpressionError):
+    """Raised when an expression exceeds one of the evaluation limits"""
+
+
+def _check_size(value: Number) -> Number:
+    if isinstance(value, int) and value.bit_length() > MAX_RESULT_BITS:
+        raise ExpressionLimitError("Result is too large")
+    return value
+
+
+def _power(base: Number, exponent: Number) -> Number:
+    if isinstance(exponent, complex) or abs(exponent) > MAX_EXPONENT:
+        raise ExpressionLimitError("Exponent is too large")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        if base.bit_length() * exponent > MAX_RESULT_BITS:
+            raise ExpressionLimitError("Result is too large")
+    return base ** exponent
+
+
+def _multiply(left: Number, right: Number) -> Number:
+    if isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_RESULT_BITS + 1:
+            raise ExpressionLimitError("Result is too large")
+    return left * right
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _multiply,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _power,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class ExpressionEngine:
+    """Compiles arithmetic expressions into closures over a whitelisted AST"""
+
+    def __init__(self, cache_size: int = 1024):
+        self.cache = LRUCache(maxsize=cache_size)
+
+    def compile(self, expression: str) -> Callable[[], Number]:
+        """Parse and validate an expression, returning a cached evaluator"""
+        expression = expression.strip()
+        compiled = self.cache.get(expression)
+        if compiled is None:
+            compiled = self._compile(expression)
+            self.cache.put(expression, compiled)
+        return compiled
+
+    def evaluate(self, expression: str) -> Number:
+        return self.compile(expression)()
+
+    def _compile(self, expression: str) -> Callable[[], Number]:
+        if len(expression) > MAX_LENGTH:
+            raise ExpressionLimitError("Expression is too long")
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise ExpressionError(f"Invalid expression: {e}")
+
+        steps = sum(1 for _ in ast.walk(tree.body))
+        if steps > MAX_STEPS:
+            raise ExpressionLimitError("Expression has too many steps")
+        return self._build(tree.body)
+
+    def _build(self, node: ast.AST) -> Callable[[], Number]:
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            value = node.value
+            return lambda: value
+
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            op = BINARY_OPERATORS[type(node.op)]
+            left = self._build(node.left)
+            right = self._build(node.right)
+            return lambda: _check_size(op(left(), right()))
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            op = UNARY_OPERATORS[type(node.op)]
+            operand = self._build(node.operand)
+            return lambda: op(operand())
+
+        raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
@@ -0,0 +1,233 @@
+"""
+File operations confined to one root directory
+
+Files are read in fixed-size chunks, never whole: read/head skip to a
+line by counting newlines chunk by chunk, tail reads backwards from the
+end, and grep scans chunk by chunk. Memory use therefore does not depend
+on the file size. Output is paged (PAGE_LINES lines per page) and long
+lines are cut at MAX_LINE_CHARS.
+"""
+
+import os
+from typing import BinaryIO, Iterator, List, NamedTuple, Tuple
+
+CHUNK_BYTES = 1024 * 1024
+MAX_LINE_BYTES = 64 * 1024      # Lines are cut here when read (and at MAX_LINE_CHARS when shown)
+MAX_LINE_CHARS = 200
+PAGE_LINES = 40
+MAX_COUNT = 500                 # Upper bound for head/tail line counts
+MAX_CONTENT_BYTES = 1024 * 1024  # Largest text create/append will write
+_BINARY_SNIFF = 8192
+
+
+class Page(NamedTuple):
+    lines: List[Tuple[int, str]]  # (1-based line number, text); line numbers are 0 when unknown (tail)
+    more: bool                    # Whether a next page exists
+
+
+class FileWorkspace:
+    """Reads, searches and writes files under a root directory"""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+
+    def resolve(self, path: str) -> str:
+        """Absolute path of `path` (relative to the root); PermissionError if it leads outside the root"""
+        if not path:
+            raise ValueError("no file name given")
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            raise PermissionError(f"{path} is outside {self.root}")
+        return full_path
+
+    def relative(self, full_path: str) -> str:
+        return os.path.relpath(full_path, self.root)
+
+    def _open(self, path: str) -> BinaryIO:
+        full_path = self.resolve(path)
+        if os.path.isdir(full_path):
+            raise IsADirectoryError(path)
+        f = open(full_path, 'rb')
+        if b"\0" in f.read(_BINARY_SNIFF):
+            f.close()
+            raise ValueError(f"{path} looks like a binary file")
+        f.seek(0)
+        return f
+
+    def read(self, path: str, page: int = 1, page_lines: int = PAGE_LINES) -> Page:
+        """Lines of one page of a file"""
+        with self._open(path) as f:
+            first = (max(page, 1) - 1) * page_lines + 1
+            if not _skip_lines(f, first - 1):
+                return Page([], False)
+            return _take_lines(f, first, page_lines)
+
+    def head(self, path: str, count: int = 10) -> Page:
+        return self.read(path, 1, min(max(count, 1), MAX_COUNT))
+
+    def tail(self, path: str, count: int = 10) -> Page:
+        """The last `count` lines, read backwards from the end of the file"""
+        count = min(max(count, 1), MAX_COUNT)
+        with self._open(path) as f:
+            end = f.seek(0, os.SEEK_END)
+            position, newlines, chunks = end, 0, []
+            # A final newline ends the last line rather than starting an empty one
+            if end:
+                f.seek(end - 1)
+                if f.read(1) == b"\n":
+                    newlines = -1
+            budget = (count + 1) * MAX_LINE_BYTES  # Stop reading back over very long lines
+            while position > 0 and newlines < count and end - position < budget:
+                size = min(CHUNK_BYTES // 16, position)
+                position -= size
+                f.seek(position)
+                chunk = f.read(size)
+                newlines += chunk.count(b"\n")
+                chunks.append(chunk)
+        data = b"".join(reversed(chunks))
+        lines = data.split(b"\n")
+        if data.endswith(b"\n"):
+            lines.pop()
+        more = len(lines) > count or position > 0
+        return Page([(0, _decode(line)) for line in lines[-count:]], more)
+
+    def grep(self, path: str, pattern: str, page: int = 1, page_lines: int = PAGE_LINES) -> Page:
+        """Lines containing `pattern` (literal text, ignoring ASCII case), one page at a time"""
+        if not pattern:
+            raise ValueError("no search text given")
+        needle = pattern.encode('utf-8').lower()
+        skip = (max(page, 1) - 1) * page_lines
+        matches: List[Tuple[int, str]] = []
+        with self._open(path) as f:
+            for number, line in _matching_lines(f, needle):
+                if skip:
+                    skip -= 1
+                    continue
+                if len(matches) == page_lines:
+                    return Page(matches, True)
+                matches.append((number, _decode(line)))
+        return Page(matches, False)
+
+    def listing(self, path: str = ".", page: int = 1, page_lines: int = PAGE_LINES) -> Page:
+        """Names in a directory, sorted, one page at a time (sub-directories end with '/')"""
+        full_path = self.resolve(path)
+        with os.scandir(full_path) as entries:
+            names = sorted(entry.name + ("/" if entry.is_dir() else "") for entry in entries
+                           if not entry.name.startswith("."))
+        start = (max(page, 1) - 1) * page_lines
+        return Page([(0, name) for name in names[start:start + page_lines]], start + page_lines < len(names))
+
+    def create(self, path: str, content: str = "") -> str:
+        """Create a new file (never overwrites); returns its path relative to the root"""
+        full_path = self._writable(path, content)
+        with open(full_path, 'x', encoding='utf-8') as f:
+            if content:
+                f.write(content + "\n")
+        return self.relative(full_path)
+
+    def append(self, path: str, content: str) -> str:
+        """Add a line to the end of a file, creating it if needed"""
+        if not content:
+            raise ValueError("nothing to append")
+        full_path = self._writable(path, content)
+        with open(full_path, 'ab') as f:
+            # Keep the new text on its own line
+            if f.tell() and not _ends_with_newline(full_path):
+                f.write(b"\n")
+            f.write(content.encode('utf-8') + b"\n")
+        return self.relative(full_path)
+
+    def _writable(self, path: str, content: str) -> str:
+        full_path = self.resolve(path)
+        if len(content.encode('utf-8')) > MAX_CONTENT_BYTES:
+            raise ValueError(f"content is larger than {MAX_CONTENT_BYTES // 1024} KB")
+        if os.path.isdir(full_path):
+            raise IsADirectoryError(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return full_path
+
+
+def _ends_with_newline(full_path: str) -> bool:
+    with open(full_path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _skip_lines(f: BinaryIO, count: int) -> bool:
+    """Move past `count` lines by counting newlines chunk by chunk; False if the file has fewer"""
+    while count > 0:
+        position = f.tell()
+        chunk = f.read(CHUNK_BYTES)
+        if not chunk:
+            return False
+        newlines = chunk.count(b"\n")
+        if newlines < count:
+            count -= newlines
+            continue
+        # The count-th newline in this chunk
+        end = -1
+        for _ in range(count):
+            end = chunk.index(b"\n", end + 1)
+        f.seek(position + end + 1)
+        count = 0
+    # A final line without newline still counts as a line
+    next_byte = f.read(1)
+    if not next_byte:
+        return False
+    f.seek(-1, os.SEEK_CUR)
+    return True
+
+
+def _take_lines(f: BinaryIO, first: int, count: int) -> Page:
+    lines = []
+    for number in range(first, first + count):
+        line = f.readline(MAX_LINE_BYTES)
+        if not line:
+            return Page(lines, False)
+        if not line.endswith(b"\n"):
+            # Cut a very long line: skip the rest of it
+            while True:
+                rest = f.readline(CHUNK_BYTES)
+                if not rest or rest.endswith(b"\n"):
+                    break
+        lines.append((number, _decode(line)))
+    next_byte = f.read(1)
+    return Page(lines, bool(next_byte))
+
+
+def _matching_lines(f: BinaryIO, needle: bytes) -> Iterator[Tuple[int, bytes]]:
+    """(line number, line) for each line containing lower-case `needle` (ignoring ASCII case), CHUNK_BYTES at a time"""
+    number = 1          # Line number at the start of `buffer`
+    carry = b""
+    while True:
+        chunk = f.read(CHUNK_BYTES)
+        buffer = carry + chunk
+        if not chunk:
+            complete, carry = buffer, b""
+        else:
+            cut = buffer.rfind(b"\n") + 1
+            if not cut and len(buffer) >= MAX_LINE_BYTES:
+                cut = len(buffer)  # A line longer than MAX_LINE_BYTES is scanned in pieces
+            complete, carry = buffer[:cut], buffer[cut:]
+        # bytes.lower() and find() run in C, far faster than a case-insensitive regex
+        lowered = complete.lower()
+        position = 0    # Scanned up to here; `number` is the line number there
+        found = lowered.find(needle)
+        while found >= 0:
+            start = complete.rfind(b"\n", 0, found) + 1
+            number += complete.count(b"\n", position, start)
+            end = complete.find(b"\n", found + len(needle))
+            end = len(complete) if end < 0 else end
+            yield number, complete[start:min(end, start + MAX_LINE_BYTES)]
+            position = end
+            found = lowered.find(needle, end)  # The next match on a later line
+        number += complete.count(b"\n", position)
+        if not chunk:
+            return
+
+
+def _decode(line: bytes) -> str:
+    text = line.rstrip(b"\r\n").decode('utf-8', errors='replace')
+    if len(text) > MAX_LINE_CHARS:
+        return text[:MAX_LINE_CHARS] + "…"
+    return text
@@ -0,0 +1,145 @@
+"""
+Typo-tolerant word lookup with a symmetric-delete (SymSpell) index
+
+Every vocabulary word is stored under each string obtained by deleting
+up to max_distance of its characters. A misspelled word finds its
+candidates by generating its own deletes and looking them up, so a
+lookup costs a number of dict probes bounded by the word's length, not
+by the vocabulary size. Candidates are then confirmed with a bounded
+edit distance in which swapping two adjacent characters counts as one
+edit. Results are memoized per word, since the same words recur.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from cache import LRUCache
+
+_UNSEEN = object()
+
+
+class SymSpellIndex:
+    """Finds the vocabulary word closest to a misspelled word"""
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = 2, min_length: int = 4,
+                 long_word: int = 6, memo_size: int = 4096):
+        self.max_distance = max_distance
+        self.min_length = min_length    # Shorter words are neither indexed nor corrected
+        self.long_word = long_word      # Shorter words are corrected by at most one edit
+        self.words: Dict[str, int] = {}  # word -> rank; earlier words win ties
+        self._deletes: Dict[str, List[str]] = {}
+        self.memo = LRUCache(memo_size)  # word -> lookup result; cleared by add()
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def add(self, word: str):
+        if len(word) < self.min_length or word in self.words:
+            return
+        self.words[word] = len(self.words)
+        for variant in _deletes(word, self.max_distance):
+            self._deletes.setdefault(variant, []).append(word)
+        self.memo.clear()
+
+    def lookup(self, word: str) -> Optional[Tuple[str, int]]:
+        """(closest vocabulary word, edit distance), or None if nothing is close enough"""
+        if word in self.words:
+            return word, 0
+        result = self.memo.get(word, _UNSEEN)
+        if result is _UNSEEN:
+            result = self._lookup(word)
+            self.memo.put(word, result)
+        return result
+
+    def _lookup(self, word: str) -> Optional[Tuple[str, int]]:
+        limit = self.max_distance if len(word) >= self.long_word else min(1, self.max_distance)
+        if limit <= 0 or len(word) < self.min_length:
+            return None
+        # A word within d edits shares a string of at most d deletes with the
+        # query; probe one edit first and only go on to two if nothing is found
+        probes = {word}
+        for distance in range(1, limit + 1):
+            probes = probes | _deletes_at(word, distance)
+            best: Optional[Tuple[int, int, str]] = None  # (distance, rank, word)
+            for candidate in {candidate for probe in probes for candidate in self._deletes.get(probe, ())}:
+                found = edit_distance(word, candidate, distance)
+                if found <= distance:
+                    key = (found, self.words[candidate], candidate)
+                    if best is None or key < best:
+                        best = key
+            if best is not None:
+                return best[2], best[0]
+        return None
+
+
+def load_words(path: str) -> FrozenSet[str]:
+    """Lower-cased words of a word list: one per line, '#' starts a comment line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith("#"))
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """The word and every string made by deleting up to `distance` of its characters"""
+    variants = {word}
+    for deleted in range(1, distance + 1):
+        variants |= _deletes_at(word, deleted)
+    return variants
+
+
+def _deletes_at(word: str, distance: int) -> Set[str]:
+    """Every string made by deleting exactly `distance` characters of word"""
+    if distance == 1:
+        return {word[:i] + word[i + 1:] for i in range(len(word))}
+    if distance == 2:
+        # Each pair of positions once, rather than deleting twice
+        return {word[:i] + word[i + 1:j] + word[j + 1:] for j in range(1, len(word)) for i in range(j)}
+    return {variant[:i] + variant[i + 1:] for variant in _deletes_at(word, distance - 1) for i in range(len(variant))}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edits (insert, delete, substitute, swap adjacent) from a to b; limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+    if limit == 1:
+        return 1 if _one_edit(a, b) else 2
+    # Only cells within `limit` of the diagonal can stay within limit
+    big = limit + 1
+    before_previous: List[int] = []
+    previous_row = [j if j <= limit else big for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        row = [big] * (len(b) + 1)
+        if i <= limit:
+            row[0] = i
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        best = row[0]
+        for j in range(low, high + 1):
+            value = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            row[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return big
+        before_previous, previous_row = previous_row, row
+    return min(previous_row[-1], big)
+
+
+def _one_edit(a: str, b: str) -> bool:
+    """Whether a and b (known to differ) are one edit apart, in linear time"""
+    if len(a) > len(b):
+        a, b = b, a
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    if len(a) < len(b):
+        return a[start:] == b[start + 1:]
+    return (a[start + 1:] == b[start + 1:]
+            or (start + 1 < len(a) and a[start] == b[start + 1] and a[start + 1] == b[start]
+                and a[start + 2:] == b[start + 2:]))
@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class IntentCodes:
+    """Two-way mapping between intent names and small integer codes"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()  # Histories of concurrent agents add names at once
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(name)
+                if code is None:
+                    self.names.append(name)
+                    code = self._codes[name] = len(self.names) - 1
+        return code
+
+    def name(self, code: int) -> str:
+        return self.names[code]
+
+
+# Shared by every history so codes stay consistent within a process
+intent_codes = IntentCodes()
+
+
+class Interaction:
+    """One user turn: input, detected intent and the agent's response"""
+    __slots__ = ("user", "intent_code", "confidence", "response", "timestamp")
+
+    def __init__(self, user: str, intent: str, confidence: float,
+                 response: Optional[str] = None, timestamp: float = None):
+        self.user = user
+        self.intent_code = intent_codes.code(intent)
+        self.confidence = confidence
+        self.response = response
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    @property
+    def intent(self) -> str:
+        return intent_codes.name(self.intent_code)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user": self.user,
+            "intent": self.intent,
+            "confidence": self.confidence,
+            "response": self.response,
+            "timestamp": self.timestamp
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Interaction":
+        return cls(data["user"], data["intent"], data["confidence"], data.get("response"), data.get("timestamp"))
+
+
+class ConversationHistory:
+    """
+    Bounded conversation history that spills old entries to disk
+
+    The newest `capacity` interactions live in a fixed-size ring buffer.
+    Each evicted interaction is appended to <archive_dir>/<name>.jsonl,
+    which rotates to .1, .2, ... once it exceeds max_archive_bytes (keeping
+    max_archive_files of them). close() archives the buffered ones too, so
+    a later history with the same archive sees every interaction. Iterating
+    yields the archived interactions oldest first, then the buffered ones,
+    reading the files lazily.
+    """
+
+    def __init__(self, capacity: int = 1000, archive_dir: str = None, name: str = "history",
+                 max_archive_bytes: int = 10 * 1024 * 1024, max_archive_files: int = 5):
+        self.capacity = max(1, capacity)
+        self.max_archive_bytes = max_archive_bytes
+        self.max_archive_files = max_archive_files
+        self.archive_path = None
+        if archive_dir:
+            safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+            self.archive_path = os.path.join(archive_dir, f"{safe_name}.jsonl")
+
+        self._buffer: List[Optional[Interaction]] = [None] * self.capacity
+        self._start = 0         # position of the oldest buffered interaction
+        self._size = 0
+        self._total = 0         # interactions appended since creation
+        self._archive = None
+        self._archive_size = 0
+        self._lock = threading.Lock()  # For agents shared by worker threads (batch mode)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def append(self, user: str, intent: str, confidence: float) -> Interaction:
+        """Record a new interaction, evicting (and archiving) the oldest if full"""
+        with self._lock:
+            interaction = Interaction(user, intent, confidence)
+            if self._size == self.capacity:
+                self._spill(self._buffer[self._start])
+                self._buffer[self._start] = interaction
+                self._start = (self._start + 1) % self.capacity
+            else:
+                self._buffer[(self._start + self._size) % self.capacity] = interaction
+                self._size += 1
+            self._total += 1
+        return interaction
+
+    def recent(self, count: int) -> List[Interaction]:
+        """The newest `count` buffered interactions, oldest first"""
+        count = min(count, self._size)
+        return [
+            self._buffer[(self._start + self._size - count + offset) % self.capacity]
+            for offset in range(count)
+        ]
+
+    def _archive_files(self) -> List[str]:
+        """Archive files from oldest to newest"""
+        if self.archive_path is None:
+            return []
+        rotated = [f"{self.archive_path}.{index}" for index in range(self.max_archive_files, 0, -1)]
+        return [path for path in rotated + [self.archive_path] if os.path.exists(path)]
+
+    def _spill(self, interaction: Interaction):
+        if self.archive_path is None:
+            return
+        if self._archive is None:
+            os.makedirs(os.path.dirname(self.archive_path) or ".", exist_ok=True)
+            self._archive = open(self.archive_path, 'a')
+            self._archive_size = self._archive.tell()
+
+        line = json.dumps(interaction.to_dict()) + "\n"
+        self._archive.write(line)
+        self._archive_size += len(line)
+        if self._archive_size >= self.max_archive_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._archive.close()
+        self._archive = None
+        oldest = f"{self.archive_path}.{self.max_archive_files}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.max_archive_files - 1, 0, -1):
+            path = f"{self.archive_path}.{index}"
+            if os.path.exists(path):
+                os.replace(path, f"{self.archive_path}.{index + 1}")
+        if self.max_archive_files > 0:
+            os.replace(self.archive_path, f"{self.archive_path}.1")
+        else:
+            os.remove(self.archive_path)
+
+    def __iter__(self) -> Iterator[Interaction]:
+        """Lazily iterate the archived then buffered interactions"""
+        buffered = self.recent(self._size)
+        if self._archive is not None:
+            self._archive.flush()
+        for path in self._archive_files():
+            with open(path, 'r') as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield Interaction.from_dict(json.loads(line))
+        yield from buffered
+
+    def close(self):
+        """Move the buffered interactions to the archive, then flush and close it"""
+        with self._lock:
+            if self.archive_path is not None:
+                for interaction in self.recent(self._size):
+                    self._spill(interaction)
+                self._buffer = [None] * self.capacity
+                self._start = self._size = 0
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
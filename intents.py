@@ -1,20 +1,121 @@
+import logging
+import os
 import re
-from typing import Dict, List, Tuple
+from array import array
+from typing import AbstractSet, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from cache import LRUCache
+from fuzzy import SymSpellIndex, load_words
+from matcher import PatternMatcher
+from slots import SlotExtractor, slot_extractor
+
+logger = logging.getLogger(__name__)
+
+_CALCULATOR_HINT = re.compile(r'[\d\+\-\*\/\(\)]')
+# A number, an operator and a number: maths even if only operator keywords matched
+_EXPRESSION = re.compile(r'\d\s*[\+\-\*\/]\s*[\d\(.]')
+
+# Distinct inputs remembered within one detect_intents call
+_BATCH_MEMO_SIZE = 65536
+
+# Low-scoring inputs sent to the classifier in one batch by detect_intents
+_CLASSIFIER_BATCH = 512
+
+# Normalized inputs whose detect_intent result is remembered across calls
+MEMO_SIZE = 4096
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?", re.IGNORECASE)
+
+# Real English words near keywords that the fuzzy tier leaves alone (see the file's header)
+COMMON_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon", "english.txt")
+
+
+class _CompiledPatterns(NamedTuple):
+    """Matcher plus lookup tables derived from intent_patterns"""
+    names: List[str]
+    confidences: List[float]
+    matcher: PatternMatcher
+    phrase_owner: List[Optional[int]]
+    commands: List[bool]  # Whether a pattern is a command phrase of its owner (these win over other phrases)
+    keyword_owners: List[List[Tuple[int, int]]]
+    vocabulary: SymSpellIndex  # Words of every keyword and phrase, for typo correction
+
+
+class IntentBatch:
+    """Compact results of IntentDetector.detect_intents"""
+    __slots__ = ("labels", "codes", "confidences")
+
+    def __init__(self, labels: List[str]):
+        self.labels = labels
+        self.codes = array("H")  # index into labels, one per input
+        self.confidences = array("d")
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Tuple[str, float]:
+        return self.labels[self.codes[index]], self.confidences[index]
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        labels = self.labels
+        for code, confidence in zip(self.codes, self.confidences):
+            yield labels[code], confidence
+
+    def intents(self) -> List[str]:
+        """Intent names for every input, in order"""
+        labels = self.labels
+        return [labels[code] for code in self.codes]
+
 
 class IntentDetector:
-    def __init__(self):
-        # Define intent patterns with confidence scoring
+    def __init__(self, slots: SlotExtractor = None, classifier_path: str = None, memo_size: int = MEMO_SIZE):
+        self.slots = slots or slot_extractor
+        
+        # detect_intent results by normalized input, and parse() results (intent
+        # plus pattern slots) by exact input; both are cleared by rebuild()
+        self.memo = LRUCache(memo_size)
+        self.parse_memo = LRUCache(memo_size)
+        
+        # Optional second tier: a trained classifier (classifier.py) consulted
+        # when the rules score below classifier_threshold. It is loaded from
+        # classifier_path (default models/intents.model) on first need, if present.
+        self.classifier_path = classifier_path
+        self.classifier_threshold = 0.3  # Call rebuild() after changing these
+        self.classifier_min_probability = 0.5
+        self._classifier = None
+        self._classifier_loaded = False
+        # Typo tier, between the rules and the classifier: inputs scoring below
+        # fuzzy_threshold are re-scored with misspelled words (1-2 edits from a
+        # keyword or phrase word, and not listed as real words) corrected, at
+        # fuzzy_discount per edit. A correction only counts if it completes a
+        # phrase or is the input's only evidence of any intent.
+        self.fuzzy_threshold = 0.3
+        self.fuzzy_max_distance = 2  # 0 turns the tier off; call rebuild() after changing it
+        self.fuzzy_discount = 0.85
+        self.common_words_path = COMMON_WORDS_PATH
+        self._common_words: AbstractSet[str] = frozenset()
+        self._common_words_loaded = False
+        # Define intent patterns with confidence scoring. "commands" are phrases
+        # that outrank other intents' phrases ("remind me to check the weather")
         self.intent_patterns = {
             "weather": {
                 "keywords": ["weather", "temperature", "forecast", "rain", "sunny", "cloudy", "hot", "cold", "humidity"],
-                "phrases": ["what's the weather", "how's the weather", "weather today", "weather forecast"],
+                "phrases": ["what's the weather", "how's the weather", "weather today", "weather forecast",
+                            "weather in", "weather for", "forecast for", "temperature in"],
                 "confidence": 0.8
             },
             "add_note": {
                 "keywords": ["note", "remember", "save", "write down", "jot down"],
-                "phrases": ["add note", "create note", "save note", "remember that"],
+                "phrases": ["add note", "create note", "save note", "remember that", "remember:"],
+                "commands": ["add note", "create note", "save note", "remember that", "remember:"],
                 "confidence": 0.7
             },
+            "search_notes": {
+                "keywords": ["search notes", "find notes"],
+                "phrases": ["search notes", "search my notes", "find notes", "find my notes",
+                            "notes about", "notes mentioning", "notes containing"],
+                "confidence": 0.8
+            },
             "show_notes": {
                 "keywords": ["show", "list", "display", "view", "notes"],
                 "phrases": ["show notes", "list notes", "display notes", "view notes", "my notes"],
@@ -27,7 +128,10 @@ class IntentDetector:
             },
             "reminder": {
                 "keywords": ["remind", "reminder", "alarm", "schedule", "later", "tomorrow"],
-                "phrases": ["remind me", "set reminder", "schedule", "alarm"],
+                "phrases": ["remind me", "set reminder", "schedule", "alarm",
+                            "show reminders", "list reminders", "view reminders", "display reminders",
+                            "my reminders", "reminders due"],
+                "commands": ["remind me", "set reminder"],
                 "confidence": 0.7
             },
             "web_search": {
@@ -36,56 +140,329 @@ class IntentDetector:
                 "confidence": 0.6
             },
             "file_operation": {
-                "keywords": ["file", "create", "read", "write", "delete", "folder", "directory"],
-                "phrases": ["create file", "read file", "write to file", "delete file"],
+                "keywords": ["file", "create", "read", "write", "delete", "folder", "directory",
+                             "append", "head", "tail", "grep"],
+                "phrases": ["create file", "read file", "write to file", "delete file",
+                            "append to", " lines of", "grep", "tail file", "head file", "tail -n", "head -n",
+                            "list folder", "list directory", "list files"],
                 "confidence": 0.7
             }
         }
     
+    @property
+    def intent_patterns(self) -> Dict[str, Dict]:
+        return self._intent_patterns
+
+    @intent_patterns.setter
+    def intent_patterns(self, patterns: Dict[str, Dict]):
+        self._intent_patterns = patterns
+        self.rebuild()
+
+    def rebuild(self):
+        """Drop the compiled matcher (and memoized results) so both are rebuilt from intent_patterns"""
+        self._compiled = None
+        self.memo.clear()
+        self.parse_memo.clear()
+
+    def add_intent(self, intent: str, keywords: List[str], phrases: List[str], confidence: float):
+        """Register a new intent at runtime"""
+        self._intent_patterns[intent] = {
+            "keywords": list(keywords),
+            "phrases": list(phrases),
+            "confidence": confidence
+        }
+        self.rebuild()
+
+    def add_patterns(self, intent: str, keywords: List[str] = None, phrases: List[str] = None):
+        """Add keywords and/or phrases to an existing intent at runtime"""
+        config = self._intent_patterns[intent]
+        config["keywords"].extend(keywords or [])
+        config["phrases"].extend(phrases or [])
+        self.rebuild()
+
+    def _compile(self) -> "_CompiledPatterns":
+        """Build the single-pass matcher over every phrase and keyword"""
+        intents = list(self._intent_patterns.items())
+        matcher = PatternMatcher(
+            pattern
+            for _, config in intents
+            for pattern in config["phrases"] + config["keywords"]
+        )
+        pattern_ids = {pattern: pattern_id for pattern_id, pattern in enumerate(matcher.patterns)}
+
+        # For each pattern: the first intent using it as a phrase, and the
+        # intents using it as a keyword (with multiplicity for duplicates)
+        phrase_owner: List[Optional[int]] = [None] * len(matcher.patterns)
+        commands = [False] * len(matcher.patterns)
+        keyword_owners: List[List[Tuple[int, int]]] = [[] for _ in matcher.patterns]
+
+        for index, (_, config) in enumerate(intents):
+            for phrase in config["phrases"]:
+                pattern_id = pattern_ids[phrase]
+                if phrase_owner[pattern_id] is None:
+                    phrase_owner[pattern_id] = index
+                    commands[pattern_id] = phrase in config.get("commands", ())
+
+            counts: Dict[int, int] = {}
+            for keyword in config["keywords"]:
+                pattern_id = pattern_ids[keyword]
+                counts[pattern_id] = counts.get(pattern_id, 0) + 1
+            for pattern_id, count in counts.items():
+                keyword_owners[pattern_id].append((index, count))
+
+        return _CompiledPatterns(
+            names=[name for name, _ in intents],
+            confidences=[config["confidence"] for _, config in intents],
+            matcher=matcher,
+            phrase_owner=phrase_owner,
+            commands=commands,
+            keyword_owners=keyword_owners,
+            vocabulary=SymSpellIndex(
+                (word.lower() for pattern in matcher.patterns for word in _WORD.findall(pattern)),
+                max_distance=self.fuzzy_max_distance
+            )
+        )
+
+    def _get_compiled(self) -> "_CompiledPatterns":
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._compiled = self._compile()
+        return compiled
+
     def detect_intent(self, user_input: str) -> Tuple[str, float]:
         """
         Detect intent with confidence scoring
         Returns: (intent_name, confidence_score)
         """
+        intent, confidence, _ = self._detect(user_input)
+        return intent, confidence
+
+    def _detect(self, user_input: str) -> Tuple[str, float, Optional[Dict[str, str]]]:
+        """detect_intent, plus the typo corrections (if any) the result relies on"""
         text = user_input.lower().strip()
-        
-        # Check for exact phrase matches first (highest confidence)
-        for intent, config in self.intent_patterns.items():
-            for phrase in config["phrases"]:
-                if phrase in text:
-                    return intent, config["confidence"]
-        
+        result = self.memo.get(text)
+        if result is None:
+            intent, confidence, corrections = self._score(text)
+            if confidence < self.classifier_threshold and self.classifier is not None:
+                query = correct_words(text, corrections) if corrections else text
+                intent, confidence = self._prefer_classifier(intent, confidence, self.classifier.predict(query))
+            result = (intent, confidence, corrections)
+            self.memo.put(text, result)
+        return result
+
+    @property
+    def classifier(self):
+        """The fallback classifier, or None if no model is available"""
+        if not self._classifier_loaded:
+            self._classifier_loaded = True
+            try:
+                from classifier import load_model
+                self._classifier = load_model(self.classifier_path)
+            except Exception as e:
+                logger.error(f"Error loading intent classifier: {e}")
+        return self._classifier
+
+    @classifier.setter
+    def classifier(self, model):
+        self._classifier = model
+        self._classifier_loaded = True
+        self.memo.clear()
+        self.parse_memo.clear()
+
+    @property
+    def common_words(self) -> AbstractSet[str]:
+        """Correctly spelled words the fuzzy tier never corrects (empty if the list is missing)"""
+        if not self._common_words_loaded:
+            self._common_words_loaded = True
+            try:
+                self._common_words = load_words(self.common_words_path)
+            except OSError as e:
+                logger.error(f"Error loading common words: {e}")
+        return self._common_words
+
+    @common_words.setter
+    def common_words(self, words: Iterable[str]):
+        self._common_words = frozenset(words)
+        self._common_words_loaded = True
+        self.memo.clear()
+        self.parse_memo.clear()
+
+    def _prefer_classifier(self, intent: str, confidence: float,
+                           prediction: Tuple[str, float]) -> Tuple[str, float]:
+        """The classifier's answer if it is confident and names a known intent"""
+        label, probability = prediction
+        if (probability >= self.classifier_min_probability and probability > confidence
+                and label in self._intent_patterns):
+            return label, probability
+        return intent, confidence
+
+    def parse(self, user_input: str) -> Tuple[str, float, Dict[str, Any]]:
+        """
+        Detect intent and extract its slots (handler arguments) in one pass
+        Both are memoized together, so a repeated input is neither scored
+        nor scanned for slots again; only a due time is parsed per call.
+        Returns: (intent_name, confidence_score, slots)
+        """
+        key = (user_input, self.slots.version)
+        result = self.parse_memo.get(key)
+        if result is None:
+            intent, confidence, corrections = self._detect(user_input)
+            text = correct_words(user_input, corrections) if corrections else user_input
+            result = (intent, confidence, self.slots.match(intent, text))
+            self.parse_memo.put(key, result)
+        intent, confidence, slots = result
+        return intent, confidence, self.slots.resolve(intent, slots)
+
+    def detect_intents(self, texts: Iterable[str]) -> "IntentBatch":
+        """
+        Detect intents for many inputs in one batch
+        Accepts any iterable (including a stream); repeated inputs are only
+        normalized and scored once.
+        Returns: IntentBatch of compact intent codes and confidences
+        """
+        compiled = self._get_compiled()
+        batch = IntentBatch(compiled.names + ["unknown"])
+        label_codes = {label: code for code, label in enumerate(batch.labels)}
+        codes = batch.codes
+        confidences = batch.confidences
+
+        classifier = self.classifier
+        memo: Dict[str, Tuple[int, float]] = {}
+        pending: List[Tuple[int, str, str]] = []  # (position, text, classifier input) awaiting the classifier
+        for user_input in texts:
+            result = memo.get(user_input)
+            if result is None:
+                text = user_input.lower().strip()
+                result = memo.get(text)
+                if result is None:
+                    intent, confidence, corrections = self._score(text)
+                    result = (label_codes[intent], confidence)
+                    if classifier is not None and confidence < self.classifier_threshold:
+                        # Settled by one batched classifier call; memoized then
+                        pending.append((len(codes), text, correct_words(text, corrections) if corrections else text))
+                        codes.append(result[0])
+                        confidences.append(result[1])
+                        if len(pending) >= _CLASSIFIER_BATCH:
+                            self._resolve_pending(pending, batch, label_codes, memo)
+                        continue
+                    if len(memo) >= _BATCH_MEMO_SIZE:
+                        memo.clear()  # Keep memory flat on long streams
+                    memo[text] = result
+                memo[user_input] = result
+            codes.append(result[0])
+            confidences.append(result[1])
+
+        if pending:
+            self._resolve_pending(pending, batch, label_codes, memo)
+        return batch
+
+    def _resolve_pending(self, pending: List[Tuple[int, str, str]], batch: "IntentBatch",
+                         label_codes: Dict[str, int], memo: Dict[str, Tuple[int, float]]):
+        """Classify deferred low-scoring inputs in one batch and patch their results"""
+        distinct = list(dict.fromkeys(query for _, _, query in pending))
+        predictions = dict(zip(distinct, self.classifier.predict_many(distinct)))
+        for position, text, query in pending:
+            intent, confidence = self._prefer_classifier(
+                batch.labels[batch.codes[position]], batch.confidences[position], predictions[query])
+            batch.codes[position] = label_codes[intent]
+            batch.confidences[position] = confidence
+            if len(memo) >= _BATCH_MEMO_SIZE:
+                memo.clear()
+            memo[text] = (label_codes[intent], confidence)
+        pending.clear()
+
+    def _classify(self, text: str, calculator_hint: bool = True) -> Tuple[str, float]:
+        """Score already-normalized text against all intents"""
+        intent, score, _ = self._match(text)
+        return self._calculator_fallback(text, intent, score, calculator_hint)
+
+    def _match(self, text: str) -> Tuple[str, float, bool]:
+        """The keyword rules' best intent and score, and whether a phrase decided it"""
+        compiled = self._get_compiled()
+
+        phrase_hit = None  # (0 for a command phrase else 1, owner)
+        keyword_counts: Dict[int, int] = {}
+        for pattern_id in compiled.matcher.find_ids(text):
+            owner = compiled.phrase_owner[pattern_id]
+            if owner is not None:
+                hit = (not compiled.commands[pattern_id], owner)
+                if phrase_hit is None or hit < phrase_hit:
+                    phrase_hit = hit
+            for index, count in compiled.keyword_owners[pattern_id]:
+                keyword_counts[index] = keyword_counts.get(index, 0) + count
+
+        # Exact phrase matches win (command phrases such as "remind me" first, then earliest intent)
+        if phrase_hit is not None:
+            owner = phrase_hit[1]
+            return compiled.names[owner], compiled.confidences[owner], True
+
         # Check for keyword matches
         best_intent = "unknown"
         best_score = 0.0
-        
-        for intent, config in self.intent_patterns.items():
+
+        for index in sorted(keyword_counts):
             score = 0.0
-            keyword_count = 0
-            
-            for keyword in config["keywords"]:
-                if keyword in text:
-                    keyword_count += 1
-                    score += 0.1  # Each keyword adds 0.1 to score
-            
-            # Normalize score based on number of keywords found
-            if keyword_count > 0:
-                score = min(score, config["confidence"])
-                if score > best_score:
-                    best_score = score
-                    best_intent = intent
-        
+            for _ in range(keyword_counts[index]):
+                score += 0.1  # Each keyword adds 0.1 to score
+
+            score = min(score, compiled.confidences[index])
+            if score > best_score:
+                best_score = score
+                best_intent = compiled.names[index]
+
+        return best_intent, best_score, False
+
+    @staticmethod
+    def _calculator_fallback(text: str, intent: str, score: float, calculator_hint: bool) -> Tuple[str, float]:
         # Special case: if no keywords found but contains numbers and operators, likely calculator
-        if best_intent == "unknown" and re.search(r'[\d\+\-\*\/\(\)]', text):
+        if calculator_hint and intent == "unknown" and _CALCULATOR_HINT.search(text):
             return "calculator", 0.5
-        
-        return best_intent, best_score
+        if intent == "calculator" and score < 0.5 and _EXPRESSION.search(text):
+            return "calculator", 0.5
+        return intent, score
+
+    def _score(self, text: str) -> Tuple[str, float, Optional[Dict[str, str]]]:
+        """The rules' score, retried with typos corrected when it is low; returns the corrections used"""
+        if self.fuzzy_max_distance <= 0:
+            return (*self._classify(text), None)
+        # The digits-mean-maths fallback applies only once typo correction found nothing better
+        intent, confidence, phrase = self._match(text)
+        intent, confidence = self._calculator_fallback(text, intent, confidence, calculator_hint=False)
+        if confidence >= self.fuzzy_threshold:
+            return intent, confidence, None
+
+        vocabulary = self._get_compiled().vocabulary
+        common_words = self.common_words
+        corrections: Dict[str, str] = {}
+        edits = 0
+        for word in _WORD.findall(text):
+            if word in vocabulary or word in common_words or word in corrections:
+                continue
+            match = vocabulary.lookup(word)
+            if match is not None:
+                corrections[word] = match[0]
+                edits += match[1]
+        if corrections:
+            fuzzy_intent, fuzzy_confidence, fuzzy_phrase = self._match(correct_words(text, corrections))
+            # A correction counts only if it completes a phrase, or if the
+            # input had no evidence of any intent before it was corrected
+            if fuzzy_intent != "unknown" and ((fuzzy_phrase and not phrase) or intent == "unknown"):
+                fuzzy_confidence *= self.fuzzy_discount ** edits
+                if fuzzy_confidence > confidence:
+                    return fuzzy_intent, fuzzy_confidence, corrections
+        if intent == "unknown" and _CALCULATOR_HINT.search(text):
+            return "calculator", 0.5, None
+        return intent, confidence, None
     
     def get_intent_confidence(self, user_input: str) -> float:
         """Get confidence score for intent detection"""
         _, confidence = self.detect_intent(user_input)
         return confidence
 
+def correct_words(text: str, corrections: Dict[str, str]) -> str:
+    """text with each word found in corrections (compared in lower case) replaced"""
+    return _WORD.sub(lambda match: corrections.get(match.group().lower(), match.group()), text)
+
 # Create global instance
 intent_detector = IntentDetector()
 
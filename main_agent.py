@@ -1,7 +1,18 @@
 from intents import detect_intent, intent_detector
+from history import ConversationHistory
+from metrics import metrics
+from registry import registry
 import actions
+import argparse
+import io
+import json
 import logging
-from typing import Tuple
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, TextIO, Tuple
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -10,39 +21,51 @@ logger = logging.getLogger(__name__)
 class TaskAgent:
     """Enhanced AI Task Agent with multiple capabilities"""
     
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, session_id: str = "default", history_size: int = 1000):
+        # Recent turns stay in memory; older ones spill to data/history/<session>.jsonl
+        self.conversation_history = ConversationHistory(
+            capacity=history_size,
+            archive_dir=os.path.join(actions.get_data_dir(), "history"),
+            name=session_id
+        )
         self.context = {}
+        registry.load_plugins()
     
     def process_input(self, user_input: str) -> str:
         """Process user input and return appropriate response"""
+        return self.process(user_input)[2]
+    
+    def process(self, user_input: str) -> Tuple[str, float, str]:
+        """Process user input; returns (intent, confidence, response)"""
+        intent, confidence = "unknown", 0.0
         try:
-            # Detect intent with confidence
-            intent, confidence = intent_detector.detect_intent(user_input)
-            
-            # Log the interaction
-            logger.info(f"Intent: {intent}, Confidence: {confidence:.2f}, Input: {user_input}")
-            
-            # Store in conversation history
-            self.conversation_history.append({
-                "user": user_input,
-                "intent": intent,
-                "confidence": confidence
-            })
-            
-            # Route to appropriate handler
-            response = self._route_intent(intent, user_input, confidence)
-            
-            # Add response to history
-            self.conversation_history[-1]["response"] = response
-            
-            return response
+            with metrics.timer("agent_request_seconds"):
+                # Detect intent with confidence, then extract the handler's slots for that intent
+                with metrics.timer("agent_stage_seconds", stage="detect"):
+                    intent, confidence, slots = intent_detector.parse(user_input)
+                metrics.inc("agent_intents_total", intent=intent)
+                
+                # Log the interaction
+                logger.info(f"Intent: {intent}, Confidence: {confidence:.2f}, Input: {user_input}")
+                
+                # Store in conversation history
+                interaction = self.conversation_history.append(user_input, intent, confidence)
+                
+                # Route to appropriate handler
+                with metrics.timer("agent_stage_seconds", stage="route"):
+                    response = self._route_intent(intent, user_input, confidence, slots)
+                
+                # Add response to history
+                interaction.response = response
+                
+                return intent, confidence, response
             
         except Exception as e:
             logger.error(f"Error processing input: {e}")
-            return "Sorry, I encountered an error processing your request. Please try again."
+            metrics.inc("agent_errors_total")
+            return intent, confidence, "Sorry, I encountered an error processing your request. Please try again."
     
-    def _route_intent(self, intent: str, user_input: str, confidence: float) -> str:
+    def _route_intent(self, intent: str, user_input: str, confidence: float, slots: Dict[str, Any] = None) -> str:
         """Route intent to appropriate handler"""
         
         # Check confidence threshold
@@ -50,22 +73,7 @@ class TaskAgent:
             return f"I'm not very confident about understanding '{user_input}'. Could you rephrase that?"
         
         # Route to handlers
-        if intent == "weather":
-            return actions.handle_weather(user_input)
-        elif intent == "add_note":
-            return actions.handle_add_note(user_input)
-        elif intent == "show_notes":
-            return actions.handle_show_notes()
-        elif intent == "calculator":
-            return actions.handle_calculator(user_input)
-        elif intent == "reminder":
-            return actions.handle_reminder(user_input)
-        elif intent == "web_search":
-            return actions.handle_web_search(user_input)
-        elif intent == "file_operation":
-            return actions.handle_file_operation(user_input)
-        else:
-            return actions.handle_unknown(user_input)
+        return registry.dispatch(intent, user_input, slots)
     
     def get_help(self) -> str:
         """Get help information about available commands"""
@@ -81,6 +89,7 @@ class TaskAgent:
    - "Add note: Buy groceries"
    - "Remember: Call mom tomorrow"
    - "Show my notes"
+   - "Search notes for groceries"
 
 🧮 Calculator:
    - "What is 15 + 27?"
@@ -89,7 +98,8 @@ class TaskAgent:
 
 ⏰ Reminders:
    - "Remind me to check email"
-   - "Set reminder: Doctor appointment"
+   - "Set reminder: Doctor appointment tomorrow 9am"
+   - "Remind me to stretch in 20 minutes"
    - "Show reminders"
 
 🔍 Web Search:
@@ -99,7 +109,10 @@ class TaskAgent:
 
 📁 File Operations:
    - "Create file: notes.txt"
-   - "Read file: config.json"
+   - "Read file: config.json" (add "page 2" for more)
+   - "Last 20 lines of app.log" / "First 5 lines of app.log"
+   - "Grep error in app.log"
+   - "Append to notes.txt: call mom"
 
 Type 'help' for this message, 'exit' to quit.
         """
@@ -108,22 +121,121 @@ Type 'help' for this message, 'exit' to quit.
     def get_status(self) -> str:
         """Get agent status and statistics"""
         total_interactions = len(self.conversation_history)
-        recent_intents = [h["intent"] for h in self.conversation_history[-5:]]
+        recent_intents = [h.intent for h in self.conversation_history.recent(5)]
+        data_manager = actions.get_data_manager()
+        # Status only reports on the weather service; it must not start it
+        weather_service = actions.started_service("weather_service")
+        if weather_service is not None:
+            weather = f"{weather_service.cache.stats()}, {weather_service.coalesced} coalesced"
+        else:
+            weather = "not used yet"
         
         status = f"""
 📊 Agent Status:
    - Total interactions: {total_interactions}
    - Recent intents: {', '.join(recent_intents) if recent_intents else 'None'}
-   - Data directory: {actions.data_manager.data_dir}
-   - Notes saved: {len(actions.data_manager.notes)}
-   - Reminders active: {len([r for r in actions.data_manager.reminders if not r['completed']])}
+   - Data directory: {data_manager.data_dir}
+   - Notes saved: {data_manager.count_notes()}
+   - Reminders active: {data_manager.count_reminders(completed=False)}
+   - Weather cache: {weather}
+   - Intent memo: {intent_detector.memo.stats()}
+   - Response cache: {actions.response_cache.stats()}
         """
-        return status.strip()
+        status = status.strip()
+        if metrics.enabled:
+            status += "\n📈 Metrics:\n" + "\n".join(f"   - {line}" for line in metrics.summary())
+        return status
+    
+    def close(self):
+        """Flush the conversation archive"""
+        self.conversation_history.close()
+
+def run_batch(agent: TaskAgent, lines: Iterable[str], output: TextIO, workers: int = 4, window: int = None) -> int:
+    """
+    Process one utterance per line, writing a JSON result per line in input order
+    At most `window` utterances are read ahead of the one being written, so
+    memory stays flat however long the input is. Blank lines are skipped.
+    Returns: the number of utterances processed
+    """
+    window = window or workers * 8
+    
+    def process(line_number: int, user_input: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        intent, confidence, response = agent.process(user_input)
+        return {"line": line_number, "input": user_input, "intent": intent, "confidence": round(confidence, 4),
+                "response": response, "latency_ms": round((time.perf_counter() - start) * 1000, 3)}
+    
+    def write(result: Dict[str, Any]):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    
+    count = 0
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        for line_number, line in enumerate(lines, 1):
+            user_input = line.strip()
+            if not user_input:
+                continue
+            if len(pending) >= window:
+                write(pending.popleft().result())
+            pending.append(executor.submit(process, line_number, user_input))
+            count += 1
+        while pending:
+            write(pending.popleft().result())
+    output.flush()
+    return count
+
+def batch(args: argparse.Namespace):
+    """Non-interactive mode: stream utterances from a file (or stdin) to JSONL results"""
+    # Per-input INFO logging would dominate the run time on large inputs
+    logging.getLogger().setLevel(logging.WARNING)
+    agent = TaskAgent(session_id="batch")
+    
+    source = sys.stdin.buffer if args.batch == "-" else open(args.batch, 'rb')
+    lines = io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+    output = sys.stdout if args.output in (None, "-") else open(args.output, 'w', encoding='utf-8')
+    try:
+        start = time.perf_counter()
+        count = run_batch(agent, lines, output, args.workers, args.window)
+        elapsed = time.perf_counter() - start
+        print(f"Processed {count} utterances in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f}/s)",
+              file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.batch != "-":
+            lines.close()
+        agent.close()
+        actions.shutdown()
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
 
 def main():
     """Main application loop"""
+    parser = argparse.ArgumentParser(description="Run the AI Task Agent interactively")
+    parser.add_argument("--data-dir", help=f"data directory (default: ${actions.DATA_DIR_ENV} or data)")
+    parser.add_argument("--search-dir", help=f"documents to search (default: ${actions.SEARCH_DIR_ENV} or <data-dir>/documents)")
+    parser.add_argument("--files-dir", help=f"the only directory file operations may use (default: ${actions.FILES_DIR_ENV} or <data-dir>/files)")
+    parser.add_argument("--metrics-file", help="enable metrics and write them here in Prometheus text format")
+    parser.add_argument("--batch", metavar="PATH", help="process one utterance per line from PATH ('-' for stdin) and exit")
+    parser.add_argument("--output", help="with --batch: JSONL results file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="with --batch: utterances processed concurrently (1 keeps side effects in input order)")
+    parser.add_argument("--window", type=int, help="with --batch: max utterances in flight (default: 8 per worker)")
+    args = parser.parse_args()
+    actions.configure(args.data_dir, args.search_dir, args.files_dir)
+    if args.metrics_file:
+        metrics.enable()
+    if args.batch:
+        batch(args)
+        return
+    
     agent = TaskAgent()
     
+    # Fire due reminders in the background while we wait for input
+    scheduler = actions.reminder_manager.scheduler
+    scheduler.listeners.append(lambda reminder: print(f"\n⏰ Reminder: {reminder['text']}\nYou: ", end="", flush=True))
+    scheduler.start()
+    
     print("🤖 Enhanced AI Task Agent Ready!")
     print("Type 'help' for available commands, 'status' for agent info, or 'exit' to quit.\n")
     
@@ -141,6 +253,8 @@ def main():
                 print(agent.get_help())
             elif user_input.lower() == "status":
                 print(agent.get_status())
+                if args.metrics_file:
+                    metrics.write_prometheus(args.metrics_file)
             else:
                 response = agent.process_input(user_input)
                 print(f"Agent: {response}")
@@ -151,6 +265,11 @@ def main():
         except Exception as e:
             logger.error(f"Unexpected error in main loop: {e}")
             print("Sorry, an unexpected error occurred. Please try again.")
+    
+    agent.close()
+    actions.shutdown()
+    if args.metrics_file:
+        metrics.write_prometheus(args.metrics_file)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton that finds every pattern present in a text in one pass"""
+
+    def __init__(self, patterns: Iterable[str]):
+        # Unique patterns, in first-seen order; a pattern's id is its index here
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        # Empty patterns are contained in every string
+        self._always: List[int] = []
+        self._build()
+
+    def _build(self):
+        """Build the trie, failure links and merged output sets"""
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                self._always.append(pattern_id)
+                continue
+
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern_id)
+
+        # Breadth-first pass to compute failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_ids(self, text: str) -> Set[int]:
+        """Return the ids of all patterns that occur in text"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        found = set(self._always)
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def find(self, text: str) -> Set[str]:
+        """Return all patterns that occur in text"""
+        return {self.patterns[pattern_id] for pattern_id in self.find_ids(text)}
@@ -0,0 +1,269 @@
+"""
+In-process latency histograms and counters
+
+Disabled by default; enable with AGENT_METRICS=1 or metrics.enable().
+While disabled every hook is a flag check, and timer() hands back a shared
+no-op context manager, so instrumented code pays next to nothing.
+Everything can be rendered in the Prometheus text exposition format.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Upper bounds (seconds) of the latency buckets; the last bucket is +Inf
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# HELP text for the metrics the agent records
+HELP = {
+    "agent_request_seconds": "Time to process one user input end to end",
+    "agent_stage_seconds": "Time spent per processing stage (detect, route)",
+    "agent_handler_seconds": "Time spent in each intent handler",
+    "agent_persistence_seconds": "Time spent persisting data, per operation",
+    "agent_http_seconds": "Time spent in external HTTP calls, per service",
+    "agent_intents_total": "Inputs processed, per detected intent",
+    "agent_errors_total": "Inputs that failed with an unexpected error",
+    "agent_api_errors_total": "Failed external API calls, per service",
+    "agent_weather_cache_hits_total": "Weather lookups answered from the cache",
+    "agent_weather_cache_misses_total": "Weather lookups that needed an API call",
+    "agent_weather_coalesced_total": "Weather lookups that joined an in-flight API call",
+}
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Counts of observations per latency bucket, plus their sum"""
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given quantile"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS[index] if index < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._observe(self.name, self.labels, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Named, labeled counters and latency histograms"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = dict(HELP)
+        # Called at render time for values tracked elsewhere (e.g. cache stats)
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self._observe(name, _labels(labels), seconds)
+
+    def _observe(self, name: str, labels: Labels, seconds: float):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """Context manager recording its duration in a histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, _labels(labels))
+
+    def timed(self, name: str, **labels):
+        """Decorator recording each call's duration in a histogram"""
+        key = _labels(labels)
+
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self._observe(name, key, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]):
+        """Register a callable yielding (counter name, labels, value) at render time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]):
+        """Unregister a collector added with add_collector (no-op if it is not registered)"""
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def _collected(self) -> Dict[str, Dict[Labels, float]]:
+        counters = {name: dict(series) for name, series in self.counters.items()}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                series = counters.setdefault(name, {})
+                key = _labels(labels)
+                series[key] = series.get(key, 0) + value
+        return counters
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = self._collected()
+            histograms = {name: {labels: (list(h.counts), h.total, h.count) for labels, h in series.items()}
+                          for name, series in self.histograms.items()}
+
+        for name in sorted(counters):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name in sorted(histograms):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total, count) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS + (float("inf"),), counts):
+                    cumulative += bucket
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomically write render_prometheus() to path (e.g. for node_exporter's textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1"):
+        """Serve render_prometheus() at http://host:port/metrics from a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def summary(self, limit: int = 10) -> List[str]:
+        """Short human-readable lines for the status command"""
+        lines = []
+        with self._lock:
+            counters = self._collected()
+            for name in sorted(self.histograms):
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    label_text = f"[{','.join(value for _, value in labels)}]" if labels else ""
+                    lines.append(f"{name}{label_text}: n={histogram.count}, "
+                                 f"mean={histogram.total / histogram.count * 1000:.2f}ms, "
+                                 f"p99≤{histogram.quantile(0.99) * 1000:g}ms")
+        for name in sorted(counters):
+            top = sorted(counters[name].items(), key=lambda item: -item[1])[:limit]
+            values = ", ".join(f"{','.join(v for _, v in labels) or 'total'}={value:g}" for labels, value in top)
+            lines.append(f"{name}: {values}")
+        return lines
+
+
+metrics = Metrics(enabled=os.environ.get("AGENT_METRICS", "").lower() in ("1", "true", "yes", "on"))
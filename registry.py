@@ -0,0 +1,204 @@
+"""
+Intent handler registry
+
+Maps each intent name to its handler and pattern definition, so routing is
+one dict lookup and adding an intent is one register() call. Plugins can add
+intents without touching this package:
+
+- a module in the plugins directory, or
+- a module named by an entry point in the "aiagent.intents" group
+
+declaring a literal module-level INTENT dict plus a handler function:
+
+    INTENT = {
+        "name": "joke",
+        "keywords": ["joke", "funny"],
+        "phrases": ["tell me a joke"],
+        "confidence": 0.7,
+        "handler": "handle",        # optional, defaults to "handle"
+        "slots": [r"\bjoke about (?P<topic>.+)"],  # optional
+    }
+
+    def handle(user_input: str) -> str:
+        ...
+
+With "slots" (regexes with named groups, see slots.py) the handler is
+called as handle(user_input, slots) with the extracted slot dict.
+
+INTENT is read from the source without importing the module; the module
+itself is imported the first time its intent fires.
+"""
+
+import ast
+import importlib
+import importlib.util
+import logging
+import os
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from intents import IntentDetector, intent_detector
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "aiagent.intents"
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins")
+
+Handler = Callable[[str], str]
+
+
+class LazyHandler:
+    """Handler that imports its module on first call"""
+
+    def __init__(self, module: str, attribute: str, path: str = None):
+        self.module = module
+        self.attribute = attribute
+        self.path = path  # Source file for plugins outside sys.path
+        self._handler: Optional[Handler] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._handler is not None
+
+    def _load(self) -> Handler:
+        if self.path:
+            spec = importlib.util.spec_from_file_location(self.module, self.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            module = importlib.import_module(self.module)
+        return getattr(module, self.attribute)
+
+    def __call__(self, user_input: str, *args) -> str:
+        if self._handler is None:
+            self._handler = self._load()
+        return self._handler(user_input, *args)
+
+
+def read_intent_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """The literal INTENT dict assigned at the top level of a module, without importing it"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "INTENT" for target in node.targets):
+            return ast.literal_eval(node.value)
+    return None
+
+
+def _entry_points(group: str) -> List[metadata.EntryPoint]:
+    """Installed entry points of a group (before Python 3.10 entry_points() is a dict of groups)"""
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
+
+class HandlerRegistry:
+    """Intent name -> handler, with patterns registered on the intent detector"""
+
+    def __init__(self, detector: IntentDetector = None, fallback: Union[Handler, str] = "actions:handle_unknown"):
+        self.detector = detector or intent_detector
+        self.handlers: Dict[str, Handler] = {}
+        self._takes_slots = set()
+        self.fallback = self._resolve(fallback)
+        self._plugins_loaded = False
+
+    @staticmethod
+    def _resolve(handler: Union[Handler, str]) -> Handler:
+        if isinstance(handler, str):
+            module, _, attribute = handler.partition(":")
+            return LazyHandler(module, attribute or "handle")
+        return handler
+
+    def register(self, intent: str, handler: Union[Handler, str], keywords: List[str] = None,
+                 phrases: List[str] = None, confidence: float = None,
+                 slots: List[str] = None, takes_slots: bool = None):
+        """
+        Register a handler ("module:function" strings are imported lazily)
+        Patterns, if given, define a new intent on the detector; without
+        them the intent must already be known to the detector. Slot
+        patterns define its slots; handlers that take slots (by default,
+        those registered with slot patterns) are called as
+        handler(user_input, slots), others as handler(user_input).
+        """
+        if keywords is not None or phrases is not None:
+            self.detector.add_intent(intent, keywords or [], phrases or [],
+                                     confidence if confidence is not None else 0.7)
+        if slots is not None:
+            self.detector.slots.add(intent, slots)
+        self.handlers[intent] = self._resolve(handler)
+        if takes_slots if takes_slots is not None else slots is not None:
+            self._takes_slots.add(intent)
+        else:
+            self._takes_slots.discard(intent)
+
+    def patterns(self, intent: str) -> Optional[Dict[str, Any]]:
+        """The keyword/phrase definition used to detect an intent"""
+        return self.detector.intent_patterns.get(intent)
+
+    def dispatch(self, intent: str, user_input: str, slots: Dict[str, Any] = None) -> str:
+        """Call the intent's handler (slots default to being extracted from user_input)"""
+        handler = self.handlers.get(intent)
+        if handler is None:
+            intent, handler = "unknown", self.fallback
+        with metrics.timer("agent_handler_seconds", intent=intent):
+            if intent in self._takes_slots:
+                if slots is None:
+                    slots = self.detector.slots.extract(intent, user_input)
+                return handler(user_input, slots)
+            return handler(user_input)
+
+    def _register_plugin(self, manifest: Dict[str, Any], module: str, path: str = None, source: str = ""):
+        intent = manifest.get("name")
+        if not intent:
+            logger.error(f"Plugin {source or module} has no intent name")
+            return
+        if intent in self.handlers:
+            logger.error(f"Plugin {source or module} redefines intent '{intent}', skipping")
+            return
+        handler = LazyHandler(module, manifest.get("handler", "handle"), path)
+        self.register(intent, handler, manifest.get("keywords", []), manifest.get("phrases", []),
+                      manifest.get("confidence", 0.7), slots=manifest.get("slots"))
+
+    def load_plugins(self, directory: str = PLUGINS_DIR, group: str = ENTRY_POINT_GROUP):
+        """Discover plugins once; only their INTENT manifests are read"""
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+
+        if directory and os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith(".py") or filename.startswith("_"):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    manifest = read_intent_manifest(path)
+                    if manifest is not None:
+                        self._register_plugin(manifest, f"agent_plugins.{filename[:-3]}", path, source=path)
+                except Exception as e:
+                    logger.error(f"Error reading plugin {path}: {e}")
+
+        for entry_point in _entry_points(group):
+            try:
+                module, _, attribute = entry_point.value.partition(":")
+                spec = importlib.util.find_spec(module)
+                if spec is None or not spec.origin:
+                    logger.error(f"Plugin module {module} not found")
+                    continue
+                manifest = read_intent_manifest(spec.origin) or {}
+                manifest.setdefault("name", entry_point.name)
+                if attribute:
+                    manifest["handler"] = attribute
+                self._register_plugin(manifest, module, source=entry_point.value)
+            except Exception as e:
+                logger.error(f"Error reading plugin entry point {entry_point.name}: {e}")
+
+
+# Built-in intents; their patterns are defined in intents.IntentDetector
+# and their slots in slots.SLOT_PATTERNS
+registry = HandlerRegistry()
+for _intent in ["weather", "add_note", "search_notes", "show_notes", "calculator",
+                "reminder", "web_search", "file_operation"]:
+    registry.register(_intent, f"actions:handle_{_intent}", takes_slots=True)
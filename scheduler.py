@@ -0,0 +1,151 @@
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def due_timestamp(reminder: Dict[str, Any]) -> Optional[float]:
+    """The reminder's due time as a POSIX timestamp, or None if it has none"""
+    value = reminder.get("time")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None  # Free-form time text from older versions
+
+
+class ReminderScheduler:
+    """
+    Fires reminders when they are due from a single background thread
+
+    Pending reminders sit in a min-heap keyed by due time; the thread sleeps
+    until the earliest one is due (or a sooner one is scheduled). A sorted
+    list of the same entries answers "what is due between A and B" with
+    two bisections instead of a scan.
+    """
+
+    def __init__(self, data_manager, on_fire: Callable[[Dict[str, Any]], None] = None):
+        self.data_manager = data_manager
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = [on_fire] if on_fire else []
+
+        self._heap: List[Tuple[float, Any]] = []
+        self._by_due: List[Tuple[float, Any]] = []
+        self._scheduled: Dict[Any, float] = {}
+        self._loaded = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        # Bumped whenever the set of pending reminders changes
+        self.version = 0
+
+    def _ensure_loaded(self):
+        """Rebuild the queue from storage the first time it is needed"""
+        if self._loaded:
+            return
+        for reminder in self.data_manager.active_reminders():
+            due = due_timestamp(reminder)
+            if due is not None:
+                self._scheduled[reminder["id"]] = due
+        self._heap = [(due, reminder_id) for reminder_id, due in self._scheduled.items()]
+        heapq.heapify(self._heap)
+        self._by_due = sorted(self._heap)
+        self._loaded = True
+
+    def schedule(self, reminder: Dict[str, Any]):
+        """Queue a reminder (no-op if it has no parseable due time)"""
+        due = due_timestamp(reminder)
+        if due is None or reminder.get("completed"):
+            return
+        with self._condition:
+            self._ensure_loaded()
+            if self._scheduled.get(reminder["id"]) == due:
+                return
+            self._unschedule(reminder["id"])
+            self._scheduled[reminder["id"]] = due
+            heapq.heappush(self._heap, (due, reminder["id"]))
+            insort(self._by_due, (due, reminder["id"]))
+            self.version += 1
+            self._condition.notify()
+
+    def _unschedule(self, reminder_id: Any):
+        # Heap entries are dropped lazily when they surface; the sorted list eagerly
+        due = self._scheduled.pop(reminder_id, None)
+        if due is not None:
+            position = bisect_left(self._by_due, (due, reminder_id))
+            if position < len(self._by_due) and self._by_due[position] == (due, reminder_id):
+                del self._by_due[position]
+            self.version += 1
+
+    def due_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Pending reminders due in [start, end), earliest first"""
+        with self._condition:
+            self._ensure_loaded()
+            low = bisect_left(self._by_due, (start.timestamp(),))
+            high = bisect_left(self._by_due, (end.timestamp(),))
+            reminder_ids = [reminder_id for _, reminder_id in self._by_due[low:high]]
+        reminders = (self.data_manager.get_reminder(reminder_id) for reminder_id in reminder_ids)
+        return [reminder for reminder in reminders if reminder is not None]
+
+    def next_due(self) -> Optional[float]:
+        with self._condition:
+            self._ensure_loaded()
+            return self._by_due[0][0] if self._by_due else None
+
+    def start(self):
+        """Rebuild from storage and start the firing thread"""
+        with self._condition:
+            self._ensure_loaded()
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                reminder_id = None
+                while not self._stopped:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    due, candidate = self._heap[0]
+                    if self._scheduled.get(candidate) != due:
+                        heapq.heappop(self._heap)  # Stale entry
+                        continue
+                    delay = due - datetime.now().timestamp()
+                    if delay > 0:
+                        self._condition.wait(delay)
+                        continue
+                    heapq.heappop(self._heap)
+                    self._unschedule(candidate)
+                    reminder_id = candidate
+                    break
+                if self._stopped:
+                    return
+            self._fire(reminder_id)
+
+    def _fire(self, reminder_id: Any):
+        try:
+            reminder = self.data_manager.get_reminder(reminder_id)
+            if reminder is None or reminder.get("completed"):
+                return
+            reminder = {**reminder, "completed": True}
+            self.data_manager.update_reminder(reminder)
+            for listener in self.listeners:
+                listener(reminder)
+        except Exception as e:
+            logger.error(f"Error firing reminder {reminder_id}: {e}")
@@ -0,0 +1,372 @@
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, BinaryIO, Dict, Iterable, List, Set, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MAGIC = b"BM25"
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its me my of on or
+that the this to was were will with about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    Incrementally maintained inverted index ranked with BM25
+
+    Documents are numbered densely in the order they are added; each term
+    maps to parallel arrays of document numbers and term frequencies, so
+    postings stay sorted and compact as documents are appended.
+
+    Terms with long postings also keep a champion list of their best
+    postings. A query scores only the postings of its rarer terms, the
+    champions of its common ones and, for several common terms, the
+    documents holding more than one of them, then scores those candidates
+    exactly (common-term frequencies are found by bisecting the sorted
+    postings), so latency depends on the rarity of the query, not the
+    corpus size. Ranking is therefore approximate for queries made only of
+    common terms; tests/test_search.py bounds the difference from
+    exhaustive BM25.
+
+    Removed documents are only marked deleted (skipped by search) until
+    compact() drops them and renumbers the rest.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    LONG_POSTINGS = 300    # postings above which a term uses a champion list
+    CHAMPIONS = 100         # champion list size
+    MAX_INTERSECT = 20000   # longest postings intersected with other common terms' postings
+
+    def __init__(self):
+        self.doc_keys: List[Any] = []       # document number -> caller's key (e.g. note id)
+        self.doc_lengths = array("I")
+        self.total_length = 0
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.deleted: Set[int] = set()
+        # term -> min-heap of (static weight, doc, frequency), kept for long postings only
+        self._champions: Dict[str, List[Tuple[float, int, int]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_keys)
+
+    @property
+    def live(self) -> int:
+        """Number of documents not removed"""
+        return len(self.doc_keys) - len(self.deleted)
+
+    def _static_weight(self, frequency: int, length: int) -> float:
+        """Query-independent BM25 term weight, used to pick champions"""
+        average_length = (self.total_length / self.live) if self.live else 1.0
+        norm = self.K1 * (1 - self.B + self.B * length / (average_length or 1.0))
+        return frequency / (frequency + norm)
+
+    def add(self, key: Any, text: str) -> int:
+        """Index one document; returns its document number"""
+        tokens = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        with self._lock:
+            doc = len(self.doc_keys)
+            self.doc_keys.append(key)
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+            for term, frequency in frequencies.items():
+                frequency = min(frequency, 65535)
+                entry = self.postings.get(term)
+                if entry is None:
+                    entry = self.postings[term] = (array("I"), array("H"))
+                entry[0].append(doc)
+                entry[1].append(frequency)
+
+                champions = self._champions.get(term)
+                if champions is None:
+                    if len(entry[0]) > self.LONG_POSTINGS:
+                        self._champion_list(term)  # Build once as the term becomes common
+                else:
+                    weighted = (self._static_weight(frequency, len(tokens)), doc, frequency)
+                    if len(champions) < self.CHAMPIONS:
+                        heapq.heappush(champions, weighted)
+                    elif weighted > champions[0]:
+                        heapq.heapreplace(champions, weighted)
+        return doc
+
+    def remove(self, doc: int):
+        """Exclude a document (by number) from search results"""
+        with self._lock:
+            if doc not in self.deleted:
+                self.deleted.add(doc)
+                self.total_length -= self.doc_lengths[doc]
+
+    def compact(self) -> Dict[int, int]:
+        """Drop removed documents from the postings and renumber the rest; returns old -> new numbers"""
+        with self._lock:
+            deleted = self.deleted
+            renumbered: Dict[int, int] = {}
+            doc_keys: List[Any] = []
+            doc_lengths = array("I")
+            for doc, key in enumerate(self.doc_keys):
+                if doc not in deleted:
+                    renumbered[doc] = len(doc_keys)
+                    doc_keys.append(key)
+                    doc_lengths.append(self.doc_lengths[doc])
+
+            postings: Dict[str, Tuple[array, array]] = {}
+            for term, (docs, frequencies) in self.postings.items():
+                kept_docs, kept_frequencies = array("I"), array("H")
+                for doc, frequency in zip(docs, frequencies):
+                    new_doc = renumbered.get(doc)
+                    if new_doc is not None:  # Renumbering keeps postings sorted
+                        kept_docs.append(new_doc)
+                        kept_frequencies.append(frequency)
+                if kept_docs:
+                    postings[term] = (kept_docs, kept_frequencies)
+
+            self.doc_keys, self.doc_lengths, self.postings = doc_keys, doc_lengths, postings
+            self.total_length = sum(doc_lengths)
+            self.deleted = set()
+            self._champions = {}
+            for term, (docs, _) in postings.items():
+                if len(docs) > self.LONG_POSTINGS:
+                    self._champion_list(term)
+            return renumbered
+
+    def _champion_list(self, term: str) -> List[Tuple[float, int, int]]:
+        champions = self._champions.get(term)
+        if champions is None:
+            docs, frequencies = self.postings[term]
+            doc_lengths = self.doc_lengths
+            champions = heapq.nlargest(
+                self.CHAMPIONS,
+                ((self._static_weight(frequency, doc_lengths[doc]), doc, frequency)
+                 for doc, frequency in zip(docs, frequencies))
+            )
+            heapq.heapify(champions)
+            self._champions[term] = champions
+        return champions
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Any, float]]:
+        """Return up to `limit` (key, score) pairs, best first"""
+        terms = {term for term in tokenize(query) if term in self.postings}
+        with self._lock:
+            doc_count = self.live
+            if not terms or not doc_count:
+                return []
+            average_length = self.total_length / doc_count or 1.0
+            doc_lengths = self.doc_lengths
+            k1, b = self.K1, self.B
+
+            # Candidate documents: all postings of rare terms, champions of common ones
+            candidates = set()
+            common = []
+            for term in terms:
+                docs = self.postings[term][0]
+                if len(docs) > self.LONG_POSTINGS:
+                    candidates.update(doc for _, doc, _ in self._champion_list(term))
+                    common.append(docs)
+                else:
+                    candidates.update(docs)
+            # Champions are strong in one term; documents holding several common
+            # terms are found by intersecting the shortest of their postings with the rest
+            if len(common) > 1:
+                common.sort(key=len)
+                shortest, others = common[0], common[1:]
+                if len(shortest) <= self.MAX_INTERSECT:
+                    shortest = set(shortest)
+                    for docs in others:
+                        candidates.update(shortest.intersection(docs))
+            candidates -= self.deleted
+
+            scores: Dict[int, float] = dict.fromkeys(candidates, 0.0)
+            for term in terms:
+                docs, frequencies = self.postings[term]
+                idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+                if len(docs) <= 5 * len(candidates):
+                    matches = ((doc, frequency) for doc, frequency in zip(docs, frequencies) if doc in scores)
+                else:
+                    matches = self._lookup(term, candidates)
+                for doc, frequency in matches:
+                    norm = k1 * (1 - b + b * doc_lengths[doc] / average_length)
+                    scores[doc] += idf * frequency * (k1 + 1) / (frequency + norm)
+
+            # Ties go to the newest document
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+            return [(self.doc_keys[doc], score) for doc, score in best]
+
+    def _lookup(self, term: str, candidates):
+        """Yield (doc, frequency) for candidates containing a long-postings term"""
+        docs, frequencies = self.postings[term]
+        known = {doc: frequency for _, doc, frequency in self._champion_list(term)}
+        for doc in candidates:
+            frequency = known.get(doc)
+            if frequency is not None:
+                yield doc, frequency
+                continue
+            position = bisect_left(docs, doc)
+            if position < len(docs) and docs[position] == doc:
+                yield doc, frequencies[position]
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": 1,
+                "doc_keys": list(self.doc_keys),
+                "doc_lengths": self.doc_lengths.tolist(),
+                "deleted": sorted(self.deleted),
+                "postings": {
+                    term: [docs.tolist(), frequencies.tolist()]
+                    for term, (docs, frequencies) in self.postings.items()
+                },
+            }
+
+    def write(self, f: BinaryIO):
+        """Write a compact binary copy (a JSON header, then the raw arrays), for large indexes"""
+        # Copy under the lock, write without it, so searches are not held up by the disk
+        with self._lock:
+            chunks = self.binary()
+        for chunk in chunks:
+            f.write(chunk)
+
+    def binary(self) -> List[bytes]:
+        """The bytes write() stores, copied out of the index"""
+        terms = list(self.postings)
+        champion_terms = [term for term in terms if term in self._champions]
+        header = json.dumps({
+            "doc_keys": self.doc_keys,
+            "deleted": sorted(self.deleted),
+            "terms": terms,
+            "counts": [len(self.postings[term][0]) for term in terms],
+            "champion_terms": champion_terms,
+            "champion_counts": [len(self._champions[term]) for term in champion_terms],
+        }).encode()
+        chunks = [_MAGIC + struct.pack("<Q", len(header)) + header, self.doc_lengths.tobytes()]
+        chunks.extend(self.postings[term][0].tobytes() for term in terms)
+        chunks.extend(self.postings[term][1].tobytes() for term in terms)
+        # Champion heaps as parallel weight/doc/frequency arrays
+        champions = [entry for term in champion_terms for entry in self._champions[term]]
+        chunks.append(array("d", (weight for weight, _, _ in champions)).tobytes())
+        chunks.append(array("I", (doc for _, doc, _ in champions)).tobytes())
+        chunks.append(array("H", (frequency for _, _, frequency in champions)).tobytes())
+        return chunks
+
+    @classmethod
+    def read(cls, f: BinaryIO) -> "InvertedIndex":
+        """Load an index written by write()"""
+        if f.read(4) != _MAGIC:
+            raise ValueError("not a search index")
+        header = json.loads(f.read(struct.unpack("<Q", f.read(8))[0]))
+
+        def read_array(typecode: str, count: int) -> array:
+            values = array(typecode)
+            values.frombytes(f.read(values.itemsize * count))
+            return values
+
+        index = cls()
+        index.doc_keys = header["doc_keys"]
+        index.doc_lengths = read_array("I", len(index.doc_keys))
+        index.deleted = set(header["deleted"])
+        index.total_length = sum(index.doc_lengths) - sum(index.doc_lengths[doc] for doc in index.deleted)
+
+        counts = header["counts"]
+        all_docs = read_array("I", sum(counts))
+        all_frequencies = read_array("H", sum(counts))
+        offset = 0
+        for term, count in zip(header["terms"], counts):
+            index.postings[term] = (all_docs[offset:offset + count], all_frequencies[offset:offset + count])
+            offset += count
+
+        counts = header["champion_counts"]
+        weights, docs, frequencies = read_array("d", sum(counts)), read_array("I", sum(counts)), read_array("H", sum(counts))
+        offset = 0
+        for term, count in zip(header["champion_terms"], counts):
+            # Written in heap order, so still a valid heap
+            index._champions[term] = list(zip(weights[offset:offset + count], docs[offset:offset + count],
+                                              frequencies[offset:offset + count]))
+            offset += count
+        return index
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "InvertedIndex":
+        index = cls()
+        index.doc_keys = data["doc_keys"]
+        index.doc_lengths = array("I", data["doc_lengths"])
+        index.deleted = set(data.get("deleted", ()))
+        index.total_length = sum(index.doc_lengths) - sum(index.doc_lengths[doc] for doc in index.deleted)
+        index.postings = {
+            term: (array("I", docs), array("H", frequencies))
+            for term, (docs, frequencies) in data["postings"].items()
+        }
+        for term, (docs, _) in index.postings.items():
+            if len(docs) > cls.LONG_POSTINGS:
+                index._champion_list(term)
+        return index
+
+
+class NoteIndex:
+    """
+    Full-text index over notes, persisted next to them as notes.index.json
+
+    The saved index records how many notes it covers; on load any notes
+    added since (or after a crash) are indexed from the store's tail.
+    """
+
+    def __init__(self, data_dir: str):
+        self.path = os.path.join(data_dir, "notes.index.json")
+        self.index = InvertedIndex()
+        self._dirty = False
+
+    def load(self):
+        """Load the saved index, if any"""
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.index = InvertedIndex.from_dict(json.load(f))
+
+    def catch_up(self, notes: Iterable[Dict[str, Any]]):
+        """Index notes added after the saved index was written"""
+        for note in notes:
+            self.add(note)
+
+    def reset(self):
+        """Forget everything, e.g. after notes were rewritten wholesale"""
+        self.index = InvertedIndex()
+        self._dirty = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def covered(self) -> int:
+        """Number of notes (in insertion order) already indexed"""
+        return len(self.index)
+
+    def add(self, note: Dict[str, Any]):
+        self.index.add(note.get("id"), note.get("content", ""))
+        self._dirty = True
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Any, float]]:
+        return self.index.search(query, limit)
+
+    def save(self):
+        """Persist the index if it changed since it was loaded or saved"""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index.to_dict(), f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Multi-session server mode for the AI Task Agent
+
+Speaks newline-delimited JSON over TCP. Each request line is either
+{"session": "<id>", "input": "<text>"} or plain text; each reply line is
+{"session": "<id>", "response": "<text>"}. Without a session id, every
+connection is its own session.
+
+With --shards N, each session id is a separate user with its own data
+directory (<data-dir>/<session>), served by one of N worker processes
+(see tenants.py). Tenants idle past --idle-timeout are unloaded by a
+periodic sweep, and each loaded tenant's reminders fire in its worker.
+Without --shards, at most --max-sessions named sessions stay loaded; the
+least recently used idle one is closed to make room for a new one.
+
+Usage: python server.py [--host 127.0.0.1] [--port 8765] [--workers 16] [--data-dir data] [--search-dir DIR] [--metrics-port 9100]
+                        [--shards 4] [--idle-timeout 300] [--max-sessions 1024]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+
+import actions
+from main_agent import TaskAgent
+from metrics import metrics
+from tenants import ShardedAgentPool
+
+logger = logging.getLogger(__name__)
+
+
+class AgentServer:
+    """Hosts many concurrent TaskAgent sessions on one asyncio event loop"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, workers: int = 16,
+                 pool: Optional[ShardedAgentPool] = None, evict_interval: float = None,
+                 max_sessions: int = 1024):
+        self.host = host
+        self.port = port
+        # With a pool, sessions are tenants hosted by its worker processes
+        self.pool = pool
+        # Seconds between sweeps unloading idle tenants (default: half the pool's idle timeout, at most a minute)
+        self.evict_interval = evict_interval or (min(pool.idle_timeout / 2, 60.0) if pool is not None else None)
+        self._evictor: Optional[asyncio.Task] = None
+        # Loaded sessions in least recently used order, capped at max_sessions
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, TaskAgent]" = OrderedDict()
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        # Requests per session that are running or waiting for its lock
+        self._pending: Dict[str, int] = {}
+        self._connection_ids = itertools.count(1)
+        # Handlers block (disk, HTTP), so they run off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent")
+        self._server = None
+
+    def _session(self, session_id: str):
+        agent = self.sessions.get(session_id)
+        if agent is None:
+            self._evict_sessions(self.max_sessions - 1)
+            agent = self.sessions[session_id] = TaskAgent(session_id=session_id)
+            self._session_locks[session_id] = asyncio.Lock()
+        else:
+            self.sessions.move_to_end(session_id)
+        return agent, self._session_locks[session_id]
+
+    def _evict_sessions(self, keep: int):
+        """Close least recently used idle sessions until at most `keep` are loaded"""
+        idle = [session_id for session_id in self.sessions if not self._pending.get(session_id)]
+        for session_id in idle[:max(len(self.sessions) - keep, 0)]:
+            agent = self.sessions.pop(session_id)
+            self._session_locks.pop(session_id, None)
+            # Closing writes the session's history to disk, so it runs off the event loop
+            self._executor.submit(agent.close)
+
+    async def process(self, session_id: str, user_input: str) -> str:
+        """Handle one request; requests within a session run in order"""
+        if self.pool is not None:
+            return await asyncio.wrap_future(self.pool.submit(session_id, user_input))
+        agent, lock = self._session(session_id)
+        command = user_input.strip().lower()
+
+        self._pending[session_id] = self._pending.get(session_id, 0) + 1
+        try:
+            async with lock:
+                if command == "help":
+                    return agent.get_help()
+                # Status counts notes and reminders on disk, so it blocks like any handler
+                handler = agent.get_status if command == "status" else partial(agent.process_input, user_input)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, handler)
+        finally:
+            self._pending[session_id] -= 1
+            if not self._pending[session_id]:
+                del self._pending[session_id]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        default_session = f"conn-{next(self._connection_ids)}"
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+
+                if line.startswith("{"):
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        request = {"input": line}
+                else:
+                    request = {"input": line}
+                session_id = str(request.get("session") or default_session)
+                user_input = str(request.get("input", ""))
+
+                if self.pool is not None:
+                    response = await self.process(session_id, user_input)
+                elif user_input.strip().lower() in ["exit", "quit", "bye"]:
+                    response = "👋 Goodbye! Thanks for using the AI Task Agent!"
+                    agent = self.sessions.pop(session_id, None)
+                    self._session_locks.pop(session_id, None)
+                    if agent is not None:
+                        agent.close()
+                    await asyncio.get_running_loop().run_in_executor(self._executor, actions.flush)
+                else:
+                    response = await self.process(session_id, user_input)
+
+                writer.write(json.dumps({"session": session_id, "response": response}).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Error handling connection {default_session}: {e}")
+        finally:
+            writer.close()
+            # The connection's own session cannot be reached by any other connection
+            agent = self.sessions.pop(default_session, None)
+            self._session_locks.pop(default_session, None)
+            if agent is not None:
+                agent.close()
+
+    async def start(self):
+        """Start listening; the actual port is stored in self.port"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.pool is not None and self._evictor is None:
+            self._evictor = asyncio.create_task(self._evict_idle_loop())
+        logger.info(f"Agent server listening on {self.host}:{self.port}")
+
+    async def _evict_idle_loop(self):
+        """Unload idle tenants even on workers that receive no requests"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            try:
+                evicted = await loop.run_in_executor(self._executor, self.pool.evict_idle)
+                if evicted:
+                    logger.info(f"Unloaded {evicted} idle session(s)")
+            except Exception as e:
+                logger.error(f"Error unloading idle sessions: {e}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Stop accepting connections and release worker threads"""
+        if self._evictor is not None and not self._evictor.done():
+            self._evictor.cancel()
+        if self._server is not None:
+            self._server.close()
+        self._executor.shutdown(wait=True)
+        for agent in self.sessions.values():
+            agent.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AI Task Agent as a multi-session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=16, help="threads for blocking handlers")
+    parser.add_argument("--data-dir", help=f"data directory (default: ${actions.DATA_DIR_ENV} or data)")
+    parser.add_argument("--search-dir", help=f"documents to search (default: ${actions.SEARCH_DIR_ENV} or <data-dir>/documents)")
+    parser.add_argument("--files-dir", help=f"the only directory file operations may use (default: ${actions.FILES_DIR_ENV} or <data-dir>/files)")
+    parser.add_argument("--metrics-port", type=int, help="enable metrics and serve them at http://host:port/metrics")
+    parser.add_argument("--shards", type=int, help="give each session its own data and spread them over N processes")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds before an idle session is unloaded")
+    parser.add_argument("--max-sessions", type=int, default=1024, help="named sessions kept loaded without --shards")
+    args = parser.parse_args()
+    actions.configure(args.data_dir, args.search_dir, args.files_dir)
+    if args.metrics_port:
+        metrics.enable()
+        metrics.start_http_server(args.metrics_port, args.host)
+
+    pool = ShardedAgentPool(args.shards, idle_timeout=args.idle_timeout) if args.shards else None
+    server = AgentServer(args.host, args.port, args.workers, pool, max_sessions=args.max_sessions)
+    if pool is None:
+        scheduler = actions.reminder_manager.scheduler
+        scheduler.listeners.append(lambda reminder: logger.info(f"Reminder due: {reminder['text']}"))
+        scheduler.start()
+    print(f"🤖 AI Task Agent server on {args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped.")
+    finally:
+        server.close()
+        if pool is not None:
+            pool.close()
+        actions.shutdown()
+
+
+if __name__ == "__main__":
+    main()
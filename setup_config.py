@@ -5,10 +5,13 @@ Configuration setup script for AI Task Agent
 
 import json
 import os
-from actions import data_manager
+import sys
+from actions import get_data_manager, shutdown
+from storage import STORES
 
 def setup_weather_api():
     """Setup weather API configuration"""
+    data_manager = get_data_manager()
     print("🌤️  Weather API Setup")
     print("=" * 50)
     print("To get weather information, you need an OpenWeatherMap API key.")
@@ -30,6 +33,7 @@ def setup_weather_api():
 
 def setup_default_city():
     """Setup default city for weather"""
+    data_manager = get_data_manager()
     print("🏙️  Default City Setup")
     print("=" * 50)
     
@@ -49,13 +53,36 @@ def setup_default_city():
 
 def show_current_config():
     """Show current configuration"""
+    data_manager = get_data_manager()
     print("📋 Current Configuration")
     print("=" * 50)
     print(f"Data directory: {data_manager.data_dir}")
     print(f"Weather API key: {'Set' if data_manager.config.get('weather_api_key') else 'Not set'}")
     print(f"Default city: {data_manager.config.get('default_city', 'London')}")
-    print(f"Notes saved: {len(data_manager.notes)}")
-    print(f"Reminders active: {len([r for r in data_manager.reminders if not r['completed']])}")
+    print(f"Weather cache TTL: {data_manager.config.get('weather_cache_ttl', 600)}s")
+    print(f"Notes saved: {data_manager.count_notes()}")
+    print(f"Reminders active: {data_manager.count_reminders(completed=False)}")
+    print()
+
+def migrate_storage(backend: str = None):
+    """Migrate notes, reminders and config to another storage backend"""
+    data_manager = get_data_manager()
+    print("🗄️  Storage Migration")
+    print("=" * 50)
+    print(f"Current storage backend: {data_manager.storage}")
+    print(f"Available backends: {', '.join(STORES)}")
+    
+    if backend is None:
+        backend = input("Enter the backend to migrate to (or press Enter to cancel): ").strip().lower()
+    
+    if not backend or backend == data_manager.storage:
+        print(f"✅ Keeping current storage backend: {data_manager.storage}")
+    elif backend not in STORES:
+        print(f"❌ Unknown storage backend: {backend}")
+    else:
+        data_manager.migrate_storage(backend)
+        print(f"✅ Migrated {data_manager.count_notes()} notes and {data_manager.count_reminders()} reminders to {backend}")
+    
     print()
 
 def main():
@@ -69,10 +96,11 @@ def main():
         print("1. Setup Weather API")
         print("2. Setup Default City")
         print("3. Show Current Configuration")
-        print("4. Exit")
+        print("4. Migrate Storage Backend")
+        print("5. Exit")
         print()
         
-        choice = input("Enter your choice (1-4): ").strip()
+        choice = input("Enter your choice (1-5): ").strip()
         
         if choice == "1":
             setup_weather_api()
@@ -81,11 +109,18 @@ def main():
         elif choice == "3":
             show_current_config()
         elif choice == "4":
+            migrate_storage()
+        elif choice == "5":
             print("👋 Setup complete! Run 'python main_agent.py' to start the agent.")
             break
         else:
-            print("❌ Invalid choice. Please enter 1-4.")
+            print("❌ Invalid choice. Please enter 1-5.")
             print()
 
 if __name__ == "__main__":
-    main()
+    # Non-interactive migration: python setup_config.py migrate sqlite
+    if len(sys.argv) == 3 and sys.argv[1] == "migrate":
+        migrate_storage(sys.argv[2])
+    else:
+        main()
+    shutdown()
@@ -0,0 +1,118 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern
+
+from timeparse import parse_time_expression
+
+# Per intent: slot patterns tried in order (the first match supplies the
+# named groups), plus the slot, if any, whose text is scanned for a due time.
+SLOT_PATTERNS: Dict[str, Dict[str, Any]] = {
+    "weather": {
+        "patterns": [
+            r"\b(?:in|for|at)\s+(?P<city>[^\W\d_][\w .'-]*?)"
+            r"(?:\s+(?:today|tomorrow|tonight|now|right now|this week|please))*\s*[?.!]*$",
+        ],
+    },
+    "add_note": {
+        "patterns": [
+            r"^\s*(?:please\s+)?(?:add|create|save|make)\s+(?:a\s+)?(?:new\s+)?note\b\s*(?:that\s+)?[:,-]?\s*(?P<content>.*?)\s*$",
+            r"^\s*(?:please\s+)?(?:remember|note|jot down|write down)\b(?:\s+that)?\s*[:,-]?\s*(?P<content>.*?)\s*$",
+            r"^\s*(?P<content>.*?)\s*$",
+        ],
+    },
+    "search_notes": {
+        "patterns": [
+            r"\b(?:search|find)\s+(?:my\s+|the\s+)?notes\b\s*(?:for|about|mentioning|containing|with|on)?\s*[:,-]?\s*(?P<query>.*?)[\s?.!]*$",
+            r"\bnotes\s+(?:about|mentioning|containing)\s+(?P<query>.*?)[\s?.!]*$",
+        ],
+    },
+    "calculator": {
+        "patterns": [
+            r"(?P<expression>[-+(\s]*\d[\d\s.+\-*/()%]*)",
+        ],
+    },
+    "reminder": {
+        "patterns": [
+            r"\b(?P<list>show|list|display|view)\b(?=.*\b(?:reminders?|alarms?)\b)(?:.*?\b(?P<day>today|tomorrow)\b)?",
+            r"^\s*(?:please\s+)?(?:remind\s+me|set\s+(?:a\s+)?reminder|add\s+(?:a\s+)?reminder|reminder)\b"
+            r"(?:\s+(?:to|about|that))?\s*[:,-]?\s*(?P<text>.*?)[\s.!]*$",
+            r"^\s*(?P<text>.*?)[\s.!]*$",
+        ],
+        "time_from": "text",
+    },
+    "web_search": {
+        "patterns": [
+            r"^\s*(?:please\s+)?(?:search\s+(?:the\s+web\s+|online\s+)?for|find\s+information\s+(?:about|on)|"
+            r"find|look\s+up|google|what\s+is|who\s+is|information\s+about)\s+(?P<query>.*?)[\s?.!]*$",
+            r"^\s*(?P<query>.*?)[\s?.!]*$",
+        ],
+    },
+    "file_operation": {
+        "patterns": [
+            # "grep error in app.log", "grep for 'disk full' in logs/app.log page 2"
+            r"^\s*(?:please\s+)?(?P<operation>grep)\s+(?:for\s+)?['\"]?(?P<content>.+?)['\"]?\s+in\s+(?:the\s+)?(?:file\s+)?"
+            r"(?P<path>[^\s:]+?)(?:\s+page\s+(?P<page>\d+))?[\s?.!]*$",
+            # "tail 20 app.log", "show the last 20 lines of app.log"
+            r"^\s*(?:please\s+)?(?:(?:show|print|read|give)\s+(?:me\s+)?)?(?:the\s+)?(?P<operation>head|tail|first|last)\s+(?:-n\s*)?(?:(?P<count>\d+)\s+)?(?:lines?\s+)?(?:of\s+|in\s+|from\s+)?"
+            r"(?:the\s+)?(?:file\s+)?[:,-]?\s*(?P<path>[^\s:]+?)[\s?.!]*$",
+            r"\b(?P<operation>create|read|open|list|write|append|delete|grep)\b\s*(?:to\s+|from\s+)?(?:a\s+|the\s+)?"
+            r"(?:files?|folders?|director(?:y|ies))?\s*(?:in\s+)?[:,-]?\s*(?P<path>[^\s:]+)?(?:\s+page\s+(?P<page>\d+))?"
+            r"\s*(?::\s*(?P<content>.*?))?\s*$",
+        ],
+    },
+}
+
+
+class _CompiledSlots(NamedTuple):
+    patterns: List[Pattern]
+    time_from: Optional[str]
+
+
+class SlotExtractor:
+    """Pulls typed handler arguments (slots) out of an input for its intent"""
+
+    def __init__(self, slot_patterns: Dict[str, Dict[str, Any]] = None):
+        self._compiled: Dict[str, _CompiledSlots] = {}
+        self.version = 0  # Bumped by add(), so memoized slots can tell they are stale
+        for intent, spec in (slot_patterns or SLOT_PATTERNS).items():
+            self.add(intent, spec["patterns"], spec.get("time_from"))
+
+    def add(self, intent: str, patterns: List[str], time_from: str = None):
+        """Define (or replace) the slot patterns of an intent"""
+        self._compiled[intent] = _CompiledSlots(
+            patterns=[re.compile(pattern, re.IGNORECASE) for pattern in patterns],
+            time_from=time_from
+        )
+        self.version += 1
+
+    def extract(self, intent: str, user_input: str) -> Dict[str, Any]:
+        """
+        Slots for an input already classified as `intent`
+        Values keep the user's casing; a "due" datetime is added for
+        intents with a time slot. Unknown intents have no slots.
+        """
+        return self.resolve(intent, self.match(intent, user_input))
+
+    def match(self, intent: str, user_input: str) -> Dict[str, str]:
+        """The pattern slots alone: they depend only on the input, so they can be memoized"""
+        compiled = self._compiled.get(intent)
+        if compiled is None:
+            return {}
+        for pattern in compiled.patterns:
+            match = pattern.search(user_input)
+            if match:
+                return {name: value.strip() for name, value in match.groupdict().items() if value}
+        return {}
+
+    def resolve(self, intent: str, slots: Dict[str, str]) -> Dict[str, Any]:
+        """A copy of matched slots with the due time, which depends on the current time, parsed out"""
+        slots = dict(slots)
+        compiled = self._compiled.get(intent)
+        if compiled is not None and compiled.time_from and compiled.time_from in slots:
+            due, remaining = parse_time_expression(slots[compiled.time_from])
+            if due is not None:
+                slots["due"] = due
+                slots[compiled.time_from] = remaining
+        return slots
+
+
+slot_extractor = SlotExtractor()
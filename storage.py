@@ -0,0 +1,653 @@
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Collections managed by every store
+COLLECTIONS = ("notes", "reminders")
+
+# "always": fsync each file before renaming it into place; "never": leave it to the OS
+FSYNC_POLICIES = ("always", "never")
+
+
+def atomic_write_json(path: str, data: Any, indent: int = None, fsync: bool = True):
+    """Write JSON to a temp file, fsync it (optionally) and rename it over path"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Store(ABC):
+    """Interface implemented by every storage backend"""
+
+    @abstractmethod
+    def all(self, name: str) -> List[Dict[str, Any]]:
+        """Every item of a collection, in insertion order"""
+
+    @abstractmethod
+    def recent(self, name: str, limit: int) -> List[Dict[str, Any]]:
+        """The last `limit` items of a collection, oldest first"""
+
+    @abstractmethod
+    def find(self, name: str, **fields) -> List[Dict[str, Any]]:
+        """Items whose fields equal the given values, in insertion order"""
+
+    @abstractmethod
+    def get(self, name: str, item_id: Any) -> Optional[Dict[str, Any]]:
+        """The item with the given id, or None"""
+
+    @abstractmethod
+    def iterate(self, name: str, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Items from insertion position `start` onwards, without loading the rest"""
+
+    @abstractmethod
+    def count(self, name: str, **fields) -> int:
+        """Number of items whose fields equal the given values"""
+
+    @abstractmethod
+    def max_id(self, name: str) -> int:
+        """Largest integer id in a collection (0 when empty)"""
+
+    @abstractmethod
+    def add(self, name: str, item: Dict[str, Any]):
+        """Append an item"""
+
+    @abstractmethod
+    def update(self, name: str, item: Dict[str, Any]):
+        """Replace the stored item with the same id"""
+
+    @abstractmethod
+    def save(self, name: str, items: List[Dict[str, Any]]):
+        """Replace the whole collection"""
+
+    @abstractmethod
+    def load_config(self) -> Optional[Dict[str, Any]]:
+        """Stored configuration, or None if there is none yet"""
+
+    @abstractmethod
+    def save_config(self, config: Dict[str, Any]):
+        """Replace the stored configuration"""
+
+    def flush(self):
+        """Write any buffered changes to disk"""
+
+    def close(self):
+        """Release any resources held by the store"""
+
+
+class JsonFileStore(Store):
+    """
+    Keeps collections in memory and rewrites one JSON list per save
+
+    Files are replaced atomically (temp file plus rename). With write_delay
+    > 0 (group commit), a mutation only marks its collection dirty; a
+    background writer rewrites the dirty collections together write_delay
+    seconds after the first unwritten change, or as soon as write_batch
+    changes are pending. flush() (also run by close()) writes them now.
+    """
+
+    def __init__(self, data_dir: str, write_delay: float = 0.0, write_batch: int = 100, fsync: str = "always"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.data_dir = data_dir
+        self.config_file = os.path.join(data_dir, "config.json")
+        self.write_delay = write_delay
+        self.write_batch = write_batch
+        self.fsync = fsync
+        self._collections: Dict[str, List[Dict[str, Any]]] = {}
+        # name -> (list the map was built for, items covered, id -> position)
+        self._positions: Dict[str, Tuple[List[Dict[str, Any]], int, Dict[Any, int]]] = {}
+
+        # Group commit state: dirty collections and unwritten mutations
+        self.group_writes = 0
+        self._dirty = set()
+        self._unwritten = 0
+        self._writes = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._writer = None
+        self._stopping = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.data_dir, f"{name}.json")
+
+    def _read(self, name: str) -> List[Dict[str, Any]]:
+        path = self._path(name)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+        return []
+
+    def _write(self, name: str):
+        if self.write_delay <= 0:
+            self._write_file(name)
+            return
+        with self._writes:
+            self._dirty.add(name)
+            self._unwritten += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="json-writer", daemon=True)
+                self._writer.start()
+            if self._unwritten == 1 or self._unwritten >= self.write_batch:
+                self._writes.notify()
+
+    def _write_file(self, name: str):
+        # A shallow copy, so writers can keep appending while this one serializes
+        items = list(self._collections[name])
+        atomic_write_json(self._path(name), items, indent=2, fsync=self.fsync == "always")
+
+    def _writer_loop(self):
+        """Background thread writing dirty collections in groups"""
+        while True:
+            with self._writes:
+                while not self._dirty and not self._stopping:
+                    self._writes.wait()
+                if self._stopping:
+                    return
+                # Let more mutations join this group, up to write_batch of them
+                deadline = time.monotonic() + self.write_delay
+                while not self._stopping and self._unwritten < self.write_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._writes.wait(remaining)
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._writes:
+                dirty, self._dirty, self._unwritten = self._dirty, set(), 0
+            for name in sorted(dirty):
+                try:
+                    self._write_file(name)
+                except Exception as e:
+                    logger.error(f"Error writing {name}: {e}")
+                    with self._writes:
+                        self._dirty.add(name)  # Retried by the next group
+            if dirty:
+                self.group_writes += 1
+
+    def close(self):
+        """Stop the background writer and write everything still pending"""
+        with self._writes:
+            self._stopping = True
+            self._writes.notify()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    def _collection(self, name: str) -> List[Dict[str, Any]]:
+        items = self._collections.get(name)
+        if items is None:
+            items = self._collections[name] = self._read(name)
+        return items
+
+    def all(self, name: str) -> List[Dict[str, Any]]:
+        return self._collection(name)
+
+    def recent(self, name: str, limit: int) -> List[Dict[str, Any]]:
+        return self._collection(name)[-limit:]
+
+    def find(self, name: str, **fields) -> List[Dict[str, Any]]:
+        return [
+            item for item in self._collection(name)
+            if all(item.get(field) == value for field, value in fields.items())
+        ]
+
+    def count(self, name: str, **fields) -> int:
+        if not fields:
+            return len(self._collection(name))
+        return len(self.find(name, **fields))
+
+    def max_id(self, name: str) -> int:
+        return max((item.get("id") for item in self._collection(name) if isinstance(item.get("id"), int)), default=0)
+
+    def get(self, name: str, item_id: Any) -> Optional[Dict[str, Any]]:
+        items = self._collection(name)
+        built_for, covered, positions = self._positions.get(name, (None, 0, None))
+        if built_for is not items:
+            covered, positions = 0, {}
+        # Items are only ever appended, so extend the map with the new tail
+        for index in range(covered, len(items)):
+            positions[items[index].get("id")] = index
+        self._positions[name] = (items, len(items), positions)
+
+        index = positions.get(item_id)
+        return items[index] if index is not None else None
+
+    def iterate(self, name: str, start: int = 0) -> Iterator[Dict[str, Any]]:
+        return itertools.islice(self._collection(name), start, None)
+
+    def add(self, name: str, item: Dict[str, Any]):
+        self._collection(name).append(item)
+        self._write(name)
+
+    def update(self, name: str, item: Dict[str, Any]):
+        items = self._collection(name)
+        for index in range(len(items) - 1, -1, -1):
+            if items[index].get("id") == item.get("id"):
+                items[index] = item
+                break
+        self._write(name)
+
+    def save(self, name: str, items: List[Dict[str, Any]]):
+        self._collections[name] = items
+        self._write(name)
+
+    def load_config(self) -> Optional[Dict[str, Any]]:
+        if os.path.exists(self.config_file):
+            with open(self.config_file, 'r') as f:
+                return json.load(f)
+        return None
+
+    def save_config(self, config: Dict[str, Any]):
+        atomic_write_json(self.config_file, config, indent=2, fsync=self.fsync == "always")
+
+
+class JournalStore(JsonFileStore):
+    """
+    Appends one JSONL record per mutation and compacts into a snapshot
+
+    Each collection lives in <name>.snapshot.json ({"seq": n, "items": [...]})
+    plus <name>.journal.jsonl. Every journal record carries a sequence number;
+    on load the snapshot is replayed first and only records newer than its
+    seq are applied, so a crash at any point during compaction is safe.
+    """
+
+    def __init__(self, data_dir: str, compact_every: int = 1000, compact_interval: float = 30.0):
+        super().__init__(data_dir)
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._seq: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._journals: Dict[str, Any] = {}
+
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._compactor = None
+
+    def _snapshot_path(self, name: str) -> str:
+        return os.path.join(self.data_dir, f"{name}.snapshot.json")
+
+    def _journal_path(self, name: str) -> str:
+        return os.path.join(self.data_dir, f"{name}.journal.jsonl")
+
+    def _collection(self, name: str) -> List[Dict[str, Any]]:
+        items = self._collections.get(name)
+        if items is None:
+            items = self._load(name)
+        return items
+
+    def _load(self, name: str) -> List[Dict[str, Any]]:
+        """Replay the snapshot and then the journal, migrating a legacy JSON file first"""
+        with self._lock:
+            if name in self._collections:
+                return self._collections[name]
+
+            snapshot_path = self._snapshot_path(name)
+            legacy_path = self._path(name)
+
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, 'r') as f:
+                    snapshot = json.load(f)
+                items, seq = snapshot["items"], snapshot["seq"]
+            elif os.path.exists(legacy_path):
+                items, seq = self._read(name), 0
+                atomic_write_json(snapshot_path, {"seq": seq, "items": items})
+                os.replace(legacy_path, f"{legacy_path}.migrated")
+                logger.info(f"Migrated {legacy_path} to journal storage")
+            else:
+                items, seq = [], 0
+
+            seq, replayed = self._replay(name, items, seq)
+
+            self._collections[name] = items
+            self._seq[name] = seq
+            self._pending[name] = replayed
+            self._journals[name] = open(self._journal_path(name), 'a')
+            self._start_compactor()
+            return items
+
+    def _replay(self, name: str, items: List[Dict[str, Any]], seq: int):
+        """Apply journal records newer than seq to items"""
+        journal_path = self._journal_path(name)
+        if not os.path.exists(journal_path):
+            return seq, 0
+
+        positions = {item.get("id"): index for index, item in enumerate(items)}
+        replayed = 0
+        valid_length = 0
+        for line, record in _journal_records(journal_path):
+            valid_length += len(line)
+            if record is None or record["seq"] <= seq:
+                continue
+
+            item = record["item"]
+            if record["op"] == "add":
+                positions[item.get("id")] = len(items)
+                items.append(item)
+            elif record["op"] == "update" and item.get("id") in positions:
+                items[positions[item.get("id")]] = item
+            seq = record["seq"]
+            replayed += 1
+
+        if valid_length != os.path.getsize(journal_path):
+            logger.warning(f"Truncating torn record at the end of {journal_path}")
+            with open(journal_path, 'r+b') as f:
+                f.truncate(valid_length)
+        return seq, replayed
+
+    def _append(self, name: str, op: str, item: Dict[str, Any]):
+        with self._lock:
+            seq = self._seq[name] + 1
+            journal = self._journals[name]
+            journal.write(json.dumps({"seq": seq, "op": op, "item": item}) + "\n")
+            journal.flush()
+            self._seq[name] = seq
+            self._pending[name] += 1
+            if self._pending[name] >= self.compact_every:
+                self._wakeup.set()
+
+    def add(self, name: str, item: Dict[str, Any]):
+        with self._lock:
+            self._collection(name).append(item)
+            self._append(name, "add", item)
+
+    def update(self, name: str, item: Dict[str, Any]):
+        with self._lock:
+            items = self._collection(name)
+            for index in range(len(items) - 1, -1, -1):
+                if items[index].get("id") == item.get("id"):
+                    items[index] = item
+                    break
+            self._append(name, "update", item)
+
+    def save(self, name: str, items: List[Dict[str, Any]]):
+        """Replace the collection by compacting it immediately"""
+        with self._lock:
+            self._collection(name)
+            self._collections[name] = items
+        self.compact(name)
+
+    def compact(self, name: str):
+        """Write a fresh snapshot and drop the journal records it covers"""
+        with self._compact_lock:
+            self._compact(name)
+
+    def _compact(self, name: str):
+        with self._lock:
+            if name not in self._collections:
+                return
+            seq = self._seq[name]
+            payload = json.dumps({"seq": seq, "items": self._collections[name]})
+
+        # The slow part happens outside the lock; writers keep appending
+        snapshot_path = self._snapshot_path(name)
+        tmp_path = f"{snapshot_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, snapshot_path)
+
+        with self._lock:
+            # Keep only records appended while the snapshot was being written
+            journal_path = self._journal_path(name)
+            self._journals[name].close()
+            try:
+                tail = [line for line, record in _journal_records(journal_path)
+                        if record is not None and record["seq"] > seq]
+                with open(f"{journal_path}.tmp", 'wb') as f:
+                    f.writelines(tail)
+                os.replace(f"{journal_path}.tmp", journal_path)
+                self._pending[name] = len(tail)
+            finally:
+                # Appends must keep working even if the rewrite failed
+                self._journals[name] = open(journal_path, 'a')
+
+    def _start_compactor(self):
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def _compact_loop(self):
+        """Background thread compacting collections whose journal grew too long"""
+        while not self._closed:
+            self._wakeup.wait(self.compact_interval)
+            self._wakeup.clear()
+            for name in list(self._collections):
+                if self._closed:
+                    break
+                if self._pending.get(name, 0) >= self.compact_every:
+                    try:
+                        self.compact(name)
+                    except Exception as e:
+                        logger.error(f"Error compacting {name}: {e}")
+
+    def flush(self):
+        """Push appended journal records to disk"""
+        with self._lock:
+            for journal in self._journals.values():
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def close(self):
+        """Stop the compactor and close the journal files"""
+        self._closed = True
+        self._wakeup.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            for journal in self._journals.values():
+                journal.close()
+            self._journals.clear()
+
+
+def _journal_records(journal_path: str) -> Iterator[Tuple[bytes, Optional[Dict[str, Any]]]]:
+    """(line, record) for each complete journal line; record is None when the line is corrupt"""
+    with open(journal_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # Torn final line from a crash mid-append
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict) or not isinstance(record.get("seq"), int):
+                logger.warning(f"Skipping corrupt journal record in {journal_path}")
+                record = None
+            yield line, record
+
+
+class SqliteStore(Store):
+    """
+    Stores collections in a SQLite database (data/agent.db)
+
+    Each item is kept as a JSON blob next to indexed copies of the fields
+    that are queried, so recent notes and active reminders never need a
+    full scan or the whole history in memory.
+    """
+
+    # Indexed columns per collection, keyed by item field
+    COLUMNS = {
+        "notes": {"id": "id", "created_at": "created_at"},
+        "reminders": {"id": "id", "created_at": "created_at", "completed": "completed", "time": "due_time"},
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS notes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_notes_id ON notes (id);
+        CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes (created_at);
+
+        CREATE TABLE IF NOT EXISTS reminders (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER,
+            created_at TEXT,
+            completed INTEGER NOT NULL DEFAULT 0,
+            due_time TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reminders_id ON reminders (id);
+        CREATE INDEX IF NOT EXISTS idx_reminders_created_at ON reminders (created_at);
+        CREATE INDEX IF NOT EXISTS idx_reminders_completed ON reminders (completed, seq);
+        CREATE INDEX IF NOT EXISTS idx_reminders_due_time ON reminders (due_time);
+
+        CREATE TABLE IF NOT EXISTS config (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, data_dir: str, filename: str = "agent.db"):
+        self.data_dir = data_dir
+        self.db_file = os.path.join(data_dir, filename)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _columns(self, name: str) -> Dict[str, str]:
+        if name not in self.COLUMNS:
+            raise ValueError(f"Unknown collection: {name}")
+        return self.COLUMNS[name]
+
+    def _where(self, name: str, fields: Dict[str, Any]):
+        columns = self._columns(name)
+        clauses, params = [], []
+        for field, value in fields.items():
+            if field not in columns:
+                raise ValueError(f"Field '{field}' of {name} is not indexed")
+            clauses.append(f"{columns[field]} = ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _row(self, name: str, item: Dict[str, Any]) -> List[Any]:
+        return [item.get(field) for field in self._columns(name)] + [json.dumps(item)]
+
+    def _insert_sql(self, name: str) -> str:
+        columns = list(self._columns(name).values()) + ["data"]
+        placeholders = ", ".join("?" for _ in columns)
+        return f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def all(self, name: str) -> List[Dict[str, Any]]:
+        self._columns(name)
+        return self._query(f"SELECT data FROM {name} ORDER BY seq")
+
+    def recent(self, name: str, limit: int) -> List[Dict[str, Any]]:
+        self._columns(name)
+        items = self._query(f"SELECT data FROM {name} ORDER BY seq DESC LIMIT ?", (limit,))
+        items.reverse()
+        return items
+
+    def find(self, name: str, **fields) -> List[Dict[str, Any]]:
+        where, params = self._where(name, fields)
+        return self._query(f"SELECT data FROM {name}{where} ORDER BY seq", params)
+
+    def max_id(self, name: str) -> int:
+        self._columns(name)
+        with self._lock:
+            return self._conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {name}").fetchone()[0]
+
+    def get(self, name: str, item_id: Any) -> Optional[Dict[str, Any]]:
+        items = self.find(name, id=item_id)
+        return items[0] if items else None
+
+    def iterate(self, name: str, start: int = 0, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        self._columns(name)
+        last_seq = None
+        while True:
+            # Keyset pagination: one OFFSET to find the start, then seq > last
+            with self._lock:
+                if last_seq is None:
+                    rows = self._conn.execute(
+                        f"SELECT seq, data FROM {name} ORDER BY seq LIMIT ? OFFSET ?", (batch_size, start)
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        f"SELECT seq, data FROM {name} WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+                    ).fetchall()
+            for seq, data in rows:
+                yield json.loads(data)
+            if len(rows) < batch_size:
+                return
+            last_seq = rows[-1][0]
+
+    def count(self, name: str, **fields) -> int:
+        where, params = self._where(name, fields)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {name}{where}", params).fetchone()[0]
+
+    def add(self, name: str, item: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(self._insert_sql(name), self._row(name, item))
+
+    def update(self, name: str, item: Dict[str, Any]):
+        columns = list(self._columns(name).values()) + ["data"]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE {name} SET {assignments} WHERE id = ?",
+                self._row(name, item) + [item.get("id")]
+            )
+
+    def save(self, name: str, items: List[Dict[str, Any]]):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {name}")
+            self._conn.executemany(self._insert_sql(name), [self._row(name, item) for item in items])
+
+    def load_config(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM config").fetchall()
+        if not rows:
+            return None
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_config(self, config: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM config")
+            self._conn.executemany(
+                "INSERT INTO config (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in config.items()]
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+STORES = {
+    "json": JsonFileStore,
+    "journal": JournalStore,
+    "sqlite": SqliteStore,
+}
+
+
+def create_store(backend: str, data_dir: str, **options) -> Store:
+    """Create the storage backend named in config ("json", "journal" or "sqlite")"""
+    if backend not in STORES:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return STORES[backend](data_dir, **options)
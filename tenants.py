@@ -0,0 +1,383 @@
+"""
+Per-user (tenant) agents, sharded across worker processes
+
+Each user gets their own DataManager and ReminderManager rooted at
+<root>/<user id> (root defaults to <data dir>/users), their own file
+workspace at <files dir>/<user id>, plus their own TaskAgent and
+conversation history. The weather service, calculator and document index
+are shared by all users and read the shared config.json. A Tenant's
+services are picked up by the action handlers through
+actions.activate_tenant(), so handlers need no user argument.
+
+ShardedAgentPool spreads users over single-process workers by consistent
+hashing on the user id: a user's requests always reach the same worker,
+in order, so their state lives in exactly one process. Workers drop the
+state of tenants idle longer than idle_timeout (it is reloaded from disk
+on their next request). Each loaded tenant's reminders fire from its own
+scheduler thread; reminders that fell due while a tenant was unloaded
+fire as soon as it is loaded again.
+
+Workers are started with the forkserver (or spawn) method, so they
+inherit no module state: the data, search and file directories are
+passed to them explicitly.
+"""
+
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import actions
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EXIT_COMMANDS = ("exit", "quit", "bye")
+
+# Names of shared entries in a data directory, never used as a tenant's directory
+RESERVED_NAMES = ("", ".", "..", "files", "documents", "history", "users")
+
+
+def tenant_dirname(user_id: str) -> str:
+    """A directory name for a user id; ids that needed escaping or are reserved get a hash suffix"""
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)
+    if safe != user_id or safe.lower() in RESERVED_NAMES:
+        safe = f"{safe}-{zlib.crc32(user_id.encode()):08x}"
+    return safe
+
+
+def _contains(parent: str, path: str) -> bool:
+    """Whether path is parent or inside it (both absolute)"""
+    return os.path.commonpath([parent, path]) == parent
+
+
+class Tenant:
+    """One user's services, agent and conversation history"""
+
+    def __init__(self, user_id: str, data_dir: str, history_size: int = 1000, fire_reminders: bool = False):
+        self.user_id = user_id
+        self.dirname = tenant_dirname(user_id)
+        self.data_dir = data_dir
+        self.history_size = history_size
+        self.fire_reminders = fire_reminders
+        self.last_used = time.monotonic()
+        self._services: Dict[str, Any] = {}
+        self._agent = None
+        self._reminders_started = False
+        self._lock = threading.RLock()
+
+    def service(self, name: str, factory: Callable[[], Any]) -> Any:
+        """This tenant's instance of a service (built on first use, with the tenant active)"""
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    token = actions.activate_tenant(self)
+                    try:
+                        service = self._services[name] = factory()
+                    finally:
+                        actions.deactivate_tenant(token)
+        return service
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            from main_agent import TaskAgent
+            token = actions.activate_tenant(self)
+            try:
+                self._agent = TaskAgent(session_id=self.dirname, history_size=self.history_size)
+            finally:
+                actions.deactivate_tenant(token)
+        return self._agent
+
+    def handle(self, user_input: str) -> str:
+        """Answer one request as the agent's interactive loop would"""
+        self.last_used = time.monotonic()
+        command = user_input.strip().lower()
+        token = actions.activate_tenant(self)
+        try:
+            if self.fire_reminders:
+                self._start_reminders()
+            if command == "help":
+                return self.agent.get_help()
+            if command == "status":
+                return self.agent.get_status()
+            return self.agent.process_input(user_input)
+        finally:
+            actions.deactivate_tenant(token)
+
+    def _start_reminders(self):
+        """Start this tenant's reminder scheduler (the tenant must be active)"""
+        if self._reminders_started:
+            return
+        with self._lock:
+            if self._reminders_started:
+                return
+            scheduler = actions.get_reminder_manager().scheduler
+            scheduler.listeners.append(lambda reminder: logger.info(f"Reminder due for {self.user_id}: {reminder['text']}"))
+            scheduler.start()
+            self._reminders_started = True
+
+    def close(self):
+        """Flush history and storage, and stop the reminder scheduler"""
+        with self._lock:
+            if self._agent is not None:
+                self._agent.close()
+                self._agent = None
+            reminder_manager = self._services.pop("reminder_manager", None)
+            if reminder_manager is not None:
+                reminder_manager.scheduler.stop()
+            self._reminders_started = False
+            self._services.pop("file_workspace", None)
+            data_manager = self._services.pop("data_manager", None)
+            if data_manager is not None:
+                data_manager.close()
+
+
+class TenantRegistry:
+    """The tenants hosted by one process, least recently used first"""
+
+    def __init__(self, root: str, idle_timeout: float = 300.0, max_tenants: int = 1000,
+                 history_size: int = 1000, fire_reminders: bool = False):
+        self.root = root
+        self.idle_timeout = idle_timeout
+        self.max_tenants = max_tenants
+        self.history_size = history_size
+        self.fire_reminders = fire_reminders
+        self.evicted = 0
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def get(self, user_id: str) -> Tenant:
+        with self._lock:
+            tenant = self._tenants.get(user_id)
+            if tenant is None:
+                tenant = self._tenants[user_id] = Tenant(
+                    user_id, os.path.join(self.root, tenant_dirname(user_id)), self.history_size, self.fire_reminders)
+            else:
+                self._tenants.move_to_end(user_id)
+            tenant.last_used = time.monotonic()
+        return tenant
+
+    def handle(self, user_id: str, user_input: str) -> str:
+        """Route one request to its tenant; exit commands close the tenant"""
+        self.evict_idle()
+        if user_input.strip().lower() in EXIT_COMMANDS:
+            self.close_tenant(user_id)
+            return "👋 Goodbye! Thanks for using the AI Task Agent!"
+        return self.get(user_id).handle(user_input)
+
+    def evict_idle(self, now: float = None) -> int:
+        """Close tenants idle past idle_timeout (and the oldest beyond max_tenants)"""
+        now = time.monotonic() if now is None else now
+        evicted: List[Tenant] = []
+        with self._lock:
+            # Least recently used first, so stop at the first tenant still in use
+            while self._tenants:
+                user_id, tenant = next(iter(self._tenants.items()))
+                if now - tenant.last_used < self.idle_timeout and len(self._tenants) <= self.max_tenants:
+                    break
+                del self._tenants[user_id]
+                evicted.append(tenant)
+        for tenant in evicted:
+            self._close(tenant)
+        self.evicted += len(evicted)
+        return len(evicted)
+
+    def close_tenant(self, user_id: str):
+        with self._lock:
+            tenant = self._tenants.pop(user_id, None)
+        if tenant is not None:
+            self._close(tenant)
+
+    def _close(self, tenant: Tenant):
+        try:
+            tenant.close()
+        except Exception as e:
+            logger.error(f"Error closing tenant {tenant.user_id}: {e}")
+
+    def close(self):
+        with self._lock:
+            tenants = list(self._tenants.values())
+            self._tenants.clear()
+        for tenant in tenants:
+            self._close(tenant)
+
+    def stats(self) -> Dict[str, int]:
+        return {"tenants": len(self._tenants), "evicted": self.evicted}
+
+
+class HashRing:
+    """Consistent hashing of keys onto nodes, with virtual nodes for balance"""
+
+    def __init__(self, nodes: Iterable[Any] = (), replicas: int = 100):
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._nodes: List[Any] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Stable across processes and runs, unlike hash()
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def add(self, node: Any):
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            position = bisect.bisect_left(self._hashes, point)
+            self._hashes.insert(position, point)
+            self._nodes.insert(position, node)
+
+    def remove(self, node: Any):
+        keep = [(point, owner) for point, owner in zip(self._hashes, self._nodes) if owner != node]
+        self._hashes = [point for point, _ in keep]
+        self._nodes = [owner for _, owner in keep]
+
+    def node(self, key: str) -> Any:
+        """The node owning key: the first virtual node clockwise from its hash"""
+        if not self._nodes:
+            raise LookupError("hash ring is empty")
+        position = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[position]
+
+
+# Worker-process side of ShardedAgentPool
+_worker_tenants: Optional[TenantRegistry] = None
+
+
+def _init_worker(settings: Dict[str, Any]):
+    """Configure a freshly started worker process; it shares no state with the parent"""
+    global _worker_tenants
+    actions.configure(settings["data_dir"], settings["search_dir"], settings["files_dir"])
+    if settings["metrics"]:
+        metrics.enable()
+    import main_agent  # noqa: F401  (import once, up front, rather than on the first request)
+    if settings["log_level"] is not None:
+        logging.getLogger().setLevel(settings["log_level"])
+    _worker_tenants = TenantRegistry(settings["root"], settings["idle_timeout"], settings["max_tenants"],
+                                     settings["history_size"], settings["fire_reminders"])
+
+
+def _worker_handle(user_id: str, user_input: str) -> str:
+    return _worker_tenants.handle(user_id, user_input)
+
+
+def _worker_handle_many(requests: List[Tuple[str, str]]) -> List[str]:
+    return [_worker_tenants.handle(user_id, user_input) for user_id, user_input in requests]
+
+
+def _worker_evict_idle() -> int:
+    return _worker_tenants.evict_idle()
+
+
+def _worker_stats() -> Dict[str, int]:
+    return {"pid": os.getpid(), **_worker_tenants.stats()}
+
+
+def _worker_close():
+    _worker_tenants.close()
+    actions.shutdown()
+
+
+class ShardedAgentPool:
+    """Routes each user's requests to one of `workers` processes by consistent hashing"""
+
+    def __init__(self, workers: int = None, root: str = None, idle_timeout: float = 300.0,
+                 max_tenants: int = 1000, history_size: int = 1000, log_level: int = None,
+                 fire_reminders: bool = True):
+        data_dir = os.path.abspath(actions.get_data_dir())
+        search_dir = os.path.abspath(actions.get_search_dir())
+        files_dir = os.path.abspath(actions.get_files_dir())
+        self.root = os.path.abspath(root or os.path.join(data_dir, "users"))
+        # A user directory must never be (or hold) shared data
+        if _contains(self.root, data_dir) or any(_contains(self.root, shared) or _contains(shared, self.root)
+                                                 for shared in (search_dir, files_dir)):
+            raise ValueError(f"User directory root {self.root} overlaps the shared data, search or files directory")
+        self.idle_timeout = idle_timeout
+        os.makedirs(self.root, exist_ok=True)
+        count = workers or os.cpu_count() or 1
+        # Everything a worker needs, since forkserver/spawn workers start from a clean interpreter
+        settings = {
+            "root": self.root,
+            "data_dir": data_dir,
+            "search_dir": search_dir,
+            "files_dir": files_dir,
+            "metrics": metrics.enabled,
+            "log_level": log_level,
+            "idle_timeout": idle_timeout,
+            "max_tenants": max_tenants,
+            "history_size": history_size,
+            "fire_reminders": fire_reminders,
+        }
+        # Forking a parent that already runs threads (schedulers, writers,
+        # the event loop's executor) can copy held locks into the child
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        # One single-process executor per shard: a user's requests queue, in
+        # order, on the one process holding their state
+        self._workers = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(settings,))
+            for _ in range(count)
+        ]
+        self.ring = HashRing(range(count))
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    def shard(self, user_id: str) -> int:
+        return self.ring.node(user_id)
+
+    def submit(self, user_id: str, user_input: str) -> Future:
+        """Future of the agent's response to one request"""
+        return self._workers[self.shard(user_id)].submit(_worker_handle, user_id, user_input)
+
+    def process(self, user_id: str, user_input: str) -> str:
+        return self.submit(user_id, user_input).result()
+
+    def process_many(self, requests: Iterable[Tuple[str, str]]) -> List[str]:
+        """Responses to (user id, input) pairs, in order; one round trip per shard"""
+        requests = list(requests)
+        by_shard: Dict[int, List[int]] = {}
+        for position, (user_id, _) in enumerate(requests):
+            by_shard.setdefault(self.shard(user_id), []).append(position)
+        futures = {
+            shard: self._workers[shard].submit(_worker_handle_many, [requests[i] for i in positions])
+            for shard, positions in by_shard.items()
+        }
+        responses: List[Optional[str]] = [None] * len(requests)
+        for shard, positions in by_shard.items():
+            for position, response in zip(positions, futures[shard].result()):
+                responses[position] = response
+        return responses
+
+    def evict_idle(self) -> int:
+        """Ask every worker to drop idle tenants; returns how many were dropped"""
+        return sum(future.result() for future in [worker.submit(_worker_evict_idle) for worker in self._workers])
+
+    def stats(self) -> List[Dict[str, int]]:
+        """Per worker: pid, tenants in memory, tenants evicted so far"""
+        return [future.result() for future in [worker.submit(_worker_stats) for worker in self._workers]]
+
+    def close(self):
+        """Flush every tenant and stop the workers"""
+        for future in [worker.submit(_worker_close) for worker in self._workers]:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error closing worker: {e}")
+        for worker in self._workers:
+            worker.shutdown(wait=True)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import actions
+
+
+def _reset_services():
+    actions.shutdown()
+    for name in actions._SERVICES:
+        actions.__dict__.pop(name, None)
+    actions.response_cache.clear()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Handlers use fresh services in a temporary data directory"""
+    _reset_services()
+    actions.configure(str(tmp_path))
+    yield tmp_path
+    _reset_services()
+    actions.configure()
@@ -0,0 +1,134 @@
+import io
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+import actions
+from intents import intent_detector
+from main_agent import TaskAgent, run_batch
+
+NOT_CONFIDENT = "not very confident"
+
+
+@pytest.fixture
+def agent(data_dir):
+    agent = TaskAgent(session_id="test")
+    yield agent
+    agent.close()
+
+
+@pytest.mark.parametrize("text", ["show reminders due today", "list reminders", "show my reminders",
+                                  "display reminders due tomorrow"])
+def test_reminder_listings_are_routed(agent, text):
+    intent, confidence, response = agent.process(text)
+    assert intent == "reminder"
+    assert NOT_CONFIDENT not in response
+
+
+def test_reminders_due_today_lists_only_today(agent):
+    if (datetime.now() + timedelta(minutes=21)).date() != datetime.now().date():
+        pytest.skip("too close to midnight")
+    agent.process_input("remind me to stretch in 20 minutes")
+    agent.process_input("remind me to call the bank tomorrow 9am")
+    response = agent.process_input("show reminders due today")
+    assert "stretch" in response
+    assert "call the bank" not in response
+
+
+# Every example in get_help, with its intent and (some of) its slots
+HELP_EXAMPLES = {
+    "What's the weather in London?": ("weather", {"city": "London"}),
+    "Weather forecast for New York": ("weather", {"city": "New York"}),
+    "How's the weather today?": ("weather", {}),
+    "Add note: Buy groceries": ("add_note", {"content": "Buy groceries"}),
+    "Remember: Call mom tomorrow": ("add_note", {"content": "Call mom tomorrow"}),
+    "Show my notes": ("show_notes", {}),
+    "Search notes for groceries": ("search_notes", {"query": "groceries"}),
+    "What is 15 + 27?": ("calculator", {"expression": "15 + 27"}),
+    "Calculate 100 / 4": ("calculator", {"expression": "100 / 4"}),
+    "2 * 3 + 5": ("calculator", {"expression": "2 * 3 + 5"}),
+    "Remind me to check email": ("reminder", {"text": "check email"}),
+    "Set reminder: Doctor appointment tomorrow 9am": ("reminder", {"text": "Doctor appointment"}),
+    "Remind me to stretch in 20 minutes": ("reminder", {"text": "stretch"}),
+    "Show reminders": ("reminder", {"list": "Show"}),
+    "Search for Python tutorials": ("web_search", {"query": "Python tutorials"}),
+    "Find information about AI": ("web_search", {"query": "AI"}),
+    "Look up machine learning": ("web_search", {"query": "machine learning"}),
+    "Create file: notes.txt": ("file_operation", {"operation": "Create", "path": "notes.txt"}),
+    "Read file: config.json": ("file_operation", {"operation": "Read", "path": "config.json"}),
+    "Last 20 lines of app.log": ("file_operation", {"operation": "Last", "count": "20", "path": "app.log"}),
+    "First 5 lines of app.log": ("file_operation", {"operation": "First", "count": "5", "path": "app.log"}),
+    "Grep error in app.log": ("file_operation", {"operation": "Grep", "content": "error", "path": "app.log"}),
+    "Append to notes.txt: call mom": ("file_operation", {"path": "notes.txt", "content": "call mom"}),
+}
+
+
+def help_examples(agent):
+    return [example for line in agent.get_help().splitlines() if line.strip().startswith("- ")
+            for example in re.findall(r'"([^"]+)"', line) if example != "page 2"]
+
+
+def test_help_examples_are_all_covered(agent):
+    assert sorted(help_examples(agent)) == sorted(HELP_EXAMPLES)
+
+
+@pytest.mark.parametrize("example", sorted(HELP_EXAMPLES))
+def test_help_example(agent, example):
+    expected_intent, expected_slots = HELP_EXAMPLES[example]
+    intent, confidence, slots = intent_detector.parse(example)
+    assert intent == expected_intent
+    assert confidence >= 0.3
+    assert {name: slots.get(name) for name in expected_slots} == expected_slots
+    if expected_intent == "reminder" and ("tomorrow" in example or "minutes" in example):
+        assert slots.get("due") is not None
+
+    response = agent.process_input(example)
+    assert NOT_CONFIDENT not in response
+    assert "encountered an error" not in response
+
+
+def test_misspelled_request_is_answered(agent):
+    intent, confidence, response = agent.process("wether in paris")
+    assert intent == "weather"
+    assert NOT_CONFIDENT not in response
+
+
+def test_status_does_not_start_the_weather_service(agent):
+    assert "Weather cache: not used yet" in agent.get_status()
+    assert actions.started_service("weather_service") is None
+
+    actions.get_weather_service()
+    assert "Weather cache: 0 hits, 0 misses (0% hit rate), 0 coalesced" in agent.get_status()
+
+
+class _Recorder(io.StringIO):
+    """Output that notes how many input lines had been read at each write"""
+
+    def __init__(self, consumed):
+        super().__init__()
+        self.consumed = consumed
+        self.read_ahead = []
+
+    def write(self, text):
+        self.read_ahead.append(self.consumed[0] - json.loads(text)["line"])
+        return super().write(text)
+
+
+def test_batch_results_keep_input_order_with_bounded_read_ahead(agent):
+    consumed = [0]
+
+    def lines():
+        for number in range(200):
+            consumed[0] += 1
+            yield f"what is {number} + 1\n" if number % 10 else "\n"
+
+    output = _Recorder(consumed)
+    assert run_batch(agent, lines(), output, workers=4, window=8) == 180
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [result["line"] for result in results] == [number + 1 for number in range(200) if number % 10]
+    assert all(result["intent"] == "calculator" for result in results)
+    assert results[0]["input"] == "what is 1 + 1" and "2" in results[0]["response"]
+    assert max(output.read_ahead) <= 8 + 1  # the window plus a skipped blank line
+    assert len(agent.conversation_history) == 180
@@ -0,0 +1,59 @@
+import actions
+from cache import LRUCache, TTLCache, VersionedCache
+from intents import IntentDetector
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.get("missing", "default") == "default"
+
+
+def test_ttl_entries_expire_as_misses():
+    now = [0.0]
+    cache = TTLCache(maxsize=4, ttl=10, clock=lambda: now[0])
+    cache.put("paris", "sunny")
+    now[0] = 9.9
+    assert cache.get("paris") == "sunny"
+    now[0] = 10.0
+    assert cache.get("paris") is None
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 0)
+
+
+def test_versioned_entries_are_served_only_for_their_version():
+    cache = VersionedCache(maxsize=4)
+    cache.put("notes", (1, 0), "no notes")
+    assert cache.get("notes", (1, 0)) == "no notes"
+    assert cache.get("notes", (1, 1)) is None
+    assert cache.get("notes", (1, 0)) is None  # The stale entry was dropped
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_detection_is_memoized_until_patterns_change(tmp_path):
+    detector = IntentDetector(classifier_path=str(tmp_path / "none.model"))
+    assert detector.detect_intent("tell me a joke")[0] == "unknown"
+    assert detector.detect_intent("  Tell me a joke ")[0] == "unknown"
+    assert detector.memo.hits == 1
+    detector.add_intent("joke", ["joke"], ["tell me a joke"], 0.9)
+    assert detector.detect_intent("tell me a joke")[0] == "joke"
+
+
+def test_cached_responses_follow_data_changes(data_dir):
+    hits = actions.response_cache.hits
+    assert actions.handle_show_notes() == "No notes saved yet."
+    assert actions.handle_show_notes() == "No notes saved yet."
+    assert actions.response_cache.hits == hits + 1
+    actions.handle_add_note("add note buy milk", {"content": "buy milk"})
+    assert "buy milk" in actions.handle_show_notes()
+
+    # A new data manager (e.g. another data directory) never sees old answers
+    actions.shutdown()
+    actions.__dict__.pop("data_manager")
+    actions.configure(str(data_dir / "other"))
+    assert actions.handle_show_notes() == "No notes saved yet."
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import classifier
+from classifier import HashedFeaturizer, IntentClassifier, read_labeled
+from intents import IntentDetector
+
+TRAINING = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training", "intents.tsv")
+
+
+@pytest.fixture(scope="module")
+def split():
+    examples = read_labeled(TRAINING)
+    return examples[:2400], examples[2400:]
+
+
+@pytest.fixture(scope="module")
+def model(split):
+    return IntentClassifier.train(split[0])
+
+
+def test_held_out_accuracy(model, split):
+    held_out = split[1]
+    predictions = model.predict_many([text for _, text in held_out])
+    correct = sum(label == predicted for (label, _), (predicted, _) in zip(held_out, predictions))
+    assert correct / len(held_out) >= 0.9
+
+
+def test_features_are_normalized_and_include_a_bias():
+    indices, values = HashedFeaturizer(dim=64).features("Weather in Oslo")
+    assert all(0 <= index < 64 for index in indices)
+    assert sum(value * value for value in values) == pytest.approx(1.0)
+    assert HashedFeaturizer(dim=64).features("")[1] == [1.0]
+
+
+def test_save_and_load_round_trip(model, split, tmp_path):
+    path = str(tmp_path / "intents.model")
+    model.save(path)
+    loaded = IntentClassifier.load(path)
+    texts = [text for _, text in split[1][:50]]
+    assert loaded.labels == model.labels
+    assert loaded.predict_many(texts) == model.predict_many(texts)
+    (tmp_path / "bad.model").write_bytes(b"nope")
+    with pytest.raises(ValueError):
+        IntentClassifier.load(str(tmp_path / "bad.model"))
+
+
+@pytest.mark.skipif(classifier.np is None, reason="NumPy is not installed")
+def test_pure_python_fallback_gives_the_same_predictions(split, monkeypatch):
+    examples = split[0][:300]
+    featurizer = HashedFeaturizer(dim=1 << 10)
+    texts = [text for _, text in split[1][:50]]
+    expected = IntentClassifier.train(examples, epochs=3, featurizer=featurizer).predict_many(texts)
+    monkeypatch.setattr(classifier, "np", None)
+    predictions = IntentClassifier.train(examples, epochs=3, featurizer=featurizer).predict_many(texts)
+    assert [label for label, _ in predictions] == [label for label, _ in expected]
+    assert [probability for _, probability in predictions] == pytest.approx(
+        [probability for _, probability in expected], abs=1e-4)
+
+
+def test_detector_defers_to_a_confident_classifier_only(model, tmp_path):
+    rules_only = IntentDetector(classifier_path=str(tmp_path / "none.model"))
+    assert rules_only.classifier is None
+    assert rules_only.detect_intent("will I need an umbrella in Oslo")[0] == "unknown"
+    detector = IntentDetector(classifier_path=str(tmp_path / "none.model"))
+    detector.classifier = model
+    assert detector.detect_intent("will I need an umbrella in Oslo")[0] == "weather"
+    # Rule matches above the threshold are not second-guessed
+    assert detector.detect_intent("what is 2 + 2") == rules_only.detect_intent("what is 2 + 2")
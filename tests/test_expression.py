@@ -0,0 +1,38 @@
+import pytest
+
+from expression import MAX_LENGTH, MAX_STEPS, ExpressionEngine, ExpressionError, ExpressionLimitError
+
+
+@pytest.fixture
+def engine():
+    return ExpressionEngine()
+
+
+@pytest.mark.parametrize("expression, value", [
+    ("2 + 3 * 4", 14), ("(2 + 3) * 4", 20), ("-2 ** 2", -4), ("7 // 2", 3), ("7 % 4", 3),
+    ("1 / 4", 0.25), ("2 ** -1", 0.5), ("2 ** 1000", 2 ** 1000), ("+1.5", 1.5),
+])
+def test_arithmetic(engine, expression, value):
+    assert engine.evaluate(expression) == value
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')", "x + 1", "(1).real", "[1, 2]", "'a' * 3", "1 if 1 else 2", "1 < 2", "True + 1", "1 +",
+])
+def test_anything_but_arithmetic_is_rejected(engine, expression):
+    with pytest.raises(ExpressionError):
+        engine.evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "9 ** 9 ** 9", "2 ** 1001", "10 ** 1000 * 10 ** 1000", "(10 ** 900) ** 2", "2 ** 4000 * 2 ** 4000",
+    "+".join(["1"] * (MAX_STEPS // 2 + 1)), "1" * (MAX_LENGTH + 1),
+])
+def test_limits_stop_expensive_expressions(engine, expression):
+    with pytest.raises(ExpressionLimitError):
+        engine.evaluate(expression)
+
+
+def test_compiled_expressions_are_cached(engine):
+    assert engine.compile(" 6 * 7 ") is engine.compile("6 * 7")
+    assert engine.compile("6 * 7")() == 42
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import fileops
+from fileops import FileWorkspace
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "files"
+    root.mkdir()
+    return FileWorkspace(str(root))
+
+
+@pytest.mark.parametrize("path", ["../secret.txt", "/etc/passwd", "sub/../../secret.txt", "link/secret.txt"])
+def test_paths_outside_the_root_are_refused(workspace, tmp_path, path):
+    (tmp_path / "secret.txt").write_text("secret\n")
+    os.symlink(str(tmp_path), os.path.join(workspace.root, "link"))
+    with pytest.raises(PermissionError):
+        workspace.read(path)
+    with pytest.raises(PermissionError):
+        workspace.append(path, "more")
+    assert (tmp_path / "secret.txt").read_text() == "secret\n"
+
+
+def test_create_never_overwrites(workspace):
+    assert workspace.create("notes/todo.txt", "first") == os.path.join("notes", "todo.txt")
+    with pytest.raises(FileExistsError):
+        workspace.create("notes/todo.txt", "second")
+    workspace.append("notes/todo.txt", "second")
+    assert workspace.read("notes/todo.txt").lines == [(1, "first"), (2, "second")]
+
+
+def test_binary_files_and_directories_are_not_read(workspace):
+    with open(os.path.join(workspace.root, "image.bin"), "wb") as f:
+        f.write(b"\x89PNG\0\0data")
+    with pytest.raises(ValueError):
+        workspace.read("image.bin")
+    os.mkdir(os.path.join(workspace.root, "folder"))
+    with pytest.raises(IsADirectoryError):
+        workspace.read("folder")
+
+
+def test_large_files_are_read_in_chunks(workspace, monkeypatch):
+    monkeypatch.setattr(fileops, "CHUNK_BYTES", 64)
+    lines = [f"line {number}" + (" error" if number % 7 == 0 else "") for number in range(1, 1001)]
+    with open(os.path.join(workspace.root, "app.log"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    page = workspace.read("app.log", page=3, page_lines=40)
+    assert page.lines == [(number, lines[number - 1]) for number in range(81, 121)] and page.more
+    assert [text for _, text in workspace.tail("app.log", 3).lines] == lines[-3:]
+    assert [text for _, text in workspace.head("app.log", 2).lines] == lines[:2]
+    matches = workspace.grep("app.log", "ERROR", page=2, page_lines=10)
+    assert [number for number, _ in matches.lines] == list(range(77, 147, 7))
+    assert matches.more
+    assert workspace.read("app.log", page=100).lines == []
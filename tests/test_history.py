@@ -0,0 +1,68 @@
+import threading
+
+from history import ConversationHistory, IntentCodes
+
+
+def _fill(history, count, start=0):
+    for index in range(start, start + count):
+        history.append(f"input {index}", "calculator", 0.9).response = f"response {index}"
+
+
+def test_ring_keeps_the_newest_interactions():
+    history = ConversationHistory(capacity=3)
+    _fill(history, 5)
+    assert len(history) == 5
+    assert [interaction.user for interaction in history.recent(2)] == ["input 3", "input 4"]
+    assert [interaction.user for interaction in history] == ["input 2", "input 3", "input 4"]
+
+
+def test_evicted_interactions_are_archived_in_order(tmp_path):
+    history = ConversationHistory(capacity=3, archive_dir=str(tmp_path), name="alice")
+    _fill(history, 10)
+    interactions = list(history)
+    assert [interaction.user for interaction in interactions] == [f"input {index}" for index in range(10)]
+    assert interactions[0].intent == "calculator"
+    assert interactions[0].response == "response 0"
+    history.close()
+
+
+def test_archive_rotation_keeps_the_newest_files(tmp_path):
+    history = ConversationHistory(capacity=1, archive_dir=str(tmp_path), max_archive_bytes=500, max_archive_files=2)
+    _fill(history, 100)
+    history.close()
+    assert (tmp_path / "history.jsonl.2").exists()
+    assert not (tmp_path / "history.jsonl.3").exists()
+    users = [interaction.user for interaction in ConversationHistory(archive_dir=str(tmp_path))]
+    assert users == [f"input {index}" for index in range(100 - len(users), 100)]
+
+
+def test_close_archives_the_buffered_interactions(tmp_path):
+    history = ConversationHistory(capacity=5, archive_dir=str(tmp_path))
+    _fill(history, 3)
+    history.close()
+    history.close()
+
+    restarted = ConversationHistory(capacity=5, archive_dir=str(tmp_path))
+    _fill(restarted, 8, start=3)
+    users = [interaction.user for interaction in restarted]
+    assert users == [f"input {index}" for index in range(11)]
+    restarted.close()
+    assert [interaction.user for interaction in ConversationHistory(archive_dir=str(tmp_path))] == users
+
+
+def test_intent_codes_are_consistent_across_threads():
+    codes = IntentCodes()
+    names = [f"intent{index}" for index in range(200)]
+    results = []
+
+    def assign():
+        results.append([codes.code(name) for name in names])
+
+    threads = [threading.Thread(target=assign) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(result == results[0] for result in results)
+    assert sorted(results[0]) == list(range(len(names)))
+    assert [codes.name(code) for code in results[0]] == names
@@ -0,0 +1,117 @@
+import pytest
+
+from intents import IntentDetector
+
+
+@pytest.fixture
+def detector():
+    return IntentDetector()
+
+
+def test_typo_in_keyword_phrase_is_routable(detector):
+    intent, confidence, slots = detector.parse("wether in paris")
+    assert intent == "weather"
+    assert confidence >= 0.3
+    assert slots["city"] == "paris"
+
+
+def test_typo_correction_is_discounted(detector):
+    assert detector.detect_intent("remnd me to call mom") == ("reminder", pytest.approx(0.7 * 0.85))
+
+
+@pytest.mark.parametrize("text", ["my friend is coming over", "what will happen next",
+                                  "help me decide between two options", "whether or not"])
+def test_common_words_are_not_corrected(detector, text):
+    assert detector.detect_intent(text) == ("unknown", 0.0)
+
+
+def test_correction_must_complete_a_phrase_or_be_the_only_evidence(detector):
+    detector.common_words = ()
+    # "show" is evidence of show_notes; corrected keywords alone may not outvote it
+    assert detector.detect_intent("show serch gogle") == ("show_notes", 0.1)
+    # With no other evidence, a lone corrected keyword is kept (and still below the routing threshold)
+    assert detector.detect_intent("my friend") == ("web_search", pytest.approx(0.1 * 0.85 ** 2))
+
+
+def test_missing_word_list_leaves_the_tier_working(detector, tmp_path):
+    detector.common_words_path = str(tmp_path / "missing.txt")
+    assert detector.common_words == frozenset()
+    assert detector.detect_intent("wether in paris")[0] == "weather"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("remind me to check the weather in paris", "reminder"),
+    ("add note: weather in paris is lovely", "add_note"),
+    ("remember that the weather in rome was hot", "add_note"),
+    ("what is the weather in paris", "weather"),
+])
+def test_command_phrases_outrank_other_phrases(detector, text, intent):
+    assert detector.detect_intent(text)[0] == intent
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("show the first 10 lines of app.log", "file_operation"),
+    ("last 5 lines of server.log", "file_operation"),
+    ("what are the guidelines of the project", "unknown"),
+])
+def test_lines_of_needs_a_word_boundary(detector, text, intent):
+    assert detector.detect_intent(text)[0] == intent
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("show reminders due today", "reminder"),
+    ("the rent is due today", "unknown"),
+])
+def test_due_needs_a_reminder_noun(detector, text, intent):
+    assert detector.detect_intent(text)[0] == intent
+
+
+def test_every_protected_word_is_a_near_miss_of_the_vocabulary(detector):
+    vocabulary = detector._get_compiled().vocabulary
+    for word in detector.common_words:
+        match = vocabulary.lookup(word)
+        assert match is not None and match[1] > 0, word
+
+
+def test_parse_scans_a_repeated_input_once(detector, monkeypatch):
+    calls = []
+    match = detector.slots.match
+    monkeypatch.setattr(detector.slots, "match", lambda intent, text: calls.append(text) or match(intent, text))
+    first = detector.parse("remind me to stretch in 20 minutes")
+    second = detector.parse("remind me to stretch in 20 minutes")
+    assert calls == ["remind me to stretch in 20 minutes"]
+    assert first[:2] == second[:2] == ("reminder", 0.7)
+    assert first[2]["text"] == second[2]["text"] == "stretch"
+    # The due time is relative to now, so it is worked out on every call
+    assert first[2]["due"] <= second[2]["due"]
+    assert first[2] is not second[2]
+
+
+def test_new_slot_patterns_invalidate_parsed_slots():
+    from slots import SlotExtractor
+    detector = IntentDetector(slots=SlotExtractor())
+    assert detector.parse("add note: buy milk")[2] == {"content": "buy milk"}
+    detector.slots.add("add_note", [r"^add note: (?P<content>\w+)"])
+    assert detector.parse("add note: buy milk")[2] == {"content": "buy"}
+
+
+BATCH_INPUTS = ["What's the weather in London?", "what is 2 + 2", "WHAT IS 2 + 2  ", "add note buy milk",
+                "remind me to call mom at 5pm", "show my notes", "qwerty asdf", "wether in paris",
+                "what is 2 + 2", "search for python tutorials", ""]
+
+
+def test_batch_detection_matches_single_detection(detector):
+    batch = detector.detect_intents(iter(BATCH_INPUTS))
+    expected = [detector.detect_intent(text) for text in BATCH_INPUTS]
+    assert len(batch) == len(BATCH_INPUTS)
+    assert batch.intents() == [intent for intent, _ in expected]
+    assert [batch[index] for index in range(len(batch))] == expected
+    assert list(batch) == expected
+    assert batch.intents()[6] == "unknown"
+
+
+def test_batch_results_are_compact_codes(detector):
+    batch = detector.detect_intents(BATCH_INPUTS * 100)
+    assert batch.codes.typecode == "H"
+    assert len(set(batch.codes)) <= len(batch.labels)
+    assert batch.intents()[:len(BATCH_INPUTS)] == batch.intents()[-len(BATCH_INPUTS):]
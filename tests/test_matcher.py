@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from matcher import PatternMatcher
+
+
+def test_finds_overlapping_and_nested_patterns():
+    matcher = PatternMatcher(["he", "she", "his", "hers", "remind me", "remind"])
+    assert matcher.find("ushers") == {"she", "he", "hers"}
+    assert matcher.find("please remind me") == {"remind", "remind me"}
+    assert matcher.find("nothing here") == {"he"}
+    assert matcher.find("") == set()
+
+
+def test_duplicates_share_an_id_and_empty_patterns_always_match():
+    matcher = PatternMatcher(["note", "", "note", "add"])
+    assert matcher.patterns == ["note", "", "add"]
+    assert matcher.find_ids("add a note") == {0, 1, 2}
+    assert matcher.find_ids("xyz") == {1}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_naive_substring_search(seed):
+    rng = random.Random(seed)
+    patterns = ["".join(rng.choice("ab ") for _ in range(rng.randint(1, 5))) for _ in range(40)]
+    matcher = PatternMatcher(patterns)
+    for _ in range(200):
+        text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 30)))
+        assert matcher.find(text) == {pattern for pattern in patterns if pattern in text}
@@ -0,0 +1,48 @@
+import os
+from datetime import datetime
+
+import actions
+from actions import DataManager
+from search import InvertedIndex
+
+
+def _add(data_manager, *contents):
+    for content in contents:
+        data_manager.add_note({"content": content, "created_at": datetime.now().isoformat()})
+
+
+def test_bm25_prefers_rarer_terms_and_shorter_notes():
+    index = InvertedIndex()
+    first = index.add(1, "buy milk and bread")
+    index.add(2, "milk")
+    index.add(3, "call the bank about the mortgage and the milk bill")
+    index.add(4, "bank holiday")
+    assert [key for key, _ in index.search("milk")] == [2, 1, 3]
+    assert [key for key, _ in index.search("milk mortgage")][0] == 3
+    assert index.search("nothing") == []
+    index.remove(first)
+    assert [key for key, _ in index.search("milk")] == [2, 3]
+
+
+def test_note_index_is_saved_and_caught_up(data_dir):
+    data_manager = actions.get_data_manager()
+    _add(data_manager, "buy milk", "dentist on friday", "milk the cows")
+    assert {note["content"] for note in data_manager.search_notes("milk")} == {"buy milk", "milk the cows"}
+    data_manager.close()
+    assert os.path.exists(os.path.join(str(data_dir), "notes.index.json"))
+
+    # Notes written while no index was loaded are indexed from the store on load
+    writer = DataManager(str(data_dir))
+    _add(writer, "oat milk")
+    writer.store.close()
+    reader = DataManager(str(data_dir))
+    assert reader.note_index.covered == 4
+    assert {note["content"] for note in reader.search_notes("milk")} == {"buy milk", "milk the cows", "oat milk"}
+    reader.close()
+
+
+def test_search_notes_intent(data_dir):
+    _add(actions.get_data_manager(), "pick up the dry cleaning", "dinner with sam")
+    response = actions.handle_search_notes("search my notes for cleaning")
+    assert "pick up the dry cleaning" in response and "dinner" not in response
+    assert actions.handle_search_notes("search my notes for zebras") == "No notes found matching 'zebras'."
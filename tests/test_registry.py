@@ -0,0 +1,83 @@
+import sys
+from importlib import metadata
+
+import pytest
+
+from intents import IntentDetector
+from registry import HandlerRegistry
+
+PLUGIN = '''
+import sys
+
+INTENT = {
+    "name": "%(name)s",
+    "keywords": ["%(name)s"],
+    "phrases": ["tell me a %(name)s"],
+    "confidence": 0.9,
+    "slots": [r"\\b%(name)s about (?P<topic>.+)"],
+}
+
+sys.modules.setdefault("imported_plugins", []).append("%(name)s")
+
+
+def handle(user_input, slots):
+    return "%(name)s: " + (slots.get("topic") or "anything")
+'''
+
+
+class SelectableGroups:
+    def __init__(self, groups):
+        self.groups = groups
+
+    def select(self, group):
+        return self.groups.get(group, [])
+
+
+@pytest.fixture
+def plugin_registry(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "imported_plugins", [])
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    (directory / "joke.py").write_text(PLUGIN % {"name": "joke"})
+    (directory / "_private.py").write_text("raise RuntimeError('never read')\n")
+    (directory / "broken.py").write_text("INTENT = {\n")
+    return HandlerRegistry(detector=IntentDetector(classifier_path=str(tmp_path / "none.model"))), str(directory)
+
+
+def test_plugins_are_imported_when_their_intent_first_fires(plugin_registry):
+    handlers, directory = plugin_registry
+    handlers.load_plugins(directory, group="test.none")
+    assert sys.modules["imported_plugins"] == []
+    assert not handlers.handlers["joke"].loaded
+
+    intent, _, slots = handlers.detector.parse("tell me a joke about cats")
+    assert intent == "joke"
+    assert handlers.dispatch(intent, "tell me a joke about cats", slots) == "joke: cats"
+    assert handlers.dispatch(intent, "tell me a joke") == "joke: anything"
+    assert sys.modules["imported_plugins"] == ["joke"]
+
+
+def test_plugins_are_discovered_once(plugin_registry):
+    handlers, directory = plugin_registry
+    handlers.load_plugins(directory, group="test.none")
+    handlers.load_plugins(directory, group="test.none")
+    assert "joke" in handlers.handlers and "broken" not in handlers.handlers
+
+
+@pytest.mark.parametrize("selectable", [True, False])
+def test_entry_point_plugins(plugin_registry, tmp_path, monkeypatch, selectable):
+    handlers, _ = plugin_registry
+    module = f"pun_plugin_{selectable}".lower()
+    (tmp_path / f"{module}.py").write_text(PLUGIN % {"name": "pun"})
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry_point = metadata.EntryPoint("pun", f"{module}:handle", "test.plugins")
+    groups = {"test.plugins": [entry_point]}
+    if selectable:
+        monkeypatch.setattr(metadata, "entry_points", lambda: SelectableGroups(groups))
+    else:
+        # Before Python 3.10 entry_points() returns a plain dict of groups
+        monkeypatch.setattr(metadata, "entry_points", lambda: groups)
+    handlers.load_plugins(None, group="test.plugins")
+    assert sys.modules["imported_plugins"] == []
+    assert handlers.dispatch("pun", "tell me a pun about fish") == "pun: fish"
+    assert sys.modules["imported_plugins"] == ["pun"]
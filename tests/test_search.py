@@ -0,0 +1,64 @@
+import itertools
+import math
+import random
+
+import pytest
+
+from search import InvertedIndex, tokenize
+
+DOCUMENTS = 100000
+WORDS = [f"w{rank}" for rank in range(20000)]
+
+
+def exhaustive(index: InvertedIndex, query: str, limit: int):
+    """Top keys by BM25 over every posting of every query term"""
+    terms = {term for term in tokenize(query) if term in index.postings}
+    doc_count = index.live
+    average_length = index.total_length / doc_count
+    scores = {}
+    for term in terms:
+        docs, frequencies = index.postings[term]
+        idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+        for doc, frequency in zip(docs, frequencies):
+            if doc not in index.deleted:
+                norm = index.K1 * (1 - index.B + index.B * index.doc_lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (index.K1 + 1) / (frequency + norm)
+    best = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)[:limit]
+    return [index.doc_keys[doc] for doc, _ in best]
+
+
+@pytest.fixture(scope="module")
+def index():
+    """100k documents of 5-30 words drawn from a Zipf distribution"""
+    rng = random.Random(5)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+    index = InvertedIndex()
+    for number in range(DOCUMENTS):
+        index.add(number, " ".join(rng.choices(WORDS, cum_weights=weights, k=rng.randint(5, 30))))
+    for number in range(0, DOCUMENTS, 97):
+        index.remove(number)
+    return index
+
+
+def queries(first, second, count=100, seed=11):
+    rng = random.Random(seed)
+    return [f"{rng.choice(first)} {rng.choice(second)}" for _ in range(count)]
+
+
+@pytest.mark.parametrize("kind, query_terms", [
+    ("rare", (WORDS[2000:], WORDS[2000:])),
+    ("common and rare", (WORDS[:50], WORDS[2000:])),
+    ("mid-frequency", (WORDS[50:300], WORDS[50:300])),
+])
+def test_results_match_exhaustive_bm25(index, kind, query_terms):
+    for query in queries(*query_terms):
+        assert set(key for key, _ in index.search(query, 10)) == set(exhaustive(index, query, 10)), query
+
+
+def test_common_term_recall_is_bounded(index):
+    recalls = []
+    for query in queries(WORDS[:50], WORDS[:50]):
+        expected = set(exhaustive(index, query, 10))
+        recalls.append(len(expected & {key for key, _ in index.search(query, 10)}) / len(expected))
+    assert sum(recalls) / len(recalls) >= 0.95
+    assert min(recalls) >= 0.5
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from server import AgentServer
+
+
+async def _talk(port: int, line: str) -> dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(line.encode() + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return reply
+
+
+def test_connection_sessions_are_dropped_on_disconnect(data_dir):
+    server = AgentServer(port=0, workers=2)
+
+    async def run():
+        await server.start()
+        replies = await asyncio.gather(*(_talk(server.port, "what is 2 + 2") for _ in range(5)))
+        assert all(reply["session"].startswith("conn-") for reply in replies)
+        for _ in range(100):
+            if not server.sessions:
+                break
+            await asyncio.sleep(0.01)
+        return len(server.sessions)
+
+    try:
+        assert asyncio.run(run()) == 0
+    finally:
+        server.close()
+
+
+def test_named_sessions_outlive_the_connection(data_dir):
+    server = AgentServer(port=0, workers=2)
+
+    async def run():
+        await server.start()
+        await _talk(server.port, json.dumps({"session": "alice", "input": "what is 2 + 2"}))
+        await asyncio.sleep(0.05)
+        return set(server.sessions)
+
+    try:
+        assert asyncio.run(run()) == {"alice"}
+    finally:
+        server.close()
+
+
+def test_least_recently_used_sessions_are_closed_past_the_cap(data_dir):
+    server = AgentServer(port=0, workers=2, max_sessions=2)
+
+    async def run():
+        for name in ("alice", "bob", "alice", "carol"):
+            await server.process(name, "what is 2 + 2")
+        return list(server.sessions)
+
+    try:
+        assert asyncio.run(run()) == ["alice", "carol"]
+        assert set(server._session_locks) == {"alice", "carol"}
+    finally:
+        server.close()
+
+
+def test_busy_sessions_are_not_closed(data_dir):
+    server = AgentServer(port=0, workers=2, max_sessions=1)
+
+    async def run():
+        # alice's status runs on a worker thread while bob's session is created
+        status = asyncio.ensure_future(server.process("alice", "status"))
+        await asyncio.sleep(0)
+        await server.process("bob", "what is 2 + 2")
+        assert "alice" in server.sessions
+        assert "Agent Status" in await status
+        await server.process("carol", "what is 2 + 2")
+        return list(server.sessions)
+
+    try:
+        assert asyncio.run(run()) == ["carol"]
+    finally:
+        server.close()
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from storage import JournalStore, JsonFileStore, SqliteStore, Store
+
+
+def test_compact_skips_corrupt_journal_lines(tmp_path):
+    store = JournalStore(str(tmp_path))
+    store.add("notes", {"id": 1, "content": "first"})
+    with open(os.path.join(tmp_path, "notes.journal.jsonl"), 'a') as f:
+        f.write("{not json\n")
+        f.write("[1, 2]\n")
+    store.compact("notes")
+    store.add("notes", {"id": 2, "content": "second"})
+    store.close()
+
+    reopened = JournalStore(str(tmp_path))
+    assert [item["id"] for item in reopened.all("notes")] == [1, 2]
+    reopened.close()
+
+
+def test_compact_keeps_journal_open_when_rewrite_fails(tmp_path, monkeypatch):
+    store = JournalStore(str(tmp_path))
+    store.add("notes", {"id": 1, "content": "first"})
+
+    replace = os.replace
+
+    def fail_on_journal(source, target):
+        if target.endswith(".journal.jsonl"):
+            raise OSError("disk full")
+        replace(source, target)
+
+    monkeypatch.setattr(os, "replace", fail_on_journal)
+    with pytest.raises(OSError):
+        store.compact("notes")
+    monkeypatch.undo()
+    store.add("notes", {"id": 2, "content": "second"})
+    store.close()
+
+    reopened = JournalStore(str(tmp_path))
+    assert [item["id"] for item in reopened.all("notes")] == [1, 2]
+    reopened.close()
+
+
+def test_store_requires_every_method():
+    class Partial(Store):
+        def all(self, name):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.parametrize("backend", [JsonFileStore, JournalStore, SqliteStore])
+def test_backends_implement_the_interface(tmp_path, backend):
+    store = backend(str(tmp_path))
+    store.add("notes", {"id": 1, "content": "first"})
+    assert store.max_id("notes") == 1
+    store.close()
+
+
+def test_json_writes_are_synchronous_by_default(data_dir):
+    import actions
+    data_manager = actions.get_data_manager()
+    assert data_manager.store.write_delay == 0
+    data_manager.add_note({"content": "kept"})
+    assert [note["content"] for note in JsonFileStore(str(data_dir)).all("notes")] == ["kept"]
+
+
+@pytest.mark.parametrize("finish", ["flush", "close"])
+def test_group_commit_writes_pending_changes(tmp_path, finish):
+    store = JsonFileStore(str(tmp_path), write_delay=60)
+    store.add("notes", {"id": 1, "content": "first"})
+    store.add("notes", {"id": 2, "content": "second"})
+    assert JsonFileStore(str(tmp_path)).all("notes") == []
+    getattr(store, finish)()
+    assert [item["id"] for item in JsonFileStore(str(tmp_path)).all("notes")] == [1, 2]
+    store.close()
+
+
+@pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+def test_notes_and_reminders_are_read_only_snapshots(tmp_path, storage):
+    from actions import DataManager
+    data_manager = DataManager(str(tmp_path), storage=storage)
+    data_manager.add_note({"content": "kept"})
+    with pytest.raises(AttributeError):
+        data_manager.notes.append({"id": 2, "content": "lost"})
+    with pytest.raises(AttributeError):
+        data_manager.reminders.append({"id": 1, "text": "lost"})
+    data_manager.save_notes()
+    assert [note["content"] for note in data_manager.notes] == ["kept"]
+    data_manager.close()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+
+import json
+
+import pytest
+
+import actions
+from server import AgentServer
+from tenants import ShardedAgentPool, TenantRegistry
+
+
+def test_workers_receive_the_configured_directories(tmp_path):
+    files_dir = tmp_path / "shared-files"
+    actions.configure(str(tmp_path / "data"), files_dir=str(files_dir))
+    pool = ShardedAgentPool(2, root=str(tmp_path / "users"))
+    try:
+        assert pool.process("alice", "create file: hello.txt") == "Created hello.txt."
+    finally:
+        pool.close()
+        actions.configure()
+    # Each user's files live in their own subdirectory of the files directory
+    assert os.path.exists(files_dir / "alice" / "hello.txt")
+
+
+def test_users_cannot_read_each_others_data(tmp_path):
+    actions.configure(str(tmp_path / "data"))
+    pool = ShardedAgentPool(1)
+    try:
+        assert pool.root == str(tmp_path / "data" / "users")
+        pool.process("files", "add note: my secret")
+        pool.process("mallory", "create file: hello.txt")
+        assert pool.process("mallory", "read file: notes.json") == "File not found: notes.json"
+        assert pool.process("mallory", "read file: ../files/notes.json").startswith("Permission denied")
+    finally:
+        pool.close()
+        actions.configure()
+    assert not os.path.exists(tmp_path / "data" / "files" / "notes.json")
+    assert not os.path.exists(tmp_path / "data" / "users" / "files")
+
+
+def test_user_root_must_not_overlap_shared_data(tmp_path):
+    actions.configure(str(tmp_path / "data"))
+    try:
+        for root in (tmp_path, tmp_path / "data", tmp_path / "data" / "files"):
+            with pytest.raises(ValueError):
+                ShardedAgentPool(1, root=str(root))
+    finally:
+        actions.configure()
+
+
+def test_shared_services_use_the_shared_config(data_dir):
+    with open(data_dir / "config.json", "w") as f:
+        json.dump({"weather_api_key": "shared-key"}, f)
+    tenants = TenantRegistry(str(data_dir / "users"))
+    try:
+        tenant = tenants.get("alice")
+        token = actions.activate_tenant(tenant)
+        try:
+            assert actions.get_data_manager().config.get("weather_api_key", "") == ""
+            assert actions.get_weather_service().api_key == "shared-key"
+        finally:
+            actions.deactivate_tenant(token)
+    finally:
+        tenants.close()
+
+
+def test_tenant_reminders_fire(tmp_path):
+    tenants = TenantRegistry(str(tmp_path), fire_reminders=True)
+    fired = []
+    try:
+        tenants.handle("alice", "remind me to stretch in 2 seconds")
+        tenant = tenants.get("alice")
+        tenant.service("reminder_manager", None).scheduler.listeners.append(fired.append)
+        deadline = time.monotonic() + 5
+        while not fired and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        tenants.close()
+    assert [reminder["text"] for reminder in fired] == ["stretch"]
+
+
+def test_server_unloads_idle_tenants(tmp_path):
+    pool = ShardedAgentPool(1, root=str(tmp_path), idle_timeout=0.2)
+    server = AgentServer(port=0, workers=2, pool=pool, evict_interval=0.1)
+
+    async def run():
+        await server.start()
+        await server.process("alice", "what is 2 + 2")
+        await asyncio.sleep(0.6)
+
+    try:
+        asyncio.run(run())
+        assert pool.stats()[0]["tenants"] == 0
+        assert pool.stats()[0]["evicted"] == 1
+    finally:
+        server.close()
+        pool.close()
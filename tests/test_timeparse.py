@@ -0,0 +1,30 @@
+from datetime import datetime
+
+import pytest
+
+from timeparse import parse_time_expression
+
+EVENING = datetime(2026, 3, 10, 21, 40, 15)  # A Tuesday
+
+
+@pytest.mark.parametrize("text, due", [
+    ("call bob today", datetime(2026, 3, 10, 22, 0)),
+    ("call bob tonight", datetime(2026, 3, 10, 22, 0)),
+    ("call bob tomorrow", datetime(2026, 3, 11, 9, 0)),
+    ("call bob in 20 minutes", datetime(2026, 3, 10, 22, 0, 15)),
+    ("call bob at 9am", datetime(2026, 3, 11, 9, 0)),
+    ("call bob at 11pm", datetime(2026, 3, 10, 23, 0)),
+    ("call bob on friday at 5:30pm", datetime(2026, 3, 13, 17, 30)),
+])
+def test_due_times(text, due):
+    assert parse_time_expression(text, EVENING) == (due, "call bob")
+
+
+def test_day_only_today_keeps_its_default_time_while_in_the_future():
+    morning = datetime(2026, 3, 10, 7, 0)
+    assert parse_time_expression("call bob today", morning)[0] == datetime(2026, 3, 10, 9, 0)
+    assert parse_time_expression("call bob tonight", morning)[0] == datetime(2026, 3, 10, 20, 0)
+
+
+def test_text_without_a_time_is_unchanged():
+    assert parse_time_expression("call bob", EVENING) == (None, "call bob")
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import actions
+from actions import WeatherService
+from metrics import metrics
+
+
+class WeatherStub:
+    """Local OpenWeatherMap look-alike that records the cities asked for"""
+
+    BODY = {"main": {"temp": 18.5, "humidity": 60}, "weather": [{"description": "light rain"}], "wind": {"speed": 3.2}}
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                city = parse_qs(urlparse(self.path).query)["q"][0]
+                stub.requests.append(city)
+                time.sleep(stub.delay)
+                if city == "nowhere":
+                    status, body = 404, {"cod": "404", "message": "city not found"}
+                elif city == "garbled":
+                    status, body = 200, {"unexpected": True}
+                else:
+                    status, body = 200, stub.BODY
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/weather"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = WeatherStub()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def weather(data_dir, stub):
+    service = WeatherService(api_key="test-key", base_url=stub.url, cache_ttl=60)
+    yield service
+    service.close()
+
+
+def test_responses_are_cached_per_city(weather, stub):
+    first = weather.get_weather("Paris")
+    assert first == "Weather in Paris: Light Rain, 18.5°C, Humidity: 60%, Wind: 3.2 m/s"
+    assert weather.get_weather("  paris ") .startswith("Weather in   paris : Light Rain")
+    assert stub.requests == ["Paris"]
+    assert (weather.cache.hits, weather.cache.misses) == (1, 1)
+
+
+def test_expired_responses_are_fetched_again(data_dir, stub):
+    weather = WeatherService(api_key="test-key", base_url=stub.url, cache_ttl=0.05)
+    try:
+        weather.get_weather("Paris")
+        time.sleep(0.1)
+        weather.get_weather("Paris")
+    finally:
+        weather.close()
+    assert stub.requests == ["Paris", "Paris"]
+
+
+def test_concurrent_requests_for_a_city_share_one_call(weather, stub):
+    stub.delay = 0.2
+    responses = asyncio.run(weather.get_weather_many(["Rome", "rome", "Oslo", "ROME"]))
+    assert [response.split(":")[0] for response in responses] == [
+        "Weather in Rome", "Weather in rome", "Weather in Oslo", "Weather in ROME"]
+    assert sorted(stub.requests) == ["Oslo", "Rome"]
+    assert weather.coalesced == 2
+
+
+def test_concurrent_threads_share_one_call(weather, stub):
+    stub.delay = 0.2
+    threads = [threading.Thread(target=weather.get_weather, args=("Lima",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stub.requests == ["Lima"]
+    assert weather.coalesced == 4
+
+
+def test_http_errors_are_reported_and_not_cached(weather, stub):
+    expected = "Sorry, I couldn't get weather data for nowhere. Please check the city name and try again."
+    assert weather.get_weather("nowhere") == expected
+    assert weather.get_weather("nowhere") == expected
+    assert stub.requests == ["nowhere", "nowhere"]
+
+
+def test_unexpected_payloads_are_reported(weather):
+    assert weather.get_weather("garbled") == "Sorry, there was an error getting weather information."
+
+
+def test_unreachable_api_is_reported(data_dir):
+    weather = WeatherService(api_key="test-key", base_url="http://127.0.0.1:9/weather")
+    try:
+        assert weather.get_weather("Paris").startswith("Sorry, I couldn't get weather data for Paris")
+    finally:
+        weather.close()
+
+
+def test_missing_api_key_makes_no_request(data_dir, stub):
+    weather = WeatherService(base_url=stub.url)
+    try:
+        assert weather.get_weather("Paris").startswith("Weather API key not configured")
+    finally:
+        weather.close()
+    assert stub.requests == []
+
+
+def test_metrics_collector_lives_as_long_as_the_service(data_dir, stub):
+    collectors = len(metrics._collectors)
+    for _ in range(3):
+        weather = WeatherService(api_key="test-key", base_url=stub.url)
+        assert len(metrics._collectors) == collectors + 1
+        weather.close()
+    assert len(metrics._collectors) == collectors
+
+    actions.get_weather_service()
+    assert len(metrics._collectors) == collectors + 1
+    actions.shutdown()
+    assert len(metrics._collectors) == collectors
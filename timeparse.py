@@ -0,0 +1,97 @@
+import re
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20, "thirty": 30,
+    "half an": 0.5, "half a": 0.5,
+}
+
+_UNITS = {
+    "second": "seconds", "sec": "seconds",
+    "minute": "minutes", "min": "minutes",
+    "hour": "hours", "hr": "hours",
+    "day": "days",
+    "week": "weeks",
+}
+
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+_RELATIVE = re.compile(
+    r"\bin\s+(\d+(?:\.\d+)?|half an?|an?|" + "|".join(w for w in _NUMBER_WORDS if " " not in w) + r")\s+"
+    r"(second|sec|minute|min|hour|hr|day|week)s?\b"
+)
+_DAY = re.compile(r"\b(?:on\s+)?(today|tonight|tomorrow|" + "|".join(_WEEKDAYS) + r")\b")
+_CLOCK = re.compile(r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\bat\s+(\d{1,2})(?::(\d{2}))?\b|\b(?:at\s+)?(noon|midnight)\b")
+
+# Default clock time when only a day is given
+_DEFAULT_HOUR = {"tonight": 20}
+_MORNING = 9
+
+
+def _clock(match) -> Optional[Tuple[int, int]]:
+    """(hour, minute) from a _CLOCK match, or None if out of range"""
+    if match.group(6):
+        return (12, 0) if match.group(6) == "noon" else (0, 0)
+    if match.group(1):
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    else:
+        hour, minute = int(match.group(4)), int(match.group(5) or 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+
+def parse_time_expression(text: str, now: datetime = None) -> Tuple[Optional[datetime], str]:
+    """
+    Find a due time like "in 20 minutes", "tomorrow 9am" or "at 5:30pm" in text
+    Returns: (due datetime or None, text with the time expression removed)
+    """
+    now = now or datetime.now()
+    lowered = text.lower()
+    spans = []
+
+    relative = _RELATIVE.search(lowered)
+    if relative:
+        amount = relative.group(1)
+        amount = float(amount) if amount[0].isdigit() else _NUMBER_WORDS[amount]
+        due = now + timedelta(**{_UNITS[relative.group(2)]: amount})
+        spans.append(relative.span())
+    else:
+        day = _DAY.search(lowered)
+        clock = _CLOCK.search(lowered)
+        hour_minute = _clock(clock) if clock else None
+        if not day and not hour_minute:
+            return None, text
+        timed = hour_minute is not None
+
+        date = now.date()
+        if day:
+            spans.append(day.span())
+            name = day.group(1)
+            if name == "tomorrow":
+                date += timedelta(days=1)
+            elif name in _WEEKDAYS:
+                days_ahead = (_WEEKDAYS.index(name) - date.weekday()) % 7 or 7
+                date += timedelta(days=days_ahead)
+            if hour_minute is None:
+                hour_minute = (_DEFAULT_HOUR.get(name, _MORNING), 0)
+        if clock and hour_minute:
+            spans.append(clock.span())
+
+        due = datetime.combine(date, datetime.min.time()).replace(hour=hour_minute[0], minute=hour_minute[1])
+        if due <= now and not day:
+            due += timedelta(days=1)  # "at 9am" after 9am means tomorrow
+        elif due <= now and not timed:
+            # "today" after 9am (or "tonight" after 8pm): the next full hour
+            due = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    remaining = text
+    for start, end in sorted(spans, reverse=True):
+        remaining = remaining[:start] + remaining[end:]
+    remaining = re.sub(r"\s+", " ", remaining).strip(" ,.:")
+    return due.replace(microsecond=0), remaining
@@ -0,0 +1,151 @@
+"""
+Paraphrase templates for the intent classifier's training and evaluation sets
+
+TRAIN and EVAL use different phrasings, so the evaluation measures how
+well the classifier generalizes to wordings it has not seen.
+
+Usage: python training/templates.py [--count N] [--eval] > training/intents.tsv
+"""
+
+import argparse
+import random
+from typing import Dict, Iterator, List, Tuple
+
+FILLERS = {
+    "city": ["London", "Paris", "New York", "Tokyo", "Berlin", "Madrid", "Sydney", "Toronto", "Lisbon",
+             "Chicago", "Mumbai", "Cairo", "Oslo", "Seoul", "Dublin", "Rome"],
+    "chore": ["buy groceries", "call mom", "check email", "pay rent", "water the plants", "book flights",
+              "renew my passport", "pick up the kids", "send the invoice", "clean the garage",
+              "walk the dog", "fix the bike", "order a birthday cake", "cancel the gym membership"],
+    "topic": ["Python tutorials", "AI", "machine learning", "databases", "compilers", "networking",
+              "the french revolution", "black holes", "sourdough baking", "electric cars", "rust lifetimes"],
+    "file": ["notes.txt", "config.json", "report.md", "todo.txt", "data.csv", "server.log", "main.py"],
+    "when": ["tomorrow", "in 20 minutes", "at 5pm", "tonight", "on friday", "in an hour", "at noon"],
+    "n": [str(n) for n in (2, 3, 7, 12, 15, 27, 42, 99, 100, 250, 365, 1024)],
+}
+
+TRAIN: Dict[str, List[str]] = {
+    "weather": [
+        "what's the weather in {city}", "weather in {city}", "how's the weather today",
+        "is it going to rain in {city}", "will it be sunny in {city} tomorrow", "forecast for {city}",
+        "temperature in {city}", "how hot is it in {city}", "do i need an umbrella in {city}",
+        "is it cold outside", "what's it like outside in {city}", "should i bring a jacket",
+        "is it snowing in {city}", "how humid is it in {city}", "what's the forecast like",
+    ],
+    "add_note": [
+        "add note: {chore}", "remember: {chore}", "note that i need to {chore}", "save a note {chore}",
+        "jot down {chore}", "write down that i should {chore}", "make a note to {chore}",
+        "put {chore} in my notes", "take a note: {chore}", "create a note about {topic}",
+        "keep in mind that i have to {chore}", "please note {chore}", "add to my notes {chore}",
+    ],
+    "search_notes": [
+        "search notes for {chore}", "find my notes about {topic}", "search my notes for {topic}",
+        "notes about {topic}", "do i have any notes on {topic}", "look through my notes for {chore}",
+        "which notes mention {topic}", "find notes containing {chore}", "any notes mentioning {topic}",
+        "did i write anything about {topic}",
+    ],
+    "show_notes": [
+        "show my notes", "list notes", "display my notes", "view notes", "what notes do i have",
+        "show me everything i noted", "read my notes back to me", "open my notes", "list all my notes",
+        "what did i write down", "let me see my notes", "print my notes",
+    ],
+    "calculator": [
+        "what is {n} + {n}", "calculate {n} / {n}", "{n} * {n} + {n}", "how much is {n} times {n}",
+        "compute {n} - {n}", "what's {n} divided by {n}", "add {n} and {n}", "multiply {n} by {n}",
+        "subtract {n} from {n}", "{n} plus {n}", "what do you get when you multiply {n} and {n}",
+        "solve {n} * ({n} + {n})", "sum of {n} and {n}", "{n} minus {n}",
+    ],
+    "reminder": [
+        "remind me to {chore}", "set reminder: {chore} {when}", "remind me to {chore} {when}",
+        "show reminders", "list my reminders", "set an alarm for {when}", "don't let me forget to {chore}",
+        "ping me {when} to {chore}", "schedule {chore} {when}", "what reminders do i have",
+        "can you remind me about {chore}", "nudge me {when} to {chore}", "i need a reminder to {chore}",
+        "alert me {when}",
+    ],
+    "web_search": [
+        "search for {topic}", "find information about {topic}", "look up {topic}", "google {topic}",
+        "search the web for {topic}", "who invented {topic}", "tell me about {topic}",
+        "i want to learn about {topic}", "can you research {topic}", "find articles on {topic}",
+        "what's the latest on {topic}", "browse for {topic}",
+    ],
+    "file_operation": [
+        "create file: {file}", "read file: {file}", "open {file}", "delete file {file}",
+        "write to file {file}", "show me the contents of {file}", "make a new file called {file}",
+        "append a line to {file}", "print the first lines of {file}", "grep {file} for error",
+        "what's in {file}", "remove {file}", "tail {file}",
+    ],
+    "unknown": [
+        "tell me a joke", "good morning", "hello", "thanks", "how are you", "who are you",
+        "what's your name", "that's great", "never mind", "sing me a song", "i'm bored", "ok cool",
+        "you're funny", "good night", "what can you do",
+    ],
+}
+
+EVAL: Dict[str, List[str]] = {
+    "weather": [
+        "any chance of rain in {city} {when}", "give me the {city} weather", "how warm will it be {when}",
+        "is the weather nice in {city}", "what should i wear in {city} today", "will it storm in {city}",
+    ],
+    "add_note": [
+        "note down {chore}", "store a note saying {chore}", "i want to save this: {chore}",
+        "log a note: {chore}", "add {chore} to notes",
+    ],
+    "search_notes": [
+        "look in my notes for {topic}", "have i noted anything about {chore}", "search through notes for {topic}",
+        "find the note where i mentioned {chore}",
+    ],
+    "show_notes": [
+        "show all notes", "can i see my notes", "list everything in my notes", "display all saved notes",
+    ],
+    "calculator": [
+        "what's {n} plus {n}", "divide {n} by {n}", "how much is {n} minus {n}", "{n} times {n}",
+        "work out {n} * {n}",
+    ],
+    "reminder": [
+        "remember to tell me to {chore} {when}", "please remind me {when} to {chore}",
+        "create a reminder for {chore}", "wake me up {when}", "show me my reminders",
+    ],
+    "web_search": [
+        "search online for {topic}", "what does wikipedia say about {topic}", "research {topic} for me",
+        "find me information on {topic}", "look into {topic}",
+    ],
+    "file_operation": [
+        "open the file {file}", "delete {file} please", "create a file named {file}",
+        "read the contents of {file}", "show the last lines of {file}",
+    ],
+    "unknown": [
+        "hey there", "what's up", "thank you so much", "you are awesome", "bye for now", "lol",
+    ],
+}
+
+
+def generate(templates: Dict[str, List[str]], count: int, seed: int = 7) -> Iterator[Tuple[str, str]]:
+    """(intent, utterance) pairs, cycling intents evenly"""
+    rng = random.Random(seed)
+    intents = sorted(templates)
+    for index in range(count):
+        intent = intents[index % len(intents)]
+        template = rng.choice(templates[intent])
+        text = template
+        for name, values in FILLERS.items():
+            while "{" + name + "}" in text:
+                text = text.replace("{" + name + "}", rng.choice(values), 1)
+        if rng.random() < 0.3:
+            text = text.capitalize()
+        if rng.random() < 0.2:
+            text += rng.choice(["?", ".", "!", " please"])
+        yield intent, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=3000)
+    parser.add_argument("--eval", action="store_true", help="use the held-out phrasings")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for intent, text in generate(EVAL if args.eval else TRAIN, args.count, args.seed):
+        print(f"{intent}\t{text}")
+
+
+if __name__ == "__main__":
+    main()